@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler
 from datetime import datetime, timedelta
+from metrics import timed
 
 # Industry-specific benchmarks
 INDUSTRY_BENCHMARKS = {
@@ -62,12 +63,12 @@ def calculate_profitability_ratios(df):
     """Calculate profitability ratios"""
     profit = df['annual_revenue'] - df['total_expenses']
     rev = float(df['annual_revenue'].iloc[0]) if 'annual_revenue' in df.columns else 0.0
-    profit_margin = (profit / rev * 100) if rev > 0 else 0
+    profit_margin = (profit / rev * 100).iloc[0] if rev > 0 else 0
 
     # ROA: prefer total_assets if available, otherwise use 'roce' if present
     try:
         if 'total_assets' in df.columns and float(df['total_assets'].iloc[0]) > 0:
-            roa = (profit / float(df['total_assets'].iloc[0]) * 100)
+            roa = (profit / float(df['total_assets'].iloc[0]) * 100).iloc[0]
         elif 'roce' in df.columns:
             roa = float(df['roce'].iloc[0])
         else:
@@ -79,14 +80,17 @@ def calculate_profitability_ratios(df):
     try:
         if 'total_assets' in df.columns and 'total_liabilities' in df.columns:
             equity = float(df['total_assets'].iloc[0]) - float(df['total_liabilities'].iloc[0])
-            roe = (profit / equity * 100) if equity > 0 else 0
+            roe = (profit / equity * 100).iloc[0] if equity > 0 else 0
         else:
             roe = 0
     except Exception:
         roe = 0
 
+    # float() before round(): round() on a NumPy scalar rounds the NumPy way
+    # (scale, round half to even, unscale) and can differ from the builtin's
+    # correctly rounded result, e.g. 0.95 vs 0.94
     return {
-        'profit_margin': round(float(profit_margin.iloc[0]) if hasattr(profit_margin, 'iloc') else float(profit_margin), 2),
+        'profit_margin': round(float(profit_margin), 2),
         'roa': round(float(roa), 2),
         'roe': round(float(roe), 2),
         'net_profit': int(profit.iloc[0])
@@ -149,103 +153,140 @@ def calculate_working_capital_metrics(df):
         'operating_cash_flow': int(operating_cash_flow.iloc[0])
     }
 
+# Creditworthiness scoring bands (weight: 20 points per ratio).
+# Each ratio is checked against its bands in order; the first band whose
+# threshold is met awards its points, otherwise the fallback band applies.
+CREDITWORTHINESS_BANDS = [
+    {
+        'group': 'liquidity', 'ratio': 'current_ratio', 'op': '>=',
+        'bands': [
+            (2.0, 20, "Strong current ratio - Excellent short-term liquidity"),
+            (1.5, 15, "Good current ratio - Adequate short-term liquidity"),
+            (1.0, 10, "Moderate current ratio - Acceptable liquidity")
+        ],
+        'fallback': (5, "Low current ratio - Potential liquidity concerns")
+    },
+    {
+        'group': 'leverage', 'ratio': 'debt_equity_ratio', 'op': '<=',
+        'bands': [
+            (1.0, 20, "Healthy debt-equity ratio - Conservative leverage"),
+            (1.5, 15, "Moderate debt-equity ratio - Acceptable leverage"),
+            (2.0, 10, "High debt-equity ratio - Watch leverage levels")
+        ],
+        'fallback': (5, "Very high debt-equity ratio - Risk of over-leverage")
+    },
+    {
+        'group': 'profitability', 'ratio': 'profit_margin', 'op': '>=',
+        'bands': [
+            (15, 20, "Excellent profit margin - Strong profitability"),
+            (10, 15, "Good profit margin - Healthy profitability"),
+            (5, 10, "Moderate profit margin - Acceptable profitability")
+        ],
+        'fallback': (5, "Low profit margin - Profitability concerns")
+    },
+    {
+        'group': 'leverage', 'ratio': 'dscr', 'op': '>=', 'default': 1.0,
+        'bands': [
+            (1.5, 20, "Strong DSCR - Excellent debt servicing ability"),
+            (1.2, 15, "Good DSCR - Healthy debt servicing"),
+            (1.0, 10, "Adequate DSCR - Acceptable debt servicing")
+        ],
+        'fallback': (5, "Low DSCR - Debt servicing concerns")
+    },
+    {
+        'group': 'profitability', 'ratio': 'roe', 'op': '>=',
+        'bands': [
+            (20, 20, "Excellent ROE - Strong shareholder returns"),
+            (15, 15, "Good ROE - Healthy returns"),
+            (5, 10, "Moderate ROE - Acceptable returns")
+        ],
+        'fallback': (5, "Low ROE - Limited returns")
+    }
+]
+
+# Minimum creditworthiness score for each risk category, best first
+RISK_CATEGORY_BANDS = [
+    (80, "Low Risk"),
+    (60, "Medium Risk"),
+    (40, "High Risk")
+]
+RISK_CATEGORY_FALLBACK = "Critical Risk"
+RISK_CATEGORIES = [category for _, category in RISK_CATEGORY_BANDS] + [RISK_CATEGORY_FALLBACK]
+
+# Interned detail messages in band table order; the batch scorer returns indices into this list
+CREDITWORTHINESS_MESSAGES = [
+    message
+    for entry in CREDITWORTHINESS_BANDS
+    for message in [band[2] for band in entry['bands']] + [entry['fallback'][1]]
+]
+
+def _meets_band(value, op, threshold):
+    return value >= threshold if op == '>=' else value <= threshold
+
 def assess_creditworthiness(df, ratios):
     """Assess creditworthiness based on financial metrics"""
     score = 0
     details = []
-    
-    # Current ratio assessment (weight: 20)
-    if ratios['liquidity']['current_ratio'] >= 2.0:
-        score += 20
-        details.append("Strong current ratio - Excellent short-term liquidity")
-    elif ratios['liquidity']['current_ratio'] >= 1.5:
-        score += 15
-        details.append("Good current ratio - Adequate short-term liquidity")
-    elif ratios['liquidity']['current_ratio'] >= 1.0:
-        score += 10
-        details.append("Moderate current ratio - Acceptable liquidity")
-    else:
-        score += 5
-        details.append("Low current ratio - Potential liquidity concerns")
-    
-    # Debt-to-equity assessment (weight: 20)
-    if ratios['leverage']['debt_equity_ratio'] <= 1.0:
-        score += 20
-        details.append("Healthy debt-equity ratio - Conservative leverage")
-    elif ratios['leverage']['debt_equity_ratio'] <= 1.5:
-        score += 15
-        details.append("Moderate debt-equity ratio - Acceptable leverage")
-    elif ratios['leverage']['debt_equity_ratio'] <= 2.0:
-        score += 10
-        details.append("High debt-equity ratio - Watch leverage levels")
-    else:
-        score += 5
-        details.append("Very high debt-equity ratio - Risk of over-leverage")
-    
-    # Profitability assessment (weight: 20)
-    if ratios['profitability']['profit_margin'] >= 15:
-        score += 20
-        details.append("Excellent profit margin - Strong profitability")
-    elif ratios['profitability']['profit_margin'] >= 10:
-        score += 15
-        details.append("Good profit margin - Healthy profitability")
-    elif ratios['profitability']['profit_margin'] >= 5:
-        score += 10
-        details.append("Moderate profit margin - Acceptable profitability")
-    else:
-        score += 5
-        details.append("Low profit margin - Profitability concerns")
-    
-    # DSCR assessment (weight: 20)
-    dscr = ratios['leverage'].get('dscr', 1.0)
-    if dscr >= 1.5:
-        score += 20
-        details.append("Strong DSCR - Excellent debt servicing ability")
-    elif dscr >= 1.2:
-        score += 15
-        details.append("Good DSCR - Healthy debt servicing")
-    elif dscr >= 1.0:
-        score += 10
-        details.append("Adequate DSCR - Acceptable debt servicing")
-    else:
-        score += 5
-        details.append("Low DSCR - Debt servicing concerns")
-    
-    # ROE assessment (weight: 20)
-    if ratios['profitability']['roe'] >= 20:
-        score += 20
-        details.append("Excellent ROE - Strong shareholder returns")
-    elif ratios['profitability']['roe'] >= 15:
-        score += 15
-        details.append("Good ROE - Healthy returns")
-    elif ratios['profitability']['roe'] >= 5:
-        score += 10
-        details.append("Moderate ROE - Acceptable returns")
-    else:
-        score += 5
-        details.append("Low ROE - Limited returns")
-    
+
+    for entry in CREDITWORTHINESS_BANDS:
+        value = ratios[entry['group']].get(entry['ratio'], entry.get('default'))
+        points, detail = entry['fallback']
+        for threshold, band_points, band_detail in entry['bands']:
+            if _meets_band(value, entry['op'], threshold):
+                points, detail = band_points, band_detail
+                break
+        score += points
+        details.append(detail)
+
     return score, details
 
 def assess_financial_health(df, creditworthiness_score):
     """Assess overall financial health and risk"""
-    risk_category = "Low Risk"
-    health_score = creditworthiness_score
-    
-    if creditworthiness_score >= 80:
-        risk_category = "Low Risk"
-    elif creditworthiness_score >= 60:
-        risk_category = "Medium Risk"
-    elif creditworthiness_score >= 40:
-        risk_category = "High Risk"
-    else:
-        risk_category = "Critical Risk"
-    
+    risk_category = RISK_CATEGORY_FALLBACK
+    for min_score, category in RISK_CATEGORY_BANDS:
+        if creditworthiness_score >= min_score:
+            risk_category = category
+            break
+
     return {
-        'health_score': health_score,
+        'health_score': creditworthiness_score,
         'risk_category': risk_category
     }
 
+def score_creditworthiness(ratio_columns):
+    """Score many businesses at once against CREDITWORTHINESS_BANDS.
+
+    ratio_columns maps each ratio named in the band table to an array, as
+    returned by calculate_ratio_columns. Returns (scores, risk_categories,
+    detail_indices): integer scores, risk category strings and an
+    (n, len(CREDITWORTHINESS_BANDS)) array of indices into
+    CREDITWORTHINESS_MESSAGES.
+    """
+    n = len(ratio_columns[CREDITWORTHINESS_BANDS[0]['ratio']])
+    scores = np.zeros(n, dtype=np.int64)
+    detail_indices = np.empty((n, len(CREDITWORTHINESS_BANDS)), dtype=np.int16)
+
+    message_offset = 0
+    for position, entry in enumerate(CREDITWORTHINESS_BANDS):
+        values = np.asarray(ratio_columns[entry['ratio']], dtype=float)
+        thresholds = [band[0] for band in entry['bands']]
+        # NaN fails every comparison and lands in the fallback band, as in the scalar path
+        with np.errstate(invalid='ignore'):
+            conditions = [_meets_band(values, entry['op'], threshold) for threshold in thresholds]
+        band_index = np.select(conditions, np.arange(len(thresholds)), default=len(thresholds))
+        points = np.array([band[1] for band in entry['bands']] + [entry['fallback'][0]], dtype=np.int64)
+
+        scores += points[band_index]
+        detail_indices[:, position] = message_offset + band_index
+        message_offset += len(thresholds) + 1
+
+    risk_conditions = [scores >= min_score for min_score, _ in RISK_CATEGORY_BANDS]
+    risk_index = np.select(risk_conditions, np.arange(len(RISK_CATEGORY_BANDS)), default=len(RISK_CATEGORY_BANDS))
+    risk_categories = np.array(RISK_CATEGORIES, dtype=object)[risk_index]
+
+    return scores, risk_categories, detail_indices
+
+@timed('perform_analysis')
 def perform_analysis(df):
     """Perform comprehensive financial analysis"""
     if df is None or df.empty:
@@ -321,3 +362,273 @@ def perform_analysis(df):
         # Industry Comparison
         'industry_benchmarks': INDUSTRY_BENCHMARKS.get(df['industry_type'].iloc[0] if 'industry_type' in df.columns else 'Services', INDUSTRY_BENCHMARKS['Services'])
     }
+
+def _round_values(values, ndigits):
+    """Round like the builtin round() so batch output matches perform_analysis.
+
+    np.round on the scaled value gives the same result except within
+    floating-point error of a .5 tie or beyond 2**52, so only those
+    elements go through the builtin.
+    """
+    values = np.asarray(values, dtype=float)
+    scale = 10.0 ** ndigits
+    with np.errstate(invalid='ignore', over='ignore'):
+        scaled = values * scale
+        rounded = np.round(scaled) / scale
+        distance = np.abs(scaled - np.floor(scaled) - 0.5)
+        unsure = np.isfinite(values) & ~((distance > np.abs(scaled) * 1e-12 + 1e-12) & (np.abs(scaled) < 2.0 ** 52))
+    positions = np.flatnonzero(unsure)
+    if len(positions):
+        rounded[positions] = [round(v, ndigits) for v in values[positions].tolist()]
+    return rounded
+
+def _to_int_values(values):
+    """Truncate like int() on each element"""
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64)
+    return np.trunc(values).astype(np.int64)
+
+def _column(df, name, default=None):
+    """Column as a float array, or a constant array when missing"""
+    if name in df.columns:
+        return df[name].to_numpy(dtype=float)
+    return np.full(len(df), np.nan if default is None else default, dtype=float)
+
+def calculate_ratio_columns(df):
+    """Calculate every ratio perform_analysis reports, for all rows of df at once.
+
+    Returns (columns, int_zero) where columns maps each ratio name to an
+    array rounded exactly as the per-row calculate_*_ratios helpers round
+    it, and int_zero marks the rows where those helpers fall back to an
+    integer 0 instead of a float.
+    """
+    n = len(df)
+    has = df.columns.__contains__
+    no_rows = np.zeros(n, dtype=bool)
+    columns = {}
+    int_zero = {}
+
+    rev = _column(df, 'annual_revenue', 0.0)
+    ta = _column(df, 'total_assets')
+    tl = _column(df, 'total_liabilities')
+    ca = _column(df, 'current_assets')
+    cl = _column(df, 'current_liabilities')
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # Liquidity
+        if has('current_ratio'):
+            current_ratio = _column(df, 'current_ratio')
+        elif has('current_assets') and has('current_liabilities'):
+            current_ratio = np.where(cl != 0, ca / cl, 0.0)
+        else:
+            current_ratio = np.zeros(n)
+
+        if has('quick_ratio'):
+            quick_ratio = _column(df, 'quick_ratio')
+        else:
+            fallback = np.where(current_ratio != 0, _round_values(current_ratio * 0.9, 2), 0.0)
+            if has('inventory') and has('current_assets') and has('current_liabilities'):
+                quick_ratio = np.where(cl != 0, (ca - _column(df, 'inventory')) / cl, fallback)
+            else:
+                quick_ratio = fallback
+
+        columns['current_ratio'] = _round_values(current_ratio, 2)
+        columns['quick_ratio'] = _round_values(quick_ratio, 2)
+
+        # Profitability
+        profit = (df['annual_revenue'] - df['total_expenses']).to_numpy()
+        profit_margin = np.where(rev > 0, profit / rev * 100, 0.0)
+
+        if has('total_assets'):
+            roa = np.where(ta > 0, profit / ta * 100, _column(df, 'roce', 0.0) if has('roce') else 0.0)
+        elif has('roce'):
+            roa = _column(df, 'roce')
+        else:
+            roa = np.zeros(n)
+
+        if has('total_assets') and has('total_liabilities'):
+            equity = ta - tl
+            roe = np.where(equity > 0, profit / equity * 100, 0.0)
+        else:
+            roe = np.zeros(n)
+
+        columns['profit_margin'] = _round_values(profit_margin, 2)
+        columns['roa'] = _round_values(roa, 2)
+        columns['roe'] = _round_values(roe, 2)
+        columns['net_profit'] = _to_int_values(profit)
+
+        # Leverage
+        has_balance_sheet = has('total_assets') and has('total_liabilities')
+        if has('debt_equity_ratio'):
+            debt_equity = _column(df, 'debt_equity_ratio')
+            int_zero['debt_equity_ratio'] = no_rows
+        elif has_balance_sheet:
+            debt_equity = np.where(ta - tl > 0, tl / (ta - tl), 0.0)
+            int_zero['debt_equity_ratio'] = ~(ta - tl > 0)
+        else:
+            debt_equity = np.zeros(n)
+            int_zero['debt_equity_ratio'] = ~no_rows
+
+        if has_balance_sheet:
+            debt_ratio = np.where(ta != 0, tl / ta, 0.0)
+            int_zero['debt_ratio'] = ~(ta != 0)
+            equity_multiplier = np.where(ta - tl != 0, ta / (ta - tl), 0.0)
+            int_zero['equity_multiplier'] = ~(ta - tl != 0)
+        else:
+            debt_ratio = equity_multiplier = np.zeros(n)
+            int_zero['debt_ratio'] = int_zero['equity_multiplier'] = ~no_rows
+
+        if has('dscr'):
+            dscr = _column(df, 'dscr')
+            int_zero['dscr'] = no_rows
+        else:
+            dscr = np.zeros(n)
+            int_zero['dscr'] = ~no_rows
+
+        columns['debt_equity_ratio'] = _round_values(debt_equity, 2)
+        columns['debt_ratio'] = _round_values(debt_ratio, 2)
+        columns['equity_multiplier'] = _round_values(equity_multiplier, 2)
+        columns['dscr'] = _round_values(dscr, 2)
+
+        # Efficiency
+        expenses = _column(df, 'total_expenses')
+        receivables = _column(df, 'accounts_receivable') if has('accounts_receivable') else rev * 0.2
+        inventory = _column(df, 'inventory') if has('inventory') else expenses * 0.15
+        asset_turnover = rev / (ta + 1)
+        receivables_turnover = rev / (receivables + 1)
+        inventory_turnover = expenses / (inventory + 1)
+
+        columns['asset_turnover'] = _round_values(asset_turnover, 2)
+        columns['receivables_turnover'] = _round_values(receivables_turnover, 2)
+        columns['inventory_turnover'] = _round_values(inventory_turnover, 2)
+        columns['days_inventory'] = np.where(inventory_turnover > 0, _round_values(365 / inventory_turnover, 0), 0.0)
+        int_zero['days_inventory'] = ~(inventory_turnover > 0)
+        columns['days_receivables'] = np.where(receivables_turnover > 0, _round_values(365 / receivables_turnover, 0), 0.0)
+        int_zero['days_receivables'] = ~(receivables_turnover > 0)
+
+        # Working capital
+        working_capital = (df['current_assets'] - df['current_liabilities']).to_numpy()
+        cash_conversion_cycle = (
+            _column(df, 'days_inventory', 45) + _column(df, 'days_receivables', 30) - _column(df, 'days_payables', 25)
+        )
+        columns['working_capital'] = _to_int_values(working_capital)
+        columns['working_capital_ratio'] = _round_values(working_capital / df['annual_revenue'].to_numpy(), 3)
+        columns['cash_conversion_cycle'] = _to_int_values(cash_conversion_cycle)
+        columns['operating_cash_flow'] = _to_int_values(df['annual_revenue'].to_numpy() * 0.15)
+
+    return columns, int_zero
+
+def calculate_ratio_frame(df):
+    """Calculate every reported ratio for all rows of df as a DataFrame"""
+    columns, _ = calculate_ratio_columns(df)
+    return pd.DataFrame(columns, index=df.index)
+
+def calculate_assessment_frame(df):
+    """Ratios plus creditworthiness score and risk category for every row of df.
+
+    Rescores a whole portfolio in one pass without building per-business dicts.
+    """
+    columns, _ = calculate_ratio_columns(df)
+    scores, risk_categories, _ = score_creditworthiness(columns)
+    frame = pd.DataFrame(columns, index=df.index)
+    frame['creditworthiness_score'] = scores
+    frame['risk_category'] = risk_categories
+    return frame
+
+@timed('perform_analysis_frame')
+def perform_analysis_frame(df):
+    """Perform comprehensive financial analysis for every row of df.
+
+    Ratios are computed column-wise with NumPy; the result is the list of
+    dicts perform_analysis would return for each row, in row order.
+    """
+    if df is None or df.empty:
+        return []
+
+    columns, int_zero = calculate_ratio_columns(df)
+    scores, risk_categories, detail_indices = score_creditworthiness(columns)
+    scores = scores.tolist()
+    risk_categories = risk_categories.tolist()
+    detail_indices = detail_indices.tolist()
+
+    def values(name):
+        # Python scalars, with the per-row helpers' integer 0 fallbacks restored
+        out = columns[name].tolist()
+        if name in int_zero:
+            for pos in np.flatnonzero(int_zero[name]).tolist():
+                out[pos] = 0
+        return out
+
+    ratio_values = {name: values(name) for name in columns}
+    business_ids = df['business_id'].astype(str).tolist()
+    industries = df['industry_type'].tolist() if 'industry_type' in df.columns else None
+    gst_statuses = df['gst_compliance_status'].tolist() if 'gst_compliance_status' in df.columns else None
+    metrics = {
+        name: _to_int_values(df[name].to_numpy()).tolist()
+        for name in ['annual_revenue', 'total_expenses', 'total_assets', 'total_liabilities', 'current_assets', 'current_liabilities']
+    }
+    equity = _to_int_values(df['total_assets'].to_numpy() - df['total_liabilities'].to_numpy()).tolist()
+    analysis_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    results = []
+    for pos in range(len(df)):
+        r = {name: vals[pos] for name, vals in ratio_values.items()}
+        liquidity = {'current_ratio': r['current_ratio'], 'quick_ratio': r['quick_ratio']}
+        profitability = {
+            'profit_margin': r['profit_margin'],
+            'roa': r['roa'],
+            'roe': r['roe'],
+            'net_profit': r['net_profit']
+        }
+        leverage = {
+            'debt_equity_ratio': r['debt_equity_ratio'],
+            'debt_ratio': r['debt_ratio'],
+            'equity_multiplier': r['equity_multiplier'],
+            'dscr': r['dscr']
+        }
+        efficiency = {
+            'asset_turnover': r['asset_turnover'],
+            'receivables_turnover': r['receivables_turnover'],
+            'inventory_turnover': r['inventory_turnover'],
+            'days_inventory': r['days_inventory'],
+            'days_receivables': r['days_receivables']
+        }
+        working_capital = {
+            'working_capital': r['working_capital'],
+            'working_capital_ratio': r['working_capital_ratio'],
+            'cash_conversion_cycle': r['cash_conversion_cycle'],
+            'operating_cash_flow': r['operating_cash_flow']
+        }
+        cred_score = scores[pos]
+        cred_details = [CREDITWORTHINESS_MESSAGES[i] for i in detail_indices[pos]]
+        health = {'health_score': cred_score, 'risk_category': risk_categories[pos]}
+
+        results.append({
+            'business_id': business_ids[pos],
+            'industry_type': str(industries[pos]) if industries is not None else 'Unknown',
+            'analysis_date': analysis_date,
+            'financial_metrics': {
+                'annual_revenue': metrics['annual_revenue'][pos],
+                'total_expenses': metrics['total_expenses'][pos],
+                'net_profit': r['net_profit'],
+                'total_assets': metrics['total_assets'][pos],
+                'total_liabilities': metrics['total_liabilities'][pos],
+                'equity': equity[pos],
+                'current_assets': metrics['current_assets'][pos],
+                'current_liabilities': metrics['current_liabilities'][pos]
+            },
+            'liquidity_ratios': liquidity,
+            'profitability_ratios': profitability,
+            'leverage_ratios': leverage,
+            'efficiency_ratios': efficiency,
+            'working_capital': working_capital,
+            'creditworthiness': {
+                'score': cred_score,
+                'assessment': cred_details
+            },
+            'financial_health': health,
+            'gst_compliance': gst_statuses[pos] if gst_statuses is not None else "Not Assessed",
+            'industry_benchmarks': INDUSTRY_BENCHMARKS.get(industries[pos] if industries is not None else 'Services', INDUSTRY_BENCHMARKS['Services'])
+        })
+
+    return results
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from analysis import perform_analysis, INDUSTRY_BENCHMARKS, CREDITWORTHINESS_BANDS, RISK_CATEGORY_BANDS
+from recommendation import generate_recommendation, FINANCIAL_PRODUCTS, INDUSTRY_RISKS, GST_COMPLIANCE_RULES, ACTION_PLANS
+from peer_percentiles import attach_peer_percentiles
+
+# Cache limits; override through the environment
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', 2048))
+ANALYSIS_CACHE_MAX_BYTES = int(os.environ.get('ANALYSIS_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+# Row columns that do not influence the analysis
+IGNORED_COLUMNS = {'upload_date', 'source'}
+
+def _rules_fingerprint():
+    """Hash of every table the analysis and recommendations depend on"""
+    rules = [INDUSTRY_BENCHMARKS, CREDITWORTHINESS_BANDS, RISK_CATEGORY_BANDS,
+             FINANCIAL_PRODUCTS, INDUSTRY_RISKS, GST_COMPLIANCE_RULES, ACTION_PLANS]
+    payload = json.dumps(rules, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+# Changes whenever thresholds, benchmarks or rule text change, invalidating old entries
+RULES_VERSION = _rules_fingerprint()
+
+def row_hash(df):
+    """Content hash of the first row of df"""
+    record = {k: v for k, v in df.iloc[0].items() if k not in IGNORED_COLUMNS}
+    payload = json.dumps(record, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+def _approximate_size(obj):
+    """Rough deep size in bytes of nested dicts/lists of scalars"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_approximate_size(k) + _approximate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_approximate_size(v) for v in obj)
+    return size
+
+class AnalysisCache:
+    """Thread-safe LRU cache bounded by entry count and approximate memory"""
+
+    def __init__(self, max_entries=ANALYSIS_CACHE_MAX_ENTRIES, max_bytes=ANALYSIS_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = _approximate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'rules_version': RULES_VERSION
+            }
+
+# Shared by all request threads
+analysis_cache = AnalysisCache()
+
+def analyze_business(df):
+    """Return (analysis, recommendations) for a single-row df, memoized by content.
+
+    Cached results are shared between callers and must be treated as read-only.
+    """
+    if df is None or df.empty:
+        return None, None
+
+    key = (RULES_VERSION, row_hash(df))
+    cached = analysis_cache.get(key)
+    if cached is None:
+        analysis = perform_analysis(df)
+        if analysis is None:
+            return None, None
+        recommendations = generate_recommendation(df, analysis)
+        cached = (analysis, recommendations)
+        analysis_cache.put(key, cached)
+
+    # Peer percentiles move with the dataset and uploads, so they are added
+    # to a shallow copy on every call instead of being cached
+    analysis, recommendations = cached
+    analysis = dict(analysis)
+    attach_peer_percentiles([analysis])
+    return analysis, recommendations
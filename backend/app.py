@@ -1,7 +1,9 @@
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, jsonify, request, send_file, Response, g
 from flask_cors import CORS
 import os
 import json
+import hashlib
+import hmac
 from datetime import datetime
 from functools import wraps
 import traceback
@@ -9,22 +11,87 @@ import traceback
 # Import modules
 from data_loader import (
     load_business_data, load_data_from_file, validate_financial_data,
-    normalize_financial_data, get_all_businesses, UPLOAD_FOLDER
+    normalize_financial_data, get_all_businesses, get_dataset_store, UPLOAD_FOLDER
 )
-from analysis import perform_analysis
-from recommendation import generate_recommendation
-from report_generator import generate_pdf_report, generate_json_report, export_to_excel
+from analysis import perform_analysis_frame
+from recommendation import generate_recommendation_frame
+from report_generator import generate_pdf_report, generate_json_report, export_to_excel, report_filename
 from translations import get_translation, translate_analysis
+from analysis_cache import analyze_business, analysis_cache, RULES_VERSION
+from batch_processor import iter_batch_results
+from upload_jobs import submit_upload_job, start_job_monitor, get_job_status, get_job_results
+from bulk_reports import resolve_business_ids, stream_pdf_zip, BULK_REPORT_MAX_BUSINESSES
+from dashboard_metrics import dashboard_metrics
+from upload_registry import upload_registry, record_uploaded_businesses
+from business_index import parse_business_query, InvalidQuery
+from business_storage import get_storage
+from portfolio_query import get_ratio_table, parse_portfolio_query
+from rankings import rankings, UnknownRanking, RANKINGS, RANKING_DEFAULT_K
+from peer_percentiles import attach_peer_percentiles, PEER_RATIOS
+from cohort_stats import cohort_stats, record_uploaded_cohorts, DEFAULT_QUANTILES
+from json_codec import FastJSONProvider, dumps
+from compression import compress_response, available_encodings
+from metrics import record_request, render_metrics, begin_request_timings, end_request_timings, format_server_timing
+from profiling import RequestProfile, ProfileDenied
+from time import perf_counter
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
 # Configuration
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Async uploads are ingested in bounded-memory chunks, so the overall limit can be large
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_SIZE', 4 * 1024 * 1024 * 1024))  # 4GB max file size
+# Synchronous uploads hold every result in the response and stay small
+SYNC_UPLOAD_MAX_SIZE = int(os.environ.get('SYNC_UPLOAD_MAX_SIZE', 16 * 1024 * 1024))  # 16MB
+# Sent as X-Admin-Token to reach admin endpoints; unset disables them
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
 app.config['JSON_SORT_KEYS'] = False
 
+def wants_ndjson(data=None):
+    """True when the client asked for a newline-delimited JSON stream"""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    if data and data.get('stream') is True:
+        return True
+    return request.accept_mimetypes.best == 'application/x-ndjson'
+
+def stream_ndjson(records):
+    """Serialize records lazily as newline-delimited JSON"""
+    try:
+        for record in records:
+            yield dumps(record, sort_keys=False) + '\n'
+    except Exception as e:
+        # headers are already sent; report the failure in-band and stop
+        print(traceback.format_exc())
+        yield json.dumps({'status': 'error', 'message': 'Batch analysis failed', 'details': str(e)}) + '\n'
+
+def make_etag(*parts):
+    """Strong ETag value from the parts a response depends on"""
+    payload = '|'.join(str(part) for part in parts)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+def not_modified(etag):
+    """304 response when the client's If-None-Match already has etag, else None"""
+    if not etag:
+        return None
+    # compressed representations carry the encoding as an ETag suffix
+    for tag in [etag] + [f"{etag}-{encoding}" for encoding in available_encodings()]:
+        if request.if_none_match.contains(tag):
+            response = Response(status=304)
+            response.set_etag(tag)
+            return response
+    return None
+
+def with_etag(result, etag):
+    """Attach etag to a (response, status) pair from a handler"""
+    response, status = result
+    if etag:
+        response.set_etag(etag)
+    return response, status
+
 # Error handlers
 @app.errorhandler(400)
 def bad_request(error):
@@ -55,6 +122,14 @@ def get_business_analysis(business_id):
     try:
         language = request.args.get('language', 'en')
         
+        # Answer revalidations from the row's content token before loading anything
+        row_token = get_storage().row_token(business_id)
+        etag = make_etag('analysis', row_token, RULES_VERSION, language,
+                         get_dataset_store().token, upload_registry.token) if row_token else None
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        
         # Load business data
         df = load_business_data(business_id)
         if df is None or df.empty:
@@ -63,29 +138,26 @@ def get_business_analysis(business_id):
                 'message': f'Business with ID {business_id} not found'
             }), 404
         
-        # Perform analysis
-        analysis = perform_analysis(df)
+        # Perform analysis and generate recommendations (memoized by row content)
+        analysis, recommendations = analyze_business(df)
         if analysis is None:
             return jsonify({
                 'status': 'error',
                 'message': 'Failed to perform analysis'
             }), 500
         
-        # Generate recommendations
-        recommendations = generate_recommendation(df, analysis)
-        
         # Translate if needed
         if language != 'en':
             analysis = translate_analysis(analysis, language)
         
-        return jsonify({
+        return with_etag((jsonify({
             'status': 'success',
             'data': {
                 'business_id': business_id,
                 'analysis': analysis,
                 'recommendations': recommendations
             }
-        }), 200
+        }), 200), etag)
         
     except Exception as e:
         print(traceback.format_exc())
@@ -98,18 +170,184 @@ def get_business_analysis(business_id):
 # List all businesses endpoint
 @app.route('/api/businesses', methods=['GET'])
 def get_businesses():
-    """Get list of all businesses"""
+    """Get list of businesses, paged and filtered when query parameters are given"""
     try:
-        businesses = get_all_businesses()
+        query_string = '&'.join(sorted(f"{k}={v}" for k, v in request.args.items(multi=True)))
+        etag = make_etag('businesses', get_storage().token, query_string)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        
+        if not request.args:
+            # Unparameterized requests keep returning the full list
+            businesses = get_all_businesses()
+            return with_etag((jsonify({
+                'status': 'success',
+                'count': len(businesses),
+                'data': businesses
+            }), 200), etag)
+
+        query = parse_business_query(request.args)
+        businesses, total, next_cursor = get_storage().query(**query)
+        return with_etag((jsonify({
+            'status': 'success',
+            'count': len(businesses),
+            'total': total,
+            'next_cursor': next_cursor,
+            'data': businesses
+        }), 200), etag)
+    except InvalidQuery as e:
         return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': 'Error fetching businesses',
+            'details': str(e)
+        }), 500
+
+# Ratio-threshold queries over the whole portfolio
+@app.route('/api/portfolio/query', methods=['GET'])
+def query_portfolio():
+    """Businesses meeting every ?filter=field:op:value condition, paged"""
+    try:
+        query_string = '&'.join(sorted(f"{k}={v}" for k, v in request.args.items(multi=True)))
+        etag = make_etag('portfolio', get_dataset_store().token, RULES_VERSION, query_string)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
+        query = parse_portfolio_query(request.args)
+        businesses, total, next_cursor = get_ratio_table().query(**query)
+        return with_etag((jsonify({
             'status': 'success',
             'count': len(businesses),
+            'total': total,
+            'next_cursor': next_cursor,
             'data': businesses
+        }), 200), etag)
+    except InvalidQuery as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        print(traceback.format_exc())
+        return jsonify({
+            'status': 'error',
+            'message': 'Error querying portfolio',
+            'details': str(e)
+        }), 500
+
+# Top-N rankings, overall or within one industry
+@app.route('/api/rankings/<ranking>', methods=['GET'])
+def get_ranking(ranking):
+    """Top businesses for a ranking (?limit=N, ?industry=...)"""
+    try:
+        industry = request.args.get('industry') or None
+        try:
+            limit = int(request.args.get('limit', RANKING_DEFAULT_K))
+        except ValueError:
+            return jsonify({
+                'status': 'error',
+                'message': 'limit must be an integer'
+            }), 400
+
+        etag = make_etag('rankings', get_dataset_store().token, RULES_VERSION, upload_registry.token,
+                         ranking, industry, limit)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
+        businesses = rankings.top(ranking, limit, industry)
+        return with_etag((jsonify({
+            'status': 'success',
+            'ranking': ranking,
+            'industry': industry,
+            'count': len(businesses),
+            'data': businesses
+        }), 200), etag)
+    except UnknownRanking:
+        return jsonify({
+            'status': 'error',
+            'message': f"Unknown ranking: {ranking} (available: {', '.join(RANKINGS)})"
+        }), 404
+    except Exception as e:
+        print(traceback.format_exc())
+        return jsonify({
+            'status': 'error',
+            'message': 'Error computing ranking',
+            'details': str(e)
+        }), 500
+
+# Streaming cohort statistics over every uploaded business
+@app.route('/api/cohort-stats', methods=['GET'])
+def get_cohort_stats():
+    """Count, mean, std and quantiles per industry and ratio (?industry, ratio, quantiles)"""
+    try:
+        industry = request.args.get('industry') or None
+        ratio = request.args.get('ratio') or None
+        if ratio is not None and ratio not in PEER_RATIOS:
+            return jsonify({
+                'status': 'error',
+                'message': f"Unknown ratio: {ratio} (available: {', '.join(PEER_RATIOS)})"
+            }), 400
+        try:
+            quantiles = [float(q) for q in request.args.get('quantiles', '').split(',') if q.strip()] or DEFAULT_QUANTILES
+        except ValueError:
+            quantiles = None
+        if quantiles is None or len(quantiles) > 20 or not all(0 <= q <= 1 for q in quantiles):
+            return jsonify({
+                'status': 'error',
+                'message': 'quantiles must be up to 20 comma-separated numbers between 0 and 1'
+            }), 400
+
+        etag = make_etag('cohort-stats', cohort_stats.token, industry, ratio, quantiles)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+
+        stats = cohort_stats.query(industry, ratio, quantiles)
+        return with_etag((jsonify({
+            'status': 'success',
+            'count': len(stats),
+            'data': stats
+        }), 200), etag)
+    except Exception as e:
+        print(traceback.format_exc())
+        return jsonify({
+            'status': 'error',
+            'message': 'Error computing cohort statistics',
+            'details': str(e)
+        }), 500
+
+# Reset the cohort statistics (admin)
+@app.route('/api/cohort-stats', methods=['DELETE'])
+def reset_cohort_stats():
+    """Forget every upload in the cohort statistics"""
+    if not ADMIN_TOKEN:
+        return jsonify({
+            'status': 'error',
+            'message': 'Admin endpoints are disabled (set ADMIN_TOKEN)'
+        }), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+        return jsonify({
+            'status': 'error',
+            'message': 'Invalid admin token'
+        }), 401
+    try:
+        cohort_stats.reset()
+        return jsonify({
+            'status': 'success',
+            'message': 'Cohort statistics reset'
         }), 200
     except Exception as e:
+        print(traceback.format_exc())
         return jsonify({
             'status': 'error',
-            'message': 'Error fetching businesses',
+            'message': 'Error resetting cohort statistics',
             'details': str(e)
         }), 500
 
@@ -133,11 +371,29 @@ def upload_file():
                 'message': 'No file selected'
             }), 400
         
+        is_async = request.args.get('async', '').lower() in ('1', 'true', 'yes')
+        if not is_async and (request.content_length or 0) > SYNC_UPLOAD_MAX_SIZE:
+            return jsonify({
+                'status': 'error',
+                'message': f'File too large for synchronous processing (max {SYNC_UPLOAD_MAX_SIZE // (1024 * 1024)}MB); retry with ?async=true'
+            }), 413
+        
         # Save file
         filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}"
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         file.save(file_path)
         
+        # Asynchronous mode: queue a background job and return its ID right away
+        if is_async:
+            job_id = submit_upload_job(file_path, file.filename)
+            return jsonify({
+                'status': 'accepted',
+                'job_id': job_id,
+                'file_path': filename,
+                'status_url': f'/api/upload/jobs/{job_id}',
+                'results_url': f'/api/upload/jobs/{job_id}/results'
+            }), 202
+        
         # Load and validate data
         df, error = load_data_from_file(file_path)
         if error:
@@ -159,13 +415,16 @@ def upload_file():
                 'details': validation_msg
             }), 400
         
-        # Perform analysis on each business in the file
+        # Analyze every business in the file in one vectorized pass
+        analyses = perform_analysis_frame(df)
+        all_recommendations = generate_recommendation_frame(df, analyses)
+        # recorded first, so the file counts among its own peers
+        record_uploaded_businesses(df, analyses)
+        attach_peer_percentiles(analyses)
+        get_storage().add_businesses(df)
+        record_uploaded_cohorts(analyses)
         results = []
-        for idx, row in df.iterrows():
-            row_df = df.iloc[[idx]]
-            analysis = perform_analysis(row_df)
-            recommendations = generate_recommendation(row_df, analysis)
-            
+        for analysis, recommendations in zip(analyses, all_recommendations):
             results.append({
                 'business_id': analysis['business_id'],
                 'analysis': analysis,
@@ -187,6 +446,46 @@ def upload_file():
             'details': str(e)
         }), 500
 
+# Upload job status
+@app.route('/api/upload/jobs/<job_id>', methods=['GET'])
+def get_upload_job(job_id):
+    """Get progress of an asynchronous upload job"""
+    job = get_job_status(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Job {job_id} not found'
+        }), 404
+    
+    return jsonify({
+        'status': 'success',
+        'data': job
+    }), 200
+
+# Upload job results
+@app.route('/api/upload/jobs/<job_id>/results', methods=['GET'])
+def get_upload_job_results(job_id):
+    """Get a page of results produced so far by an upload job"""
+    job = get_job_status(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Job {job_id} not found'
+        }), 404
+    
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    results = get_job_results(job_id, offset, limit)
+    
+    return jsonify({
+        'status': 'success',
+        'job_status': job['status'],
+        'offset': offset,
+        'count': len(results),
+        'next_offset': offset + len(results) if len(results) == limit else None,
+        'data': results
+    }), 200
+
 # Generate PDF report
 @app.route('/api/report/pdf/<business_id>', methods=['GET'])
 def get_pdf_report(business_id):
@@ -200,8 +499,7 @@ def get_pdf_report(business_id):
                 'message': 'Business not found'
             }), 404
         
-        analysis = perform_analysis(df)
-        recommendations = generate_recommendation(df, analysis)
+        analysis, recommendations = analyze_business(df)
         
         business_data = {
             'business_id': business_id,
@@ -221,7 +519,7 @@ def get_pdf_report(business_id):
             pdf_buffer,
             mimetype='application/pdf',
             as_attachment=True,
-            download_name=f'{business_id}_financial_report_{datetime.now().strftime("%Y%m%d")}.pdf'
+            download_name=report_filename(business_id, 'pdf')
         )
         
     except Exception as e:
@@ -232,6 +530,56 @@ def get_pdf_report(business_id):
             'details': str(e)
         }), 500
 
+# Bulk PDF reports
+@app.route('/api/report/pdf/bulk', methods=['POST'])
+def get_bulk_pdf_reports():
+    """Generate PDF reports for many businesses and stream them as a ZIP"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        if not data.get('business_ids') and not data.get('filter'):
+            return jsonify({
+                'status': 'error',
+                'message': 'business_ids array or filter object required'
+            }), 400
+        
+        try:
+            business_ids = resolve_business_ids(data.get('business_ids'), data.get('filter'))
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': 'Invalid filter',
+                'details': str(e)
+            }), 400
+        
+        if not business_ids:
+            return jsonify({
+                'status': 'error',
+                'message': 'No businesses matched'
+            }), 404
+        
+        if len(business_ids) > BULK_REPORT_MAX_BUSINESSES:
+            return jsonify({
+                'status': 'error',
+                'message': f'Too many businesses requested (max {BULK_REPORT_MAX_BUSINESSES})'
+            }), 400
+        
+        return Response(
+            stream_pdf_zip(business_ids),
+            mimetype='application/zip',
+            headers={
+                'Content-Disposition': f'attachment; filename=financial_reports_{datetime.now().strftime("%Y%m%d")}.zip'
+            }
+        )
+        
+    except Exception as e:
+        print(traceback.format_exc())
+        return jsonify({
+            'status': 'error',
+            'message': 'Error generating reports',
+            'details': str(e)
+        }), 500
+
 # Generate Excel report
 @app.route('/api/report/excel/<business_id>', methods=['GET'])
 def get_excel_report(business_id):
@@ -245,8 +593,7 @@ def get_excel_report(business_id):
                 'message': 'Business not found'
             }), 404
         
-        analysis = perform_analysis(df)
-        recommendations = generate_recommendation(df, analysis)
+        analysis, recommendations = analyze_business(df)
         
         business_data = {
             'business_id': business_id,
@@ -266,7 +613,7 @@ def get_excel_report(business_id):
             excel_buffer,
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
             as_attachment=True,
-            download_name=f'{business_id}_financial_report_{datetime.now().strftime("%Y%m%d")}.xlsx'
+            download_name=report_filename(business_id, 'xlsx')
         )
         
     except Exception as e:
@@ -282,6 +629,13 @@ def get_excel_report(business_id):
 def get_json_report(business_id):
     """Get analysis as JSON report"""
     try:
+        row_token = get_storage().row_token(business_id)
+        etag = make_etag('report', row_token, RULES_VERSION,
+                         get_dataset_store().token, upload_registry.token) if row_token else None
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
+        
         df = load_business_data(business_id)
         if df is None or df.empty:
             return jsonify({
@@ -289,8 +643,7 @@ def get_json_report(business_id):
                 'message': 'Business not found'
             }), 404
         
-        analysis = perform_analysis(df)
-        recommendations = generate_recommendation(df, analysis)
+        analysis, recommendations = analyze_business(df)
         
         business_data = {
             'business_id': business_id,
@@ -299,10 +652,10 @@ def get_json_report(business_id):
         
         report = generate_json_report(business_data, analysis, recommendations)
         
-        return jsonify({
+        return with_etag((jsonify({
             'status': 'success',
             'data': report
-        }), 200
+        }), 200), etag)
         
     except Exception as e:
         print(traceback.format_exc())
@@ -312,6 +665,21 @@ def get_json_report(business_id):
             'details': str(e)
         }), 500
 
+# Analysis cache statistics
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Get analysis cache hit/miss counters and size"""
+    return jsonify({
+        'status': 'success',
+        'data': analysis_cache.stats()
+    }), 200
+
+# Prometheus metrics
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Get stage latencies, request counters and cache ratios in Prometheus text format"""
+    return Response(render_metrics(analysis_cache.stats()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # Multilingual support
 @app.route('/api/languages', methods=['GET'])
 def get_supported_languages():
@@ -352,27 +720,11 @@ def batch_analysis():
         business_ids = data['business_ids']
         language = data.get('language', 'en')
         
-        results = []
-        for business_id in business_ids:
-            df = load_business_data(business_id)
-            if df is not None and not df.empty:
-                analysis = perform_analysis(df)
-                recommendations = generate_recommendation(df, analysis)
-                
-                if language != 'en':
-                    analysis = translate_analysis(analysis, language)
-                
-                results.append({
-                    'business_id': business_id,
-                    'status': 'success',
-                    'analysis': analysis,
-                    'recommendations': recommendations
-                })
-            else:
-                results.append({
-                    'business_id': business_id,
-                    'status': 'not_found'
-                })
+        # Streaming mode: one JSON document per line as each business is ready
+        if wants_ndjson(data):
+            return Response(stream_ndjson(iter_batch_results(business_ids, language)), mimetype='application/x-ndjson')
+        
+        results = list(iter_batch_results(business_ids, language))
         
         return jsonify({
             'status': 'success',
@@ -393,27 +745,15 @@ def batch_analysis():
 def get_dashboard_metrics():
     """Get dashboard summary metrics"""
     try:
-        businesses = get_all_businesses()
-        
-        total_revenue = sum([b.get('annual_revenue', 0) for b in businesses])
-        avg_score = sum([b.get('financial_health_score', 0) for b in businesses]) / len(businesses) if businesses else 0
+        etag = make_etag('dashboard', get_dataset_store().token, upload_registry.token)
+        cached = not_modified(etag)
+        if cached is not None:
+            return cached
         
-        risk_distribution = {
-            'low_risk': len([b for b in businesses if 'Low' in b.get('financial_health_score', '')]),
-            'medium_risk': len([b for b in businesses if 'Medium' in b.get('financial_health_score', '')]),
-            'high_risk': len([b for b in businesses if 'High' in b.get('financial_health_score', '')])
-        }
-        
-        return jsonify({
+        return with_etag((jsonify({
             'status': 'success',
-            'data': {
-                'total_businesses': len(businesses),
-                'total_revenue': total_revenue,
-                'average_health_score': round(avg_score, 2),
-                'risk_distribution': risk_distribution,
-                'businesses': businesses[:10]  # Top 10
-            }
-        }), 200
+            'data': dashboard_metrics.get()
+        }), 200), etag)
         
     except Exception as e:
         print(traceback.format_exc())
@@ -433,19 +773,99 @@ def api_docs():
         'endpoints': {
             'GET /api/health': 'Health check',
             'GET /api/analysis/<business_id>': 'Get comprehensive financial analysis',
-            'GET /api/businesses': 'List all businesses',
-            'POST /api/upload': 'Upload and analyze financial data file',
+            'GET /api/businesses': 'List businesses (?limit, cursor, fields, industry_type, risk_category, gst_compliance_status, min_score, max_score, min_revenue, max_revenue, sort)',
+            'GET /api/portfolio/query': 'Businesses meeting ratio/column thresholds (?filter=field:op:value, repeatable; fields, limit, cursor)',
+            'GET /api/rankings/<ranking>': 'Top businesses: riskiest, healthiest, largest_loan_exposure, worst_dscr (?limit, industry)',
+            'GET /api/cohort-stats': 'Count, mean, std and quantiles of each ratio per industry over uploaded businesses (?industry, ratio, quantiles)',
+            'DELETE /api/cohort-stats': 'Reset the cohort statistics (X-Admin-Token header, requires ADMIN_TOKEN)',
+            'POST /api/upload': 'Upload and analyze financial data file (add ?async=true for a background job)',
+            'GET /api/upload/jobs/<job_id>': 'Get upload job progress',
+            'GET /api/upload/jobs/<job_id>/results': 'Get a page of upload job results',
             'GET /api/report/pdf/<business_id>': 'Download PDF report',
+            'POST /api/report/pdf/bulk': 'Download PDF reports for many businesses as a ZIP',
             'GET /api/report/excel/<business_id>': 'Download Excel report',
             'GET /api/report/json/<business_id>': 'Get JSON report',
-            'POST /api/batch-analysis': 'Analyze multiple businesses',
+            'POST /api/batch-analysis': 'Analyze multiple businesses (add ?stream=true for NDJSON)',
             'GET /api/dashboard': 'Get dashboard metrics',
+            'GET /api/cache/stats': 'Get analysis cache statistics',
+            'GET /api/metrics': 'Get Prometheus metrics (stage latencies, request counts, cache hit ratio)',
             'GET /api/languages': 'Get supported languages',
             'GET /api/docs': 'Get API documentation'
         }
     }
     return jsonify(docs), 200
 
+# Negotiated gzip/brotli for large text responses
+app.after_request(compress_response)
+
+# Request counters, latency by endpoint and Server-Timing breakdown
+@app.before_request
+def start_request_timer():
+    g.request_start = perf_counter()
+    begin_request_timings()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.get('request_start')
+    if start is not None:
+        elapsed = perf_counter() - start
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        record_request(endpoint, request.method, response.status_code, elapsed)
+        response.headers['Server-Timing'] = format_server_timing(end_request_timings(), elapsed)
+    return response
+
+# Opt-in profiling: ?profile=1 (memory=1 adds tracemalloc, format=prof downloads a .prof file)
+@app.before_request
+def start_profile():
+    if request.args.get('profile', '').lower() not in ('1', 'true', 'yes'):
+        return None
+    profile = RequestProfile(trace_memory=request.args.get('memory', '').lower() in ('1', 'true', 'yes'))
+    try:
+        profile.begin(request.headers.get('X-Profile-Token'))
+    except ProfileDenied as e:
+        return jsonify({'status': 'error', 'message': str(e)}), e.status_code
+    g.profile = profile
+    return None
+
+@app.after_request
+def finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    profile.end(response)
+
+    if request.args.get('format') == 'prof':
+        return Response(
+            profile.dump(),
+            mimetype='application/octet-stream',
+            headers={
+                'Content-Disposition': f'attachment; filename=profile_{datetime.now().strftime("%Y%m%d_%H%M%S")}.prof'
+            }
+        )
+
+    sort = request.args.get('profile_sort', 'cumulative')
+    return jsonify({
+        'status': 'success',
+        'profile': {
+            'path': request.path,
+            'elapsed_seconds': round(profile.elapsed, 6),
+            'sort': sort,
+            'hotspots': profile.hotspots(sort),
+            'memory': profile.memory,
+            'response': {
+                'status_code': response.status_code,
+                'content_type': response.content_type,
+                'bytes': profile.response_bytes
+            }
+        }
+    })
+
+@app.teardown_request
+def release_profile(error=None):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.abort()
+
 # Error logging middleware
 @app.before_request
 def log_request():
@@ -453,7 +873,10 @@ def log_request():
     app.logger.info(f"{request.method} {request.path}")
 
 if __name__ == "__main__":
+    host = os.environ.get('API_HOST', '0.0.0.0')
+    port = int(os.environ.get('API_PORT', 5000))
     print("Starting Financial Health Assessment Tool API...")
-    print("Server running at http://127.0.0.1:5000")
-    print("API Documentation: http://127.0.0.1:5000/api/docs")
-    app.run(host="0.0.0.0", port=5000, debug=False, threaded=True)
\ No newline at end of file
+    print(f"Server running at http://127.0.0.1:{port}")
+    print(f"API Documentation: http://127.0.0.1:{port}/api/docs")
+    start_job_monitor()
+    app.run(host=host, port=port, debug=False, threaded=True)
\ No newline at end of file
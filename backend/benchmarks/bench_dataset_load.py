@@ -0,0 +1,52 @@
+"""Compare cold dataset load times: CSV parse vs. columnar snapshot.
+
+Usage (from the backend directory):
+    python benchmarks/bench_dataset_load.py [--rows 1000,100000,1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import CSV_PATH
+from dataset_store import DatasetStore
+import pandas as pd
+
+def build_dataset(rows, path, seed=42):
+    """Write a CSV of `rows` businesses resampled from the sample dataset"""
+    base = pd.read_csv(CSV_PATH)
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), size=rows)].reset_index(drop=True)
+    df['business_id'] = [f"SME_{i + 1}" for i in range(rows)]
+    df.to_csv(path, index=False)
+
+def time_cold_load(path, use_snapshot):
+    """Time a fresh store's first full load of path"""
+    store = DatasetStore(path, use_snapshot=use_snapshot)
+    start = time.perf_counter()
+    store.get_frame()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', default='1000,100000,1000000', help='comma separated row counts')
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'csv parse':>12} {'csv+write':>12} {'snapshot':>12} {'speedup':>9}")
+    for rows in [int(r) for r in args.rows.split(',')]:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'dataset.csv')
+            build_dataset(rows, path)
+
+            csv_time = time_cold_load(path, use_snapshot=False)
+            build_time = time_cold_load(path, use_snapshot=True)
+            snapshot_time = time_cold_load(path, use_snapshot=True)
+
+            print(f"{rows:>10} {csv_time:>11.3f}s {build_time:>11.3f}s {snapshot_time:>11.3f}s {csv_time / snapshot_time:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Compare JSON encoders and response compression on a batch-analysis payload.
+
+Usage (from the backend directory):
+    python benchmarks/bench_json_encoding.py [--businesses 1000] [--repeat 5]
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider
+from data_loader import get_dataset_store
+from batch_processor import iter_batch_results
+import json_codec
+from compression import GZIP_LEVEL, BROTLI_QUALITY, brotli
+
+def build_payload(count):
+    """The /api/batch-analysis response body for the first `count` businesses"""
+    ids = get_dataset_store().get_frame()['business_id'].tolist()
+    ids = (ids * (count // len(ids) + 1))[:count]
+    results = list(iter_batch_results(ids))
+    return {'status': 'success', 'count': len(results), 'data': results}
+
+def best_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--businesses', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    payload = build_payload(args.businesses)
+
+    encoders = [('stdlib (flask default)', lambda: json.dumps(
+        payload, default=DefaultJSONProvider.default, sort_keys=True, separators=(',', ':')).encode('utf-8'))]
+    if json_codec.orjson is not None:
+        encoders.append(('orjson', lambda: json_codec.orjson.dumps(
+            payload, default=json_codec._default,
+            option=json_codec._ORJSON_OPTIONS | json_codec.orjson.OPT_SORT_KEYS)))
+    else:
+        print("orjson not installed; only the stdlib encoder is measured")
+
+    print(f"Serialization of a {args.businesses}-business batch (best of {args.repeat})")
+    print(f"{'encoder':<24} {'time':>10} {'bytes':>12}")
+    body = None
+    for name, fn in encoders:
+        elapsed, body = best_time(fn, args.repeat)
+        print(f"{name:<24} {elapsed * 1000:>8.1f}ms {len(body):>12,}")
+
+    print()
+    print(f"{'encoding':<24} {'time':>10} {'bytes':>12} {'ratio':>7}")
+    codecs = [('identity', lambda: body), (f'gzip (level {GZIP_LEVEL})', lambda: gzip.compress(body, GZIP_LEVEL))]
+    if brotli is not None:
+        codecs.append((f'br (quality {BROTLI_QUALITY})', lambda: brotli.compress(body, quality=BROTLI_QUALITY)))
+    else:
+        print("brotli not installed; br is not measured")
+    for name, fn in codecs:
+        elapsed, encoded = best_time(fn, args.repeat)
+        print(f"{name:<24} {elapsed * 1000:>8.1f}ms {len(encoded):>12,} {len(body) / len(encoded):>6.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+"""Load-test a running API server with a weighted mix of endpoints.
+
+Usage (from the backend directory):
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --duration 30 --concurrency 16
+    python benchmarks/load_test.py --rate 50 --concurrency 64 --mix dashboard=5,analysis=10,pdf=1
+    python benchmarks/load_test.py --start-server --duration 20
+
+With --start-server the server keeps uploads (files, job store, upload
+registry, SQLite storage, cohort statistics) in a temporary directory that
+is removed afterwards. Against a running server the default mix leaves out
+uploads; name upload in --mix to include them.
+
+Closed-loop mode (default) keeps --concurrency requests in flight. With
+--rate, requests are scheduled at a fixed arrival rate and latency is
+measured from the scheduled start, so a backed-up server shows up as
+latency instead of silently lowering the load. Reports p50/p95/p99 latency,
+throughput and error rate per endpoint; --output saves them as JSON.
+"""
+import argparse
+import http.client
+import json
+import os
+import queue
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Relative request weights when --mix is not given
+DEFAULT_MIX = {
+    'dashboard': 10,
+    'businesses': 10,
+    'analysis': 30,
+    'analysis_hi': 5,
+    'report_json': 10,
+    'pdf': 5,
+    'excel': 3,
+    'batch': 3,
+    'upload': 1
+}
+BATCH_SIZE = 50
+UPLOAD_ROWS = 20
+# Where a server started with --start-server keeps uploads, as file names in the scratch directory
+SCRATCH_STATE = {
+    'UPLOAD_FOLDER': 'uploads',
+    'UPLOAD_JOBS_DB': 'upload_jobs.db',
+    'UPLOAD_REGISTRY_DB': 'uploaded_businesses.db',
+    'BUSINESS_DB': 'businesses.db',
+    'COHORT_STATS_FILE': 'cohort_stats.npz',
+}
+
+class Scenario:
+    """Builds requests for each named endpoint against the server's business IDs"""
+
+    def __init__(self, business_ids, upload_csv):
+        self.business_ids = business_ids
+        self.upload_csv = upload_csv
+
+    def _id(self):
+        return random.choice(self.business_ids)
+
+    def build(self, name):
+        """Return (method, path, body, headers) for a request of type name"""
+        if name == 'health':
+            return 'GET', '/api/health', None, {}
+        if name == 'dashboard':
+            return 'GET', '/api/dashboard', None, {}
+        if name == 'businesses':
+            return 'GET', '/api/businesses?limit=100&sort=-financial_health_score', None, {}
+        if name == 'businesses_all':
+            return 'GET', '/api/businesses', None, {}
+        if name == 'analysis':
+            return 'GET', f"/api/analysis/{self._id()}", None, {}
+        if name == 'analysis_hi':
+            return 'GET', f"/api/analysis/{self._id()}?language=hi", None, {}
+        if name == 'report_json':
+            return 'GET', f"/api/report/json/{self._id()}", None, {}
+        if name == 'pdf':
+            return 'GET', f"/api/report/pdf/{self._id()}", None, {}
+        if name == 'excel':
+            return 'GET', f"/api/report/excel/{self._id()}", None, {}
+        if name == 'batch':
+            ids = random.sample(self.business_ids, min(BATCH_SIZE, len(self.business_ids)))
+            body = json.dumps({'business_ids': ids}).encode('utf-8')
+            return 'POST', '/api/batch-analysis', body, {'Content-Type': 'application/json'}
+        if name == 'upload':
+            boundary = uuid.uuid4().hex
+            body = (
+                f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"loadtest.csv\"\r\n"
+                f"Content-Type: text/csv\r\n\r\n"
+            ).encode('utf-8') + self.upload_csv + f"\r\n--{boundary}--\r\n".encode('utf-8')
+            return 'POST', '/api/upload', body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+        raise ValueError(f"Unknown endpoint in mix: {name}")
+
+def parse_mix(text):
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+def send(host, port, method, path, body, headers, timeout):
+    """Issue one request; returns (status or None, error or None)"""
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status, None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+    finally:
+        connection.close()
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+def summarize(samples, elapsed):
+    """samples: list of (latency_seconds, ok) -> report dict"""
+    latencies = sorted(latency for latency, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    to_ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': to_ms(percentile(latencies, 0.50)),
+        'p95_ms': to_ms(percentile(latencies, 0.95)),
+        'p99_ms': to_ms(percentile(latencies, 0.99)),
+        'mean_ms': to_ms(sum(latencies) / len(latencies)) if latencies else None,
+        'max_ms': to_ms(latencies[-1]) if latencies else None
+    }
+
+class LoadTest:
+    def __init__(self, url, scenario, mix, concurrency, rate, duration, warmup, timeout):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.scenario = scenario
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.warmup = warmup
+        self.timeout = timeout
+        self.samples = {name: [] for name in self.names}
+        self.status_counts = {name: {} for name in self.names}
+        self.error_examples = {}
+        self._lock = threading.Lock()
+
+    def _record(self, name, scheduled, status, error, measure_from):
+        latency = time.perf_counter() - measure_from
+        if scheduled < self.measure_start:
+            return
+        ok = status is not None and status < 400
+        with self._lock:
+            self.samples[name].append((latency, ok))
+            key = str(status) if status is not None else 'error'
+            self.status_counts[name][key] = self.status_counts[name].get(key, 0) + 1
+            if error and name not in self.error_examples:
+                self.error_examples[name] = error
+
+    def _execute(self, name, scheduled, measure_from):
+        method, path, body, headers = self.scenario.build(name)
+        status, error = send(self.host, self.port, method, path, body, headers, self.timeout)
+        self._record(name, scheduled, status, error, measure_from)
+
+    def _closed_loop_worker(self):
+        while True:
+            now = time.perf_counter()
+            if now >= self.end:
+                return
+            name = random.choices(self.names, self.weights)[0]
+            self._execute(name, now, now)
+
+    def _open_loop_worker(self, tasks):
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            name, scheduled = task
+            self._execute(name, scheduled, scheduled)
+
+    def run(self):
+        start = time.perf_counter()
+        self.measure_start = start + self.warmup
+        self.end = self.measure_start + self.duration
+
+        if self.rate:
+            tasks = queue.Queue()
+            workers = [threading.Thread(target=self._open_loop_worker, args=(tasks,), daemon=True)
+                       for _ in range(self.concurrency)]
+            for worker in workers:
+                worker.start()
+            interval = 1.0 / self.rate
+            scheduled = start
+            while scheduled < self.end:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                tasks.put((random.choices(self.names, self.weights)[0], scheduled))
+                scheduled += interval
+            for _ in workers:
+                tasks.put(None)
+        else:
+            workers = [threading.Thread(target=self._closed_loop_worker, daemon=True) for _ in range(self.concurrency)]
+            for worker in workers:
+                worker.start()
+
+        for worker in workers:
+            worker.join()
+        elapsed = max(time.perf_counter(), self.end) - self.measure_start
+        # in open-loop mode stragglers finish after the window; throughput uses the measured window
+        elapsed = self.duration if self.rate else elapsed
+
+        report = {name: summarize(self.samples[name], elapsed) for name in self.names if self.samples[name]}
+        for name in report:
+            report[name]['status_counts'] = self.status_counts[name]
+            if name in self.error_examples:
+                report[name]['example_error'] = self.error_examples[name]
+        report['overall'] = summarize([s for samples in self.samples.values() for s in samples], elapsed)
+        return report
+
+def fetch_business_ids(host, port, limit=1000):
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        connection.request('GET', f'/api/businesses?fields=business_id&limit={limit}')
+        data = json.loads(connection.getresponse().read())
+        return [row['business_id'] for row in data['data']]
+    finally:
+        connection.close()
+
+def wait_for_server(host, port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status, _ = send(host, port, 'GET', '/api/health', None, {}, 2)
+        if status == 200:
+            return True
+        time.sleep(0.5)
+    return False
+
+def start_server(port, extra_env=None):
+    """Start app.py on port in a subprocess"""
+    env = dict(os.environ, **(extra_env or {}))
+    env['API_PORT'] = str(port)
+    return subprocess.Popen([sys.executable, '-W', 'ignore', 'app.py'], cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def print_report(report):
+    print(f"\n{'endpoint':<16} {'requests':>9} {'rps':>8} {'err %':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, stats in report.items():
+        print(f"{name:<16} {stats['requests']:>9} {stats['throughput_rps']:>8.1f} {stats['error_rate'] * 100:>6.1f}% "
+              f"{stats['p50_ms'] or 0:>9.1f} {stats['p95_ms'] or 0:>9.1f} {stats['p99_ms'] or 0:>9.1f} {stats['max_ms'] or 0:>9.1f}")
+    for name, stats in report.items():
+        if 'example_error' in stats:
+            print(f"  {name}: {stats['example_error']}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--mix', help='comma separated name=weight (default: %s)' % ','.join(f"{k}={v}" for k, v in DEFAULT_MIX.items()))
+    parser.add_argument('--concurrency', type=int, default=8, help='in-flight requests (closed loop) or worker threads (with --rate)')
+    parser.add_argument('--rate', type=float, help='target requests per second (open loop)')
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=2, help='seconds excluded from the results')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the report as JSON')
+    parser.add_argument('--start-server', action='store_true',
+                        help='start app.py on the --url port for the run, with its upload state in a temporary directory')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    parts = urlsplit(args.url)
+    server = scratch = None
+    if args.start_server:
+        # uploads made by the run go to throwaway state, not the server's real files
+        scratch = tempfile.mkdtemp(prefix='load_test_')
+        server = start_server(parts.port or 80, {name: os.path.join(scratch, path) for name, path in SCRATCH_STATE.items()})
+    try:
+        if not wait_for_server(parts.hostname, parts.port or 80):
+            sys.exit(f"Server at {args.url} is not responding")
+
+        from synthetic_data import generate_sme_dataset
+        from dataset_store import prepare_business_frame
+        # uploads must carry the balance-sheet columns the dataset derives on load
+        upload = prepare_business_frame(generate_sme_dataset(UPLOAD_ROWS, args.seed))
+        upload['business_id'] = [f"LOAD_{i + 1}" for i in range(UPLOAD_ROWS)]
+        scenario = Scenario(fetch_business_ids(parts.hostname, parts.port or 80),
+                            upload.to_csv(index=False).encode('utf-8'))
+
+        mix = parse_mix(args.mix)
+        if not args.mix and not args.start_server:
+            # uploads would stay in the running server's statistics and storage
+            del mix['upload']
+        try:
+            for name in mix:
+                scenario.build(name)
+        except ValueError as e:
+            sys.exit(str(e))
+
+        mode = f"rate {args.rate}/s with {args.concurrency} workers" if args.rate else f"concurrency {args.concurrency}"
+        print(f"Load testing {args.url} for {args.duration}s ({mode}, warmup {args.warmup}s)")
+        test = LoadTest(args.url, scenario, mix, args.concurrency, args.rate, args.duration, args.warmup, args.timeout)
+        report = test.run()
+        print_report(report)
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'meta': {
+                        'timestamp': datetime.now().isoformat(timespec='seconds'),
+                        'url': args.url,
+                        'mix': mix,
+                        'concurrency': args.concurrency,
+                        'rate': args.rate,
+                        'duration': args.duration,
+                        'warmup': args.warmup
+                    },
+                    'results': report
+                }, f, indent=2)
+            print(f"\nReport written to {args.output}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
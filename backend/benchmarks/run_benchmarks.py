@@ -0,0 +1,214 @@
+"""Benchmark suite: loader, analysis, recommendations, translation, rendering and endpoints.
+
+Usage (from the backend directory):
+    python benchmarks/run_benchmarks.py [--rows 1000,100000,1000000] [--seed 42]
+                                        [--output results.json] [--compare previous.json]
+
+Each dataset size is generated with benchmarks/synthetic_data.py and measured
+in a fresh interpreter with DATASET_PATH pointing at it, so sizes do not share
+caches or memory. Results are written as JSON (default
+benchmarks/results/<timestamp>.json); --compare prints the change against an
+earlier results file.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Changes above this fraction are flagged by --compare
+REGRESSION_THRESHOLD = 0.10
+
+def summarize(samples):
+    """Timing summary in milliseconds"""
+    samples = sorted(samples)
+    return {
+        'median_ms': round(statistics.median(samples) * 1000, 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+        'min_ms': round(samples[0] * 1000, 3),
+        'runs': len(samples)
+    }
+
+def repeat(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def once(fn):
+    start = time.perf_counter()
+    result = fn()
+    return {'seconds': round(time.perf_counter() - start, 4)}, result
+
+def run_worker(csv_path, iterations, sample_size):
+    """Measure every stage against the dataset at DATASET_PATH (runs in a child process)"""
+    import numpy as np
+    from dataset_store import DatasetStore
+    from data_loader import get_dataset_store, load_business_data
+    from analysis import perform_analysis, perform_analysis_frame
+    from recommendation import generate_recommendation, generate_recommendation_frame
+    from translations import translate_analysis
+    from report_generator import generate_pdf_report, export_to_excel
+    from analysis_cache import analysis_cache
+
+    results = {}
+    results['load_csv'], _ = once(lambda: DatasetStore(csv_path, use_snapshot=False).get_frame())
+    results['load_build_snapshot'], _ = once(lambda: DatasetStore(csv_path).get_frame())
+    results['load_snapshot'], _ = once(lambda: DatasetStore(csv_path).get_frame())
+
+    df = get_dataset_store().get_frame()
+    rng = np.random.default_rng(0)
+    sample_ids = df['business_id'].iloc[rng.integers(0, len(df), size=sample_size)].tolist()
+    rows = [load_business_data(business_id) for business_id in sample_ids]
+    analyses = [perform_analysis(row) for row in rows]
+    position = iter(range(10 ** 9))
+
+    def next_row():
+        return rows[next(position) % len(rows)]
+
+    results['load_business_data'] = repeat(lambda: load_business_data(sample_ids[next(position) % len(sample_ids)]), iterations)
+    results['perform_analysis'] = repeat(lambda: perform_analysis(next_row()), iterations)
+    results['generate_recommendation'] = repeat(lambda: generate_recommendation(rows[0], analyses[0]), iterations)
+    results['translate_analysis'] = repeat(lambda: translate_analysis(analyses[next(position) % len(analyses)], 'hi'), iterations)
+
+    frame_analyses = []
+    results['perform_analysis_frame'], frame_analyses = once(lambda: perform_analysis_frame(df))
+    results['perform_analysis_frame']['rows_per_second'] = round(len(df) / max(results['perform_analysis_frame']['seconds'], 1e-9))
+    results['generate_recommendation_frame'], _ = once(lambda: generate_recommendation_frame(df, frame_analyses))
+    results['generate_recommendation_frame']['rows_per_second'] = round(len(df) / max(results['generate_recommendation_frame']['seconds'], 1e-9))
+    del frame_analyses
+
+    business_data = {'business_id': sample_ids[0], 'industry_type': rows[0]['industry_type'].iloc[0]}
+    recommendations = generate_recommendation(rows[0], analyses[0])
+    results['render_pdf'] = repeat(lambda: generate_pdf_report(business_data, analyses[0], recommendations), iterations)
+    results['render_excel'] = repeat(lambda: export_to_excel(business_data, analyses[0], recommendations), iterations)
+
+    from app import app
+    client = app.test_client()
+
+    def get(url):
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+
+    def cold_analysis():
+        analysis_cache.clear()
+        get(f"/api/analysis/{sample_ids[next(position) % len(sample_ids)]}")
+
+    batch_ids = sample_ids[:100]
+    endpoints = {
+        'GET /api/analysis/<id> (uncached)': cold_analysis,
+        'GET /api/analysis/<id> (cached)': lambda: get(f"/api/analysis/{sample_ids[0]}"),
+        'GET /api/analysis/<id>?language=hi': lambda: get(f"/api/analysis/{sample_ids[0]}?language=hi"),
+        'GET /api/businesses?limit=100': lambda: get('/api/businesses?limit=100&sort=-financial_health_score'),
+        'GET /api/dashboard': lambda: get('/api/dashboard'),
+        'GET /api/report/pdf/<id>': lambda: get(f"/api/report/pdf/{sample_ids[0]}"),
+        'GET /api/report/excel/<id>': lambda: get(f"/api/report/excel/{sample_ids[0]}"),
+        'POST /api/batch-analysis (100 ids)': lambda: client.post('/api/batch-analysis', json={'business_ids': batch_ids})
+    }
+    results['endpoints'] = {name: repeat(fn, iterations) for name, fn in endpoints.items()}
+    return results
+
+def flatten(results, prefix=''):
+    """{'a': {'b': {'median_ms': 1}}} -> {'a / b': 1} using each entry's headline number"""
+    flat = {}
+    for name, value in results.items():
+        key = f"{prefix}{name}"
+        if 'median_ms' in value:
+            flat[f"{key} (median ms)"] = value['median_ms']
+        elif 'seconds' in value:
+            flat[f"{key} (s)"] = value['seconds']
+        else:
+            flat.update(flatten(value, f"{key} / "))
+    return flat
+
+def compare(previous, current):
+    print(f"\n{'metric':<72} {'before':>12} {'after':>12} {'change':>8}")
+    for rows, results in current['results'].items():
+        before = flatten(previous.get('results', {}).get(rows, {}))
+        for key, value in flatten(results).items():
+            if key not in before or not before[key]:
+                continue
+            change = (value - before[key]) / before[key]
+            flag = '  REGRESSION' if change > REGRESSION_THRESHOLD else ''
+            print(f"{rows + ' rows / ' + key:<72} {before[key]:>12.3f} {value:>12.3f} {change:>+7.1%}{flag}")
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', default='1000,100000,1000000', help='comma separated dataset sizes')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=20, help='runs per repeated measurement')
+    parser.add_argument('--sample-size', type=int, default=200, help='businesses sampled for single-row stages')
+    parser.add_argument('--output', help='results JSON path')
+    parser.add_argument('--compare', help='earlier results JSON to compare against')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.iterations, args.sample_size)))
+        return
+
+    from synthetic_data import write_sme_dataset
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'iterations': args.iterations
+        },
+        'results': {}
+    }
+
+    for rows in [int(r) for r in args.rows.split(',')]:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, 'sme.csv')
+            write_sme_dataset(csv_path, rows, args.seed)
+            print(f"Benchmarking {rows} rows...", flush=True)
+            env = dict(os.environ, DATASET_PATH=csv_path, UPLOAD_JOBS_DB=os.path.join(tmp, 'jobs.db'))
+            child = subprocess.run(
+                [sys.executable, '-W', 'ignore', os.path.abspath(__file__), '--worker', csv_path,
+                 '--iterations', str(args.iterations), '--sample-size', str(args.sample_size)],
+                cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+            )
+            if child.returncode != 0:
+                print(child.stderr)
+                sys.exit(f"Benchmark failed for {rows} rows")
+            results = json.loads(child.stdout.strip().splitlines()[-1])
+            report['results'][str(rows)] = results
+            for key, value in flatten(results).items():
+                print(f"  {key:<66} {value:>12.3f}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+if __name__ == '__main__':
+    main()
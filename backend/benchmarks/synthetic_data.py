@@ -0,0 +1,92 @@
+"""Seeded generator of synthetic SME data in the SME_Financial_Health_Dataset.csv schema.
+
+Usage (from the backend directory):
+    python benchmarks/synthetic_data.py --rows 100000 --output /tmp/sme_100k.csv [--seed 42]
+
+Columns follow the sample dataset's distributions: uniform amounts and
+ratios over the observed ranges, its industry and GST status mix, and the
+same derivation of financial_health_score, risk_category and
+ai_recommendation from the ratios.
+"""
+import argparse
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['business_id', 'industry_type', 'annual_revenue', 'total_expenses', 'loan_amount', 'emi_amount',
+           'gst_compliance_status', 'current_ratio', 'quick_ratio', 'debt_equity_ratio', 'dscr', 'roce',
+           'financial_health_score', 'risk_category', 'ai_recommendation']
+
+# Category shares observed in the sample dataset
+INDUSTRY_MIX = {
+    'Retail': 0.181, 'E-commerce': 0.174, 'Logistics': 0.172,
+    'Manufacturing': 0.164, 'Agriculture': 0.155, 'Services': 0.154
+}
+GST_STATUS_MIX = {'Non-Compliant': 0.348, 'Delayed': 0.337, 'Compliant': 0.315}
+
+# (low, high) ranges; amounts are whole rupees, ratios have two decimals
+AMOUNT_RANGES = {
+    'annual_revenue': (500_000, 50_000_000),
+    'total_expenses': (400_000, 45_000_000),
+    'loan_amount': (40_000, 20_000_000),
+    'emi_amount': (50, 20_000)
+}
+RATIO_RANGES = {
+    'current_ratio': (0.3, 3.5),
+    'quick_ratio': (0.2, 3.0),
+    'debt_equity_ratio': (0.1, 4.5),
+    'dscr': (0.1, 5.0),
+    'roce': (-10.0, 30.0)
+}
+
+# financial_health_score = clip(round(sum(weight * ratio)), 0, 100)
+HEALTH_SCORE_WEIGHTS = {'current_ratio': 15, 'quick_ratio': 10, 'debt_equity_ratio': -10, 'dscr': 15, 'roce': 2}
+RISK_BANDS = [(70, 'Low Risk'), (40, 'Medium Risk')]
+RISK_FALLBACK = 'High Risk'
+RECOMMENDATIONS = {
+    'Low Risk': 'Eligible for growth investment or working capital loan',
+    'Medium Risk': 'Optimize working capital and control operational costs',
+    'High Risk': 'Reduce expenses, improve cash inflow, and avoid new loans'
+}
+
+def _choice(rng, mix, rows):
+    labels = list(mix)
+    weights = np.array(list(mix.values()))
+    return np.array(labels, dtype=object)[rng.choice(len(labels), size=rows, p=weights / weights.sum())]
+
+def generate_sme_dataset(rows, seed=42):
+    """Return a DataFrame of `rows` synthetic businesses; the same seed gives the same data"""
+    rng = np.random.default_rng(seed)
+    data = {'business_id': np.array([f"SME_{i + 1}" for i in range(rows)], dtype=object)}
+    data['industry_type'] = _choice(rng, INDUSTRY_MIX, rows)
+    for column in ['annual_revenue', 'total_expenses', 'loan_amount', 'emi_amount']:
+        low, high = AMOUNT_RANGES[column]
+        data[column] = rng.integers(low, high, size=rows, endpoint=True)
+    data['gst_compliance_status'] = _choice(rng, GST_STATUS_MIX, rows)
+    for column, (low, high) in RATIO_RANGES.items():
+        data[column] = np.round(rng.uniform(low, high, size=rows), 2)
+
+    score = sum(weight * data[column] for column, weight in HEALTH_SCORE_WEIGHTS.items())
+    data['financial_health_score'] = np.clip(np.round(score), 0, 100)
+    conditions = [data['financial_health_score'] >= threshold for threshold, _ in RISK_BANDS]
+    data['risk_category'] = np.select(conditions, [label for _, label in RISK_BANDS], default=RISK_FALLBACK).astype(object)
+    data['ai_recommendation'] = pd.Series(data['risk_category']).map(RECOMMENDATIONS).to_numpy()
+
+    return pd.DataFrame(data, columns=COLUMNS)
+
+def write_sme_dataset(path, rows, seed=42):
+    """Generate and write a CSV, returning the DataFrame"""
+    df = generate_sme_dataset(rows, seed)
+    df.to_csv(path, index=False)
+    return df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', required=True, help='CSV path to write')
+    args = parser.parse_args()
+    write_sme_dataset(args.output, args.rows, args.seed)
+    print(f"Wrote {args.rows} rows to {args.output}")
+
+if __name__ == '__main__':
+    main()
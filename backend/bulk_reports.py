@@ -0,0 +1,158 @@
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from data_loader import load_business_data, get_dataset_store
+from analysis_cache import analyze_business
+from report_generator import generate_pdf_report, report_filename
+
+# Worker processes for bulk rendering; defaults to one per core
+BULK_REPORT_WORKERS = int(os.environ.get('BULK_REPORT_WORKERS', os.cpu_count() or 1))
+# Upper bound on reports per request
+BULK_REPORT_MAX_BUSINESSES = int(os.environ.get('BULK_REPORT_MAX_BUSINESSES', 5000))
+# Dataset columns accepted in a bulk report filter
+BULK_REPORT_FILTER_COLUMNS = ['industry_type', 'risk_category', 'gst_compliance_status']
+# Pool workers must not be forked from a threaded server process (a lock held by
+# another thread at fork time stays locked in the child), so they are started
+# from a single-threaded fork server that has already imported this module
+BULK_REPORT_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_report_pool():
+    """Return the shared process pool, starting it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            context = multiprocessing.get_context(BULK_REPORT_START_METHOD)
+            if BULK_REPORT_START_METHOD == 'forkserver':
+                context.set_forkserver_preload([__name__])
+            _pool = ProcessPoolExecutor(max_workers=BULK_REPORT_WORKERS, mp_context=context)
+        return _pool
+
+def _reset_report_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def render_pdf_for_business(business_id):
+    """Render one business's PDF report; runs inside a pool worker.
+
+    Returns (business_id, pdf_bytes, error).
+    """
+    df = load_business_data(business_id)
+    if df is None or df.empty:
+        return business_id, None, 'Business not found'
+
+    analysis, recommendations = analyze_business(df)
+    business_data = {
+        'business_id': business_id,
+        'industry_type': df['industry_type'].iloc[0] if 'industry_type' in df.columns else 'Unknown'
+    }
+    pdf_buffer, error = generate_pdf_report(business_data, analysis, recommendations)
+    if error:
+        return business_id, None, error
+    return business_id, pdf_buffer.getvalue(), None
+
+def resolve_business_ids(business_ids=None, filters=None):
+    """Business IDs for a bulk request: an explicit list, or dataset rows matching filters"""
+    if business_ids:
+        # preserve order, drop duplicates
+        return list(dict.fromkeys(str(b).strip() for b in business_ids))
+
+    df = get_dataset_store().get_frame()
+    mask = None
+    for column, value in (filters or {}).items():
+        if column not in BULK_REPORT_FILTER_COLUMNS:
+            raise ValueError(f"Unsupported filter: {column}")
+        values = value if isinstance(value, list) else [value]
+        column_mask = df[column].isin(values)
+        mask = column_mask if mask is None else mask & column_mask
+    if mask is not None:
+        df = df[mask]
+    return df['business_id'].tolist()
+
+class _ZipStream:
+    """Write-only, unseekable sink that hands written bytes back in chunks"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def stream_pdf_zip(business_ids):
+    """Yield a ZIP archive of PDF reports chunk by chunk as workers finish them.
+
+    At most two reports per worker are in flight, so memory stays bounded
+    regardless of how many businesses are requested.
+    """
+    pool = get_report_pool()
+    sink = _ZipStream()
+    archive = zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED)
+    date_suffix = datetime.now().strftime('%Y%m%d')
+    window = max(1, BULK_REPORT_WORKERS * 2)
+    # future -> business ID, so a report that raised is still named in errors.txt
+    pending = {}
+    remaining = iter(business_ids)
+    failures = []
+    # entry names already written: sanitized IDs can collide
+    names = set()
+
+    try:
+        while True:
+            for business_id in remaining:
+                pending[pool.submit(render_pdf_for_business, business_id)] = business_id
+                if len(pending) >= window:
+                    break
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                business_id = pending.pop(future)
+                try:
+                    business_id, pdf_bytes, error = future.result()
+                except BrokenProcessPool:
+                    # a worker died; start a fresh pool for the next request
+                    _reset_report_pool()
+                    raise
+                except Exception as e:
+                    failures.append(f"{business_id}: {str(e)}")
+                    continue
+                if error:
+                    failures.append(f"{business_id}: {error}")
+                    continue
+                name = report_filename(business_id, 'pdf', date_suffix)
+                stem, copy = name[:-len('.pdf')], 1
+                while name in names:
+                    copy += 1
+                    name = f"{stem}_{copy}.pdf"
+                names.add(name)
+                archive.writestr(name, pdf_bytes)
+                yield sink.drain()
+
+        if failures:
+            archive.writestr('errors.txt', '\n'.join(failures) + '\n')
+        archive.close()
+        yield sink.drain()
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        raise
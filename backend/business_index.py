@@ -0,0 +1,163 @@
+import base64
+import json
+import threading
+import numpy as np
+import pandas as pd
+
+from data_loader import get_dataset_store
+
+# Fields returned when no projection is requested (same as get_all_businesses)
+DEFAULT_FIELDS = ['business_id', 'industry_type', 'annual_revenue', 'financial_health_score']
+# Categorical columns that accept equality filters (comma separated for several values)
+FILTER_COLUMNS = ['industry_type', 'risk_category', 'gst_compliance_status']
+# Range filters: query parameter -> (column, bound)
+RANGE_FILTERS = {
+    'min_score': ('financial_health_score', 'min'),
+    'max_score': ('financial_health_score', 'max'),
+    'min_revenue': ('annual_revenue', 'min'),
+    'max_revenue': ('annual_revenue', 'max')
+}
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+class InvalidQuery(ValueError):
+    """Raised for unknown fields, malformed filters or stale cursors"""
+
+def encode_cursor(version, sort, rank):
+    payload = json.dumps({'v': version, 's': sort, 'r': rank}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return payload['v'], payload['s'], int(payload['r'])
+    except Exception:
+        raise InvalidQuery('Malformed cursor')
+
+class BusinessIndex:
+    """Columnar copy of the dataset with lazily built sort orders.
+
+    Pages are cut from a sort order by rank, so a page costs a vectorized
+    mask for filters plus work proportional to the page size.
+    """
+
+    def __init__(self, df, version, token):
+        self.version = version
+        # cursors carry the dataset token, so they survive restarts and work on any worker
+        self.token = token
+        self.size = len(df)
+        self.columns = {name: df[name].to_numpy() for name in df.columns}
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    def _order(self, sort):
+        """Row positions in sort order ('' keeps dataset order, '-field' is descending)"""
+        if not sort:
+            return None
+        with self._lock:
+            order = self._orders.get(sort)
+            if order is None:
+                values = self.columns[sort.lstrip('-')]
+                # Missing values (NaN/None) sort last in either direction; the
+                # rest of an object column is compared as text, since mixed
+                # str/float values can't be ordered
+                missing = pd.isna(values)
+                present = np.flatnonzero(~missing)
+                keys = values[present]
+                if keys.dtype == object:
+                    keys = keys.astype(str)
+                order = present[np.argsort(keys, kind='stable')]
+                if sort.startswith('-'):
+                    order = order[::-1]
+                order = np.concatenate([order, np.flatnonzero(missing)])
+                self._orders[sort] = order
+            return order
+
+    def _mask(self, filters, ranges):
+        mask = None
+        for column, values in filters.items():
+            column_mask = np.isin(self.columns[column], values)
+            mask = column_mask if mask is None else mask & column_mask
+        for column, bound, value in ranges:
+            values = self.columns[column]
+            column_mask = values >= value if bound == 'min' else values <= value
+            mask = column_mask if mask is None else mask & column_mask
+        return mask
+
+    def query(self, fields=None, filters=None, ranges=None, sort='', limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """Return (records, total_matches, next_cursor) for one page"""
+        fields = fields or DEFAULT_FIELDS
+        for field in fields + ([sort.lstrip('-')] if sort else []):
+            if field not in self.columns:
+                raise InvalidQuery(f"Unknown field: {field}")
+
+        after = -1
+        if cursor:
+            version, cursor_sort, after = decode_cursor(cursor)
+            if version != self.token or cursor_sort != sort:
+                raise InvalidQuery('Cursor expired; restart pagination')
+
+        order = self._order(sort)
+        mask = self._mask(filters or {}, ranges or [])
+
+        if mask is None:
+            # No filters: ranks map straight onto the sort order
+            total = self.size
+            start = after + 1
+            ranks = np.arange(start, min(start + limit, self.size))
+        else:
+            matching = np.flatnonzero(mask if order is None else mask[order])
+            total = len(matching)
+            start = int(np.searchsorted(matching, after, side='right'))
+            ranks = matching[start:start + limit]
+
+        rows = ranks if order is None else order[ranks]
+        values = {field: self.columns[field][rows].tolist() for field in fields}
+        records = [dict(zip(fields, row)) for row in zip(*(values[field] for field in fields))]
+
+        remaining = (self.size if mask is None else total) - start - len(ranks)
+        next_cursor = encode_cursor(self.token, sort, int(ranks[-1])) if remaining > 0 else None
+        return records, total, next_cursor
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_business_index():
+    """Index for the current dataset version, rebuilt after a reload"""
+    global _index
+    version, token, df = get_dataset_store().get_tokened_frame()
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = BusinessIndex(df, version, token)
+        return _index
+
+def parse_business_query(args):
+    """Turn /api/businesses query parameters into BusinessIndex.query arguments"""
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()] or None
+
+    filters = {}
+    for column in FILTER_COLUMNS:
+        if args.get(column):
+            filters[column] = [v.strip() for v in args.get(column).split(',')]
+
+    ranges = []
+    for param, (column, bound) in RANGE_FILTERS.items():
+        if args.get(param) is not None:
+            try:
+                ranges.append((column, bound, float(args.get(param))))
+            except ValueError:
+                raise InvalidQuery(f"{param} must be a number")
+
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise InvalidQuery('limit must be an integer')
+
+    return {
+        'fields': fields,
+        'filters': filters,
+        'ranges': ranges,
+        'sort': args.get('sort', ''),
+        'limit': min(max(limit, 1), MAX_PAGE_SIZE),
+        'cursor': args.get('cursor')
+    }
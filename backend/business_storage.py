@@ -0,0 +1,489 @@
+import base64
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+import pandas as pd
+
+from data_loader import BASE_DIR, get_dataset_store
+from business_index import get_business_index, InvalidQuery, DEFAULT_FIELDS, DEFAULT_PAGE_SIZE
+
+# 'memory' serves the in-process dataset only; 'sqlite' keeps the dataset and uploaded businesses in BUSINESS_DB
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'memory').lower()
+BUSINESS_DB = os.environ.get('BUSINESS_DB', os.path.join(BASE_DIR, 'businesses.db'))
+BUSINESS_DB_POOL_SIZE = int(os.environ.get('BUSINESS_DB_POOL_SIZE', 8))
+# Rows per executemany call when loading the dataset into SQLite
+SQLITE_INSERT_BATCH = 50000
+
+# Secondary indexes: name -> columns. Point lookups and filtered listings seek on these;
+# the category indexes also hand back rows of one category already in score order
+INDEXES = {
+    'business_id': ['business_id'],
+    'industry_type': ['industry_type', 'financial_health_score'],
+    'risk_category': ['risk_category', 'financial_health_score'],
+    'financial_health_score': ['financial_health_score']
+}
+# Columns load_csv_data/load_xlsx_data add to uploaded rows
+UPLOAD_COLUMNS = ['upload_date', 'source']
+# origin of a stored row: dataset rows are listed and looked up before uploaded ones
+ORIGIN_DATASET = 0
+ORIGIN_UPLOAD = 1
+# Which stored row a lookup returns: the dataset row, else the latest upload
+LOOKUP_ORDER = f"ORDER BY origin, CASE origin WHEN {ORIGIN_UPLOAD} THEN -rowid ELSE rowid END"
+# Bookkeeping columns, never listed: the row's origin, and the JSON list of the
+# columns an uploaded row came with (its other columns are NULL padding)
+INTERNAL_COLUMNS = ['origin', 'supplied_columns']
+
+class BusinessStorage:
+    """Interface shared by the storage backends"""
+
+    @property
+    def token(self):
+        """Changes whenever the stored businesses change (used in ETags)"""
+        raise NotImplementedError
+
+    def row_token(self, business_id):
+        """Token for the content of the row get_row returns (used in ETags), or None if absent"""
+        raise NotImplementedError
+
+    def get_row(self, business_id):
+        """Single-row DataFrame for business_id, or None"""
+        raise NotImplementedError
+
+    def get_rows(self, business_ids):
+        """(frame, found) for many IDs, as DatasetStore.get_rows"""
+        raise NotImplementedError
+
+    def get_row_groups(self, business_ids):
+        """([(positions, frame)], found) for many IDs.
+
+        Rows with the same columns share a frame; positions index the found
+        rows in request order. Uploaded rows keep only their own columns, so
+        a frame never pads a business with another file's columns.
+        """
+        frame, found = self.get_rows(business_ids)
+        return [(list(range(len(frame))), frame)], found
+
+    def all_records(self, fields=None):
+        """Every business as a list of dicts with the given fields"""
+        raise NotImplementedError
+
+    def query(self, fields=None, filters=None, ranges=None, sort='', limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """(records, total_matches, next_cursor) for one page, as BusinessIndex.query"""
+        raise NotImplementedError
+
+    def add_businesses(self, df, batch=None):
+        """Store uploaded rows so they can be looked up and listed; returns rows stored.
+
+        batch is (job_id, start_row, end_row) for a block of an upload job;
+        a block the job already stored is skipped (see claim_upload_batch).
+        """
+        raise NotImplementedError
+
+class MemoryStorage(BusinessStorage):
+    """The in-process dataset store and business index; uploads are not kept"""
+
+    def __init__(self, store):
+        self.store = store
+
+    @property
+    def token(self):
+        return self.store.token
+
+    def row_token(self, business_id):
+        return self.store.row_token(business_id)
+
+    def get_row(self, business_id):
+        return self.store.get_row(business_id)
+
+    def get_rows(self, business_ids):
+        return self.store.get_rows(business_ids)
+
+    def all_records(self, fields=None):
+        return self.store.get_frame()[fields or DEFAULT_FIELDS].to_dict('records')
+
+    def query(self, fields=None, filters=None, ranges=None, sort='', limit=DEFAULT_PAGE_SIZE, cursor=None):
+        return get_business_index().query(fields, filters, ranges, sort, limit, cursor)
+
+    def add_businesses(self, df, batch=None):
+        return 0
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared by the request threads of one process.
+
+    Connections are opened lazily and never cross a fork: a child process
+    (e.g. a Gunicorn worker) starts with a fresh pool of its own.
+    """
+
+    def __init__(self, path, size=BUSINESS_DB_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, waiting for one when all are in use"""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            idle = self._idle
+            conn = None
+            if idle.empty() and self._opened < self.size:
+                self._opened += 1
+                conn = self._connect()
+        if conn is None:
+            conn = idle.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            idle.put(conn)
+
+def claim_upload_batch(conn, batch):
+    """Record an upload job's block in the database conn is writing to.
+
+    batch is (job_id, start_row, end_row); call inside a write transaction
+    and skip the block when this returns False: the job already applied
+    it (a resumed or retried job reads its last block again), so it is
+    never counted twice. None (a synchronous upload) always applies.
+    """
+    if batch is None:
+        return True
+    job_id, start, end = batch
+    conn.execute('CREATE TABLE IF NOT EXISTS upload_batches (job_id TEXT PRIMARY KEY, next_row INTEGER NOT NULL)')
+    row = conn.execute('SELECT next_row FROM upload_batches WHERE job_id = ?', (job_id,)).fetchone()
+    if row is not None and row[0] > start:
+        return False
+    conn.execute('INSERT OR REPLACE INTO upload_batches (job_id, next_row) VALUES (?, ?)', (job_id, end))
+    return True
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _sql_type(dtype):
+    if dtype.kind in 'biu':
+        return 'INTEGER'
+    if dtype.kind == 'f':
+        return 'REAL'
+    return 'TEXT'
+
+def _encode_cursor(token, sort, value, rowid):
+    payload = json.dumps({'t': token, 's': sort, 'k': [value, rowid]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        value, rowid = payload['k']
+        return payload['t'], payload['s'], value, int(rowid)
+    except Exception:
+        raise InvalidQuery('Malformed cursor')
+
+class SQLiteStorage(BusinessStorage):
+    """Dataset and uploaded businesses in one indexed SQLite table.
+
+    The dataset is copied in with batched executemany whenever the CSV
+    changes (uploaded rows are kept), uploads are appended as they are
+    ingested, and lookups and listings run as index seeks on INDEXES. Listings page with keyset cursors, so deep pages cost
+    the same as the first one. Upload columns the table lacks are added on
+    the fly, and an uploaded row is served with exactly the columns its
+    file had, so it analyzes as it did at upload time.
+    """
+
+    def __init__(self, path, store):
+        self.path = path
+        self.store = store
+        self.pool = ConnectionPool(path)
+        self._sync_lock = threading.Lock()
+        self._synced_token = None
+        # name -> SQL type of the stored columns, dataset column order first
+        self._columns = {}
+        self._dataset_columns = []
+
+    def _read_schema(self, conn):
+        info = conn.execute('PRAGMA table_info(businesses)').fetchall()
+        self._columns = {name: sql_type for _, name, sql_type, *_ in info if name not in INTERNAL_COLUMNS}
+        return {name for _, name, *_ in info}
+
+    def _add_columns(self, conn, wanted):
+        """ALTER in any (name, sql_type) the table lacks; call inside a write transaction"""
+        existing = self._read_schema(conn)
+        for name, sql_type in wanted:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE businesses ADD COLUMN {_quote(name)} {sql_type}")
+        self._read_schema(conn)
+
+    def _sync(self):
+        """Copy the current dataset into the table unless it already holds this version"""
+        token = self.store.token
+        if token == self._synced_token:
+            return
+        with self._sync_lock:
+            if token == self._synced_token:
+                return
+            df = self.store.get_frame()
+            with self.pool.connection() as conn:
+                # IMMEDIATE: one process loads while the others wait, then see it done
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute('CREATE TABLE IF NOT EXISTS storage_meta (key TEXT PRIMARY KEY, value TEXT)')
+                conn.execute('CREATE TABLE IF NOT EXISTS businesses (origin INTEGER NOT NULL)')
+                wanted = [(name, _sql_type(df[name].dtype)) for name in df.columns]
+                wanted += [(name, 'TEXT') for name in UPLOAD_COLUMNS + ['supplied_columns'] if name not in df.columns]
+                self._add_columns(conn, wanted)
+                for name, columns in INDEXES.items():
+                    if all(column in df.columns for column in columns):
+                        conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote('idx_businesses_' + name)} "
+                                     f"ON businesses ({', '.join(_quote(column) for column in columns)})")
+
+                row = conn.execute("SELECT value FROM storage_meta WHERE key = 'dataset_token'").fetchone()
+                if row is None or row[0] != token:
+                    self._replace_dataset(conn, df)
+                    conn.execute("INSERT OR REPLACE INTO storage_meta (key, value) VALUES ('dataset_token', ?)", (token,))
+                conn.execute('COMMIT')
+            self._dataset_columns = list(df.columns)
+            self._synced_token = token
+
+    def _replace_dataset(self, conn, df):
+        # Uploaded rows are re-appended after the new dataset so rowid order stays dataset-first
+        columns = ', '.join(_quote(name) for name in list(self._columns) + ['supplied_columns'])
+        last_rowid = conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM businesses').fetchone()[0]
+        conn.execute('DELETE FROM businesses WHERE origin = ?', (ORIGIN_DATASET,))
+        self._insert(conn, df, ORIGIN_DATASET)
+        conn.execute(f"INSERT INTO businesses (origin, {columns}) SELECT origin, {columns} FROM businesses "
+                     f"WHERE origin = ? AND rowid <= ? ORDER BY rowid", (ORIGIN_UPLOAD, last_rowid))
+        conn.execute('DELETE FROM businesses WHERE origin = ? AND rowid <= ?', (ORIGIN_UPLOAD, last_rowid))
+
+    def _insert(self, conn, df, origin):
+        names = [name for name in df.columns if name in self._columns]
+        supplied = json.dumps(names) if origin == ORIGIN_UPLOAD else None
+        sql = (f"INSERT INTO businesses (origin, supplied_columns, {', '.join(_quote(name) for name in names)}) "
+               f"VALUES (?, ?{', ?' * len(names)})")
+        for start in range(0, len(df), SQLITE_INSERT_BATCH):
+            block = df.iloc[start:start + SQLITE_INSERT_BATCH]
+            # tolist() yields Python scalars; NaN is stored as NULL
+            values = [block[name].tolist() for name in names]
+            conn.executemany(sql, zip([origin] * len(block), [supplied] * len(block), *values))
+        return len(df)
+
+    def _frame(self, rows, columns):
+        data = {}
+        for position, name in enumerate(columns):
+            values = [row[position] for row in rows]
+            # NULLs (or text SQLite kept in a numeric column) become NaN, as in the dataset frame
+            if self._columns.get(name) in ('INTEGER', 'REAL') and any(v is None or isinstance(v, str) for v in values):
+                values = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy()
+            data[name] = values
+        return pd.DataFrame(data, columns=columns)
+
+    @property
+    def token(self):
+        self._sync()
+        with self.pool.connection() as conn:
+            last_rowid = conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM businesses').fetchone()[0]
+        return f"{self._synced_token}-{last_rowid:x}"
+
+    def _select(self, where, params, extra=''):
+        """(rows, columns) with origin, rowid and supplied_columns first"""
+        with self.pool.connection() as conn:
+            cursor = conn.execute(f"SELECT origin, rowid, supplied_columns, * FROM businesses WHERE {where} {extra}",
+                                  params)
+            rows = cursor.fetchall()
+            # SELECT * also picks up columns another process added since the schema was read
+            names = [description[0] for description in cursor.description[3:]]
+            if any(name not in self._columns and name not in INTERNAL_COLUMNS for name in names):
+                self._read_schema(conn)
+        return rows, names
+
+    def _row_columns(self, row, names):
+        """Columns a stored row is served with"""
+        if row[0] == ORIGIN_DATASET:
+            # dataset rows carry exactly the dataset's columns, as with the memory backend
+            return self._dataset_columns
+        if row[2] is not None:
+            return json.loads(row[2])
+        # uploads stored before supplied_columns was recorded: their non-null columns
+        return [name for name, value in zip(names, row[3:]) if value is not None and name not in INTERNAL_COLUMNS]
+
+    def _lookup_rows(self, keys):
+        """business_id -> (row, names) of the row each key looks up (LOOKUP_ORDER)"""
+        first = {}
+        unique = list(dict.fromkeys(keys))
+        # stay under SQLite's bound-parameter limit
+        for start in range(0, len(unique), 500):
+            block = unique[start:start + 500]
+            rows, names = self._select(f"business_id IN ({', '.join('?' * len(block))})", block,
+                                       LOOKUP_ORDER)
+            for row in rows:
+                key = row[names.index('business_id') + 3]
+                if key not in first:
+                    first[key] = (row, names)
+        return first
+
+    def row_token(self, business_id):
+        self._sync()
+        key = str(business_id).strip()
+        # dataset rows win lookups and are tokened by content, as with the memory backend
+        token = self.store.row_token(key)
+        if token is not None:
+            return token
+        # stored uploads are never rewritten in place: a re-upload (or the re-append
+        # after a dataset change) gives the row served a new rowid
+        with self.pool.connection() as conn:
+            row = conn.execute('SELECT MAX(rowid) FROM businesses WHERE business_id = ? AND origin = ?',
+                               (key, ORIGIN_UPLOAD)).fetchone()
+        return None if row[0] is None else f"{self._synced_token}-u{row[0]:x}"
+
+    def get_row(self, business_id):
+        self._sync()
+        rows, names = self._select('business_id = ?', (str(business_id).strip(),), f"{LOOKUP_ORDER} LIMIT 1")
+        if not rows:
+            return None
+        columns = self._row_columns(rows[0], names)
+        positions = [names.index(name) + 3 for name in columns]
+        return self._frame([[rows[0][p] for p in positions]], columns)
+
+    def get_rows(self, business_ids):
+        self._sync()
+        keys = [str(business_id).strip() for business_id in business_ids]
+        first = self._lookup_rows(keys)
+        rows = [first[key] for key in keys if key in first]
+        columns = self._dataset_columns
+        if any(row[0] == ORIGIN_UPLOAD for row, _ in rows):
+            columns = list(dict.fromkeys(name for row, names in rows for name in self._row_columns(row, names)))
+        frame_rows = []
+        for row, names in rows:
+            values = dict(zip(names, row[3:]))
+            frame_rows.append([values.get(name) for name in columns])
+        return self._frame(frame_rows, columns), [key in first for key in keys]
+
+    def get_row_groups(self, business_ids):
+        self._sync()
+        keys = [str(business_id).strip() for business_id in business_ids]
+        first = self._lookup_rows(keys)
+        groups = {}
+        for position, (row, names) in enumerate(first[key] for key in keys if key in first):
+            columns = tuple(self._row_columns(row, names))
+            values = dict(zip(names, row[3:]))
+            positions, frame_rows = groups.setdefault(columns, ([], []))
+            positions.append(position)
+            frame_rows.append([values[name] for name in columns])
+        return ([(positions, self._frame(frame_rows, list(columns))) for columns, (positions, frame_rows) in groups.items()],
+                [key in first for key in keys])
+
+    def all_records(self, fields=None):
+        self._sync()
+        fields = fields or DEFAULT_FIELDS
+        rows, names = self._select('1', (), 'ORDER BY rowid')
+        positions = [names.index(name) + 3 for name in fields]
+        return [{field: row[p] for field, p in zip(fields, positions)} for row in rows]
+
+    def query(self, fields=None, filters=None, ranges=None, sort='', limit=DEFAULT_PAGE_SIZE, cursor=None):
+        self._sync()
+        fields = fields or DEFAULT_FIELDS
+        field = sort.lstrip('-')
+        requested = fields + ([field] if sort else [])
+        if any(name not in self._columns for name in requested):
+            # another process may have added the column with an upload
+            with self.pool.connection() as conn:
+                self._read_schema(conn)
+        for name in requested:
+            if name not in self._columns:
+                raise InvalidQuery(f"Unknown field: {name}")
+
+        where = []
+        params = []
+        for column, values in (filters or {}).items():
+            where.append(f"{_quote(column)} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        for column, bound, value in ranges or []:
+            where.append(f"{_quote(column)} {'>=' if bound == 'min' else '<='} ?")
+            params.append(value)
+        count_where = ' AND '.join(where) or '1'
+        count_params = list(params)
+
+        descending = sort.startswith('-')
+        if cursor:
+            token, cursor_sort, value, rowid = _decode_cursor(cursor)
+            if token != self._synced_token or cursor_sort != sort:
+                raise InvalidQuery('Cursor expired; restart pagination')
+            # rows after (value, rowid) in (field, rowid) order; NULLs sort first ascending
+            column = _quote(field) if sort else None
+            if not sort:
+                where.append('rowid > ?')
+                params.append(rowid)
+            elif descending and value is None:
+                where.append(f"{column} IS NULL AND rowid < ?")
+                params.append(rowid)
+            elif descending:
+                where.append(f"({column} < ? OR ({column} = ? AND rowid < ?) OR {column} IS NULL)")
+                params.extend([value, value, rowid])
+            elif value is None:
+                where.append(f"(({column} IS NULL AND rowid > ?) OR {column} IS NOT NULL)")
+                params.append(rowid)
+            else:
+                where.append(f"({column} > ? OR ({column} = ? AND rowid > ?))")
+                params.extend([value, value, rowid])
+
+        direction = 'DESC' if descending else 'ASC'
+        order = f"{_quote(field)} {direction}, rowid {direction}" if sort else 'rowid'
+        rows, names = self._select(' AND '.join(where) or '1', params, f"ORDER BY {order} LIMIT {int(limit) + 1}")
+        with self.pool.connection() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM businesses WHERE {count_where}", count_params).fetchone()[0]
+
+        page = rows[:limit]
+        positions = [names.index(name) + 3 for name in fields]
+        records = [{name: row[p] for name, p in zip(fields, positions)} for row in page]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            value = last[names.index(field) + 3] if sort else None
+            next_cursor = _encode_cursor(self._synced_token, sort, value, last[1])
+        return records, total, next_cursor
+
+    def add_businesses(self, df, batch=None):
+        if df is None or df.empty:
+            return 0
+        self._sync()
+        with self.pool.connection() as conn:
+            # IMMEDIATE takes the write lock before the schema is read, so two
+            # processes never add the same new column
+            conn.execute('BEGIN IMMEDIATE')
+            if not claim_upload_batch(conn, batch):
+                conn.execute('COMMIT')
+                return 0
+            self._add_columns(conn, [(name, _sql_type(df[name].dtype)) for name in df.columns])
+            stored = self._insert(conn, df, ORIGIN_UPLOAD)
+            conn.execute('COMMIT')
+        return stored
+
+_storage = None
+_storage_lock = threading.Lock()
+
+def get_storage():
+    """Process-wide storage backend selected by STORAGE_BACKEND"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if STORAGE_BACKEND == 'sqlite':
+                    _storage = SQLiteStorage(BUSINESS_DB, get_dataset_store())
+                elif STORAGE_BACKEND == 'memory':
+                    _storage = MemoryStorage(get_dataset_store())
+                else:
+                    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+    return _storage
@@ -0,0 +1,312 @@
+import fcntl
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+from data_loader import BASE_DIR
+from peer_percentiles import PEER_RATIOS
+
+# Sketches of every uploaded business, kept across restarts and shared by worker processes
+COHORT_STATS_FILE = os.environ.get('COHORT_STATS_FILE', os.path.join(BASE_DIR, 'cohort_stats.npz'))
+# t-digest compression: about half this many centroids per cohort; higher is more accurate
+COHORT_DIGEST_COMPRESSION = int(os.environ.get('COHORT_DIGEST_COMPRESSION', 200))
+# Bump when the on-disk layout changes; older files are ignored
+COHORT_STATS_FORMAT_VERSION = 1
+# Cohort holding every industry
+ALL_INDUSTRIES = 'All'
+DEFAULT_QUANTILES = (0.5, 0.9)
+
+# count, mean, sum of squared deviations, min, max
+_EMPTY_MOMENTS = np.array([0.0, 0.0, 0.0, np.inf, -np.inf])
+
+class TDigest:
+    """Merging t-digest: weighted centroids, small at the tails and large in the middle.
+
+    Added values are buffered; the buffer and any merged digests are
+    folded into the centroids in one vectorized sort-and-regroup pass when
+    the centroids are next needed. Any two digests (from different
+    uploads, workers or restarts) merge into one summary of bounded size.
+    """
+
+    def __init__(self, means=None, weights=None, compression=COHORT_DIGEST_COMPRESSION):
+        self.compression = compression
+        self._means = [] if means is None else [means]
+        self._weights = [] if weights is None else [weights]
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        # k1 scale function: one unit of k per centroid, so clusters shrink towards q=0 and q=1
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * q - 1))
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(k)) + 1))
+        merged_weights = np.add.reduceat(weights, starts)
+        return np.add.reduceat(means * weights, starts) / merged_weights, merged_weights
+
+    def centroids(self):
+        """(means, weights) sorted by mean, compressing pending input first"""
+        if len(self._means) != 1:
+            if self._means:
+                compressed = self._compress(np.concatenate(self._means), np.concatenate(self._weights))
+            else:
+                compressed = (np.array([], dtype=float), np.array([], dtype=float))
+            self._means, self._weights = [compressed[0]], [compressed[1]]
+        return self._means[0], self._weights[0]
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        if len(values):
+            self._means.append(values)
+            self._weights.append(np.ones(len(values)))
+
+    def merge(self, other):
+        self._means.extend(other._means)
+        self._weights.extend(other._weights)
+
+    def quantile(self, q, minimum, maximum):
+        """Value at quantile q, interpolated between centroid centers and the exact extremes"""
+        means, weights = self.centroids()
+        if not len(weights):
+            return None
+        centers = np.cumsum(weights) - weights / 2
+        total = centers[-1] + weights[-1] / 2
+        positions = np.concatenate(([0.0], centers, [total]))
+        values = np.concatenate(([minimum], means, [maximum]))
+        return float(np.interp(q * total, positions, values))
+
+def merge_moments(a, b):
+    """Combine two (count, mean, m2, min, max) arrays (Chan et al. parallel update)"""
+    count = a[0] + b[0]
+    if count == 0:
+        return _EMPTY_MOMENTS.copy()
+    delta = b[1] - a[1]
+    mean = a[1] + delta * b[0] / count
+    m2 = a[2] + b[2] + delta * delta * a[0] * b[0] / count
+    return np.array([count, mean, m2, min(a[3], b[3]), max(a[4], b[4])])
+
+def batch_moments(values):
+    if not len(values):
+        return _EMPTY_MOMENTS.copy()
+    mean = values.mean()
+    return np.array([len(values), mean, float(((values - mean) ** 2).sum()), values.min(), values.max()])
+
+class CohortSketches:
+    """(industry, ratio) -> (TDigest, moments), mergeable and saved without pickle.
+
+    applied maps each upload job to the row its applied blocks end at, so
+    a block a resumed job reads again is not added twice.
+    """
+
+    def __init__(self):
+        self.cohorts = {}
+        self.applied = {}
+
+    def _cohort(self, key):
+        cohort = self.cohorts.get(key)
+        if cohort is None:
+            cohort = self.cohorts[key] = (TDigest(), _EMPTY_MOMENTS.copy())
+        return cohort
+
+    def add(self, key, values):
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        digest, moments = self._cohort(key)
+        digest.add(values)
+        self.cohorts[key] = (digest, merge_moments(moments, batch_moments(values)))
+
+    def merge(self, other):
+        for key, (digest, moments) in other.cohorts.items():
+            own_digest, own_moments = self._cohort(key)
+            own_digest.merge(digest)
+            self.cohorts[key] = (own_digest, merge_moments(own_moments, moments))
+
+    def apply(self, batch, delta):
+        """Merge delta unless batch ((job_id, start_row, end_row) or None) was already applied"""
+        if batch is not None:
+            job_id, start, end = batch
+            if self.applied.get(job_id, 0) > start:
+                return
+            self.applied[job_id] = end
+        self.merge(delta)
+
+    def save(self, path):
+        """Write atomically: one row per cohort plus the concatenated centroids"""
+        keys = sorted(self.cohorts)
+        centroids = [self.cohorts[key][0].centroids() for key in keys]
+        offsets = np.cumsum([0] + [len(weights) for _, weights in centroids])
+        staging = f"{path}.tmp-{os.getpid()}.npz"
+        np.savez(
+            staging,
+            format_version=np.array(COHORT_STATS_FORMAT_VERSION),
+            industries=np.array([industry for industry, _ in keys], dtype=str),
+            ratios=np.array([ratio for _, ratio in keys], dtype=str),
+            moments=np.array([self.cohorts[key][1] for key in keys]).reshape(len(keys), len(_EMPTY_MOMENTS)),
+            offsets=offsets,
+            means=np.concatenate([means for means, _ in centroids] or [np.array([])]),
+            weights=np.concatenate([weights for _, weights in centroids] or [np.array([])]),
+            applied_jobs=np.array(list(self.applied), dtype=str),
+            applied_rows=np.array(list(self.applied.values()), dtype=np.int64)
+        )
+        os.replace(staging, path)
+
+    @classmethod
+    def load(cls, path):
+        sketches = cls()
+        if not os.path.exists(path):
+            return sketches
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['format_version']) != COHORT_STATS_FORMAT_VERSION:
+                return sketches
+            offsets, means, weights, moments = data['offsets'], data['means'], data['weights'], data['moments']
+            for i, key in enumerate(zip(data['industries'].tolist(), data['ratios'].tolist())):
+                digest = TDigest(means[offsets[i]:offsets[i + 1]], weights[offsets[i]:offsets[i + 1]])
+                sketches.cohorts[key] = (digest, moments[i])
+            # absent from files written before jobs were tracked
+            if 'applied_jobs' in data.files:
+                sketches.applied = dict(zip(data['applied_jobs'].tolist(), data['applied_rows'].tolist()))
+        return sketches
+
+@contextmanager
+def _file_lock(path):
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    # os.replace gives every write a new inode
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+class CohortStats:
+    """Quantile sketches and running moments per industry and ratio, over every upload.
+
+    Each analyzed upload block is folded into a pending delta, and the
+    delta is merged into the file under an inter-process lock, so
+    concurrent workers never overwrite each other's updates. Reads use
+    the last loaded state (reloaded when another process changed the
+    file). Queries only touch the bounded sketch of one cohort, never the
+    uploaded rows.
+    """
+
+    def __init__(self, path=COHORT_STATS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = None
+        self._signature = None
+        # (batch, delta) pairs not yet written to the file
+        self._pending = []
+        # Bumped whenever the statistics change
+        self.generation = 0
+
+    def _refresh(self):
+        signature = _file_signature(self.path)
+        if self._state is None or signature != self._signature:
+            try:
+                state = CohortSketches.load(self.path)
+            except Exception as e:
+                print(f"Error loading cohort statistics: {str(e)}")
+                state = CohortSketches()
+            for batch, delta in self._pending:
+                state.apply(batch, delta)
+            self._state, self._signature = state, signature
+            self.generation += 1
+        return self._state
+
+    def _flush(self):
+        try:
+            with _file_lock(f"{self.path}.lock"):
+                state = CohortSketches.load(self.path)
+                for batch, delta in self._pending:
+                    state.apply(batch, delta)
+                state.save(self.path)
+                self._signature = _file_signature(self.path)
+            self._state = state
+            self._pending = []
+        except Exception as e:
+            # the delta stays pending and is written with the next upload;
+            # reads reload the file and add it meanwhile
+            print(f"Error saving cohort statistics: {str(e)}")
+            self._signature = False
+
+    @property
+    def token(self):
+        """Changes whenever any process updates the statistics"""
+        with self._lock:
+            self._refresh()
+            return f"{self._signature}-{self.generation if self._pending else 0}"
+
+    def add_analyses(self, analyses, batch=None):
+        """Fold analyzed upload rows (None for failed rows) into the sketches.
+
+        batch is (job_id, start_row, end_row) for a block of an upload job;
+        the file records it with the sketches, so a block the job already
+        added is skipped.
+        """
+        analyses = [analysis for analysis in analyses if analysis is not None]
+        if not analyses:
+            return
+
+        industries = np.array([analysis.get('industry_type') for analysis in analyses], dtype=object)
+        groups = {industry: industries == industry for industry in dict.fromkeys(industries.tolist())}
+        delta = CohortSketches()
+        for ratio, section in PEER_RATIOS.items():
+            values = np.array([a[section].get(ratio) for a in analyses], dtype=float)
+            delta.add((ALL_INDUSTRIES, ratio), values)
+            for industry, rows in groups.items():
+                delta.add((industry, ratio), values[rows] if len(groups) > 1 else values)
+
+        with self._lock:
+            self._pending.append((batch, delta))
+            self._flush()
+            self.generation += 1
+
+    def reset(self):
+        """Forget every upload: replace the file with empty sketches and drop pending deltas"""
+        with self._lock:
+            state = CohortSketches()
+            with _file_lock(f"{self.path}.lock"):
+                state.save(self.path)
+                self._signature = _file_signature(self.path)
+            self._state = state
+            self._pending = []
+            self.generation += 1
+
+    def query(self, industry=None, ratio=None, quantiles=DEFAULT_QUANTILES):
+        """Stats for every cohort matching industry and ratio (None matches all)"""
+        with self._lock:
+            state = self._refresh()
+            cohorts = [(key, state.cohorts[key]) for key in sorted(state.cohorts)
+                       if (industry is None or key[0] == industry) and (ratio is None or key[1] == ratio)]
+
+        results = []
+        for (cohort_industry, cohort_ratio), (digest, moments) in cohorts:
+            count, mean, m2, minimum, maximum = moments.tolist()
+            if not count:
+                continue
+            results.append({
+                'industry': cohort_industry,
+                'ratio': cohort_ratio,
+                'count': int(count),
+                'mean': round(mean, 4),
+                'std': round((m2 / (count - 1)) ** 0.5, 4) if count > 1 else 0.0,
+                'min': minimum,
+                'max': maximum,
+                'quantiles': {f"p{q * 100:g}": round(digest.quantile(q, minimum, maximum), 4) for q in quantiles}
+            })
+        return results
+
+cohort_stats = CohortStats()
+
+def record_uploaded_cohorts(analyses, batch=None):
+    """Add analyzed upload rows to the persisted cohort statistics"""
+    cohort_stats.add_analyses(analyses, batch)
@@ -0,0 +1,78 @@
+import gzip
+import os
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are sent as-is
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+# Only text payloads; PDF, XLSX and ZIP downloads are already compressed
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/plain', 'text/html', 'text/csv'}
+
+def available_encodings():
+    """Content encodings this server can produce, in preference order"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def negotiate_encoding(streamed=False):
+    """Pick the best encoding the client accepts, or None"""
+    accepted = request.accept_encodings
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        # streams are compressed incrementally, which only gzip does here
+        if streamed and encoding != 'gzip':
+            continue
+        quality = accepted[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def _gzip_stream(chunks):
+    """Compress an iterable of chunks, flushing after each so records arrive promptly"""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def compress_response(response):
+    """after_request hook applying negotiated gzip/brotli to large text responses"""
+    if (response.status_code < 200 or response.status_code >= 300 or response.status_code == 204
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+
+    if response.is_streamed:
+        encoding = negotiate_encoding(streamed=True)
+        if encoding is None:
+            return response
+        response.response = _gzip_stream(response.response)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESSION_MIN_SIZE:
+            return response
+        encoding = negotiate_encoding()
+        if encoding is None:
+            return response
+        if encoding == 'br':
+            response.set_data(brotli.compress(body, quality=BROTLI_QUALITY))
+        else:
+            response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0))
+
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        # each encoding is a different representation with its own strong ETag
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response
@@ -0,0 +1,139 @@
+import threading
+import numpy as np
+import pandas as pd
+
+from data_loader import get_dataset_store
+from upload_registry import upload_registry
+
+# Score histogram bucket edges; the last bucket includes 100
+SCORE_HISTOGRAM_EDGES = list(range(0, 101, 10))
+# Rows listed under 'businesses' in the dashboard response
+DASHBOARD_PREVIEW_ROWS = 10
+PREVIEW_COLUMNS = ['business_id', 'industry_type', 'annual_revenue', 'financial_health_score']
+
+class DashboardAggregate:
+    """Mergeable totals, counts and score histogram over a set of businesses"""
+
+    def __init__(self):
+        self.count = 0
+        self.revenue_sum = 0
+        self.loan_sum = 0
+        self.score_sum = 0.0
+        self.score_count = 0
+        self.industry_counts = {}
+        self.risk_counts = {}
+        self.score_histogram = [0] * (len(SCORE_HISTOGRAM_EDGES) - 1)
+
+    def add_frame(self, df):
+        """Fold a frame with the dataset's columns into the aggregate (vectorized)"""
+        if df is None or df.empty:
+            return
+        self.count += len(df)
+        if 'annual_revenue' in df.columns:
+            self.revenue_sum += df['annual_revenue'].sum().item()
+        if 'loan_amount' in df.columns:
+            self.loan_sum += df['loan_amount'].sum().item()
+
+        if 'financial_health_score' in df.columns:
+            scores = pd.to_numeric(df['financial_health_score'], errors='coerce').dropna().to_numpy()
+            self.score_sum += float(scores.sum())
+            self.score_count += len(scores)
+            counts, _ = np.histogram(np.clip(scores, SCORE_HISTOGRAM_EDGES[0], SCORE_HISTOGRAM_EDGES[-1]),
+                                     bins=SCORE_HISTOGRAM_EDGES)
+            self.score_histogram = [a + int(b) for a, b in zip(self.score_histogram, counts)]
+
+        for column, counts in (('industry_type', self.industry_counts), ('risk_category', self.risk_counts)):
+            if column in df.columns:
+                # dropna=False rather than fillna: shared frames hold Categoricals
+                for value, n in df[column].value_counts(sort=False, dropna=False).items():
+                    if n:
+                        value = 'Unknown' if pd.isna(value) else value
+                        counts[value] = counts.get(value, 0) + int(n)
+
+    def merge(self, other):
+        """Return a new aggregate combining self and other"""
+        merged = DashboardAggregate()
+        merged.count = self.count + other.count
+        merged.revenue_sum = self.revenue_sum + other.revenue_sum
+        merged.loan_sum = self.loan_sum + other.loan_sum
+        merged.score_sum = self.score_sum + other.score_sum
+        merged.score_count = self.score_count + other.score_count
+        for target, a, b in ((merged.industry_counts, self.industry_counts, other.industry_counts),
+                             (merged.risk_counts, self.risk_counts, other.risk_counts)):
+            for counts in (a, b):
+                for key, n in counts.items():
+                    target[key] = target.get(key, 0) + n
+        merged.score_histogram = [a + b for a, b in zip(self.score_histogram, other.score_histogram)]
+        return merged
+
+    def to_dict(self):
+        risk_distribution = {'low_risk': 0, 'medium_risk': 0, 'high_risk': 0}
+        for category, n in self.risk_counts.items():
+            key = str(category).lower().replace(' ', '_')
+            risk_distribution[key] = risk_distribution.get(key, 0) + n
+
+        return {
+            'total_businesses': self.count,
+            'total_revenue': self.revenue_sum,
+            'total_loan_amount': self.loan_sum,
+            'average_revenue': round(self.revenue_sum / self.count, 2) if self.count else 0,
+            'average_health_score': round(self.score_sum / self.score_count, 2) if self.score_count else 0,
+            'risk_distribution': risk_distribution,
+            'industry_distribution': dict(sorted(self.industry_counts.items())),
+            'score_histogram': [
+                {'range': f"{low}-{high}", 'count': n}
+                for low, high, n in zip(SCORE_HISTOGRAM_EDGES, SCORE_HISTOGRAM_EDGES[1:], self.score_histogram)
+            ]
+        }
+
+class DashboardMetrics:
+    """Dashboard payload materialized once per dataset version.
+
+    Uploads are aggregated from the shared upload registry, one row per
+    business_id, so re-uploads are not counted twice and every worker
+    process reports the same totals. An uploaded ID the dataset also has is
+    counted once, from the dataset row, as lookups return it. Both parts
+    are rebuilt only when their version or token changes, so a read is two
+    version checks plus returning the prebuilt dict.
+    """
+
+    def __init__(self, store, registry):
+        self.store = store
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._version = None
+        self._base = None
+        self._dataset_ids = pd.Index([])
+        self._preview = []
+        self._uploads_token = None
+        self._uploads = DashboardAggregate()
+        self._payload = None
+
+    def get(self):
+        """Current dashboard payload (treat as read-only)"""
+        version = self.store.version
+        token, uploaded = self.registry.snapshot()
+        if self._version != version or self._uploads_token != token:
+            with self._lock:
+                dataset_changed = self._version != version
+                if dataset_changed:
+                    version, df = self.store.get_versioned_frame()
+                    base = DashboardAggregate()
+                    base.add_frame(df)
+                    self._base = base
+                    self._dataset_ids = pd.Index(df['business_id'].astype(str).unique())
+                    self._preview = df[PREVIEW_COLUMNS].head(DASHBOARD_PREVIEW_ROWS).to_dict('records')
+                    self._version = version
+                if dataset_changed or self._uploads_token != token:
+                    uploads = DashboardAggregate()
+                    uploads.add_frame(uploaded[~uploaded['business_id'].isin(self._dataset_ids)])
+                    self._uploads = uploads
+                    self._uploads_token = token
+                payload = self._base.merge(self._uploads).to_dict()
+                payload['uploaded_businesses'] = self._uploads.count
+                payload['dataset_version'] = self.store.token
+                payload['businesses'] = self._preview
+                self._payload = payload
+        return self._payload
+
+dashboard_metrics = DashboardMetrics(get_dataset_store(), upload_registry)
@@ -4,14 +4,25 @@ import os
 from pathlib import Path
 import numpy as np
 from datetime import datetime
+from dataset_store import DatasetStore
+from metrics import timed
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-CSV_PATH = os.path.join(BASE_DIR, "SME_Financial_Health_Dataset.csv")
-UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
+# DATASET_PATH points the API at another CSV with the same schema (e.g. generated benchmark data)
+CSV_PATH = os.environ.get('DATASET_PATH', os.path.join(BASE_DIR, "SME_Financial_Health_Dataset.csv"))
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', os.path.join(BASE_DIR, "uploads"))
+# Publish the dataset to shared memory once for all worker processes (set by gunicorn.conf.py)
+SHARED_DATASET = os.environ.get('SHARED_DATASET', '').lower() in ('1', 'true', 'yes')
 
 # Create uploads folder if it doesn't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# Parsed and indexed once per process (or once per host with SHARED_DATASET), reloaded when the CSV changes on disk
+_dataset_store = DatasetStore(CSV_PATH, shared=SHARED_DATASET)
+
+# Rows per block when streaming uploaded files; upload job progress advances one block at a time
+CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 1000))
+
 # Supported file formats
 ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'xls', 'pdf'}
 
@@ -43,7 +54,7 @@ def load_csv_data(file_path):
         df['business_id'] = df.get('business_id', [f"CSV_{i}" for i in range(len(df))])
         df['upload_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         df['source'] = 'CSV Upload'
-        return df
+        return df, None
     except Exception as e:
         return None, f"Error loading CSV: {str(e)}"
 
@@ -54,70 +65,21 @@ def load_xlsx_data(file_path):
         df['business_id'] = df.get('business_id', [f"XLSX_{i}" for i in range(len(df))])
         df['upload_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         df['source'] = 'Excel Upload'
-        return df
+        return df, None
     except Exception as e:
         return None, f"Error loading Excel: {str(e)}"
 
+def get_dataset_store():
+    """Return the process-wide store for the default dataset"""
+    return _dataset_store
+
+@timed('load_business_data')
 def load_business_data(business_id):
-    """Load business data from default dataset"""
+    """Load business data from the configured storage backend"""
+    # business_storage imports this module, so it is imported on first use
+    from business_storage import get_storage
     try:
-        # Read with python engine and explicit separator to be resilient to odd line breaks
-        df = pd.read_csv(CSV_PATH, sep=',', engine='python', skipinitialspace=True)
-        df["business_id"] = df["business_id"].astype(str).str.strip()
-        df = df[df["business_id"] == business_id.strip()]
-        if df.empty:
-            return None
-
-        # Ensure required numeric columns exist. If missing, create reasonable defaults
-        ar = float(df['annual_revenue'].fillna(0).iloc[0]) if 'annual_revenue' in df.columns else 0.0
-
-        # current_assets
-        if 'current_assets' not in df.columns:
-            if 'current_ratio' in df.columns and 'current_liabilities' in df.columns and df['current_liabilities'].iloc[0] not in (0, None):
-                df['current_assets'] = df['current_ratio'] * df['current_liabilities']
-            elif 'current_ratio' in df.columns:
-                df['current_assets'] = ar * 0.2 * float(df['current_ratio'].fillna(1).iloc[0])
-            else:
-                df['current_assets'] = ar * 0.2
-
-        # current_liabilities
-        if 'current_liabilities' not in df.columns:
-            if 'current_ratio' in df.columns and df['current_ratio'].iloc[0] not in (0, None):
-                df['current_liabilities'] = df['current_assets'] / df['current_ratio']
-            else:
-                df['current_liabilities'] = max(1.0, ar * 0.1)
-
-        # total_assets
-        if 'total_assets' not in df.columns:
-            df['total_assets'] = ar * 1.2 if ar > 0 else 0.0
-
-        # total_liabilities
-        if 'total_liabilities' not in df.columns:
-            # try to infer from debt_equity_ratio if available
-            if 'debt_equity_ratio' in df.columns and df['debt_equity_ratio'].iloc[0] not in (0, None):
-                de = float(df['debt_equity_ratio'].fillna(0).iloc[0])
-                # use scalar values to avoid Series boolean ambiguity
-                total_assets_val = float(df['total_assets'].iloc[0]) if 'total_assets' in df.columns else float(ar * 1.2)
-                if 'total_liabilities' in df.columns:
-                    total_liabilities_val = float(df['total_liabilities'].iloc[0])
-                    equity = total_assets_val - total_liabilities_val
-                else:
-                    equity = total_assets_val * 0.7
-                df['total_liabilities'] = de * (equity if equity > 0 else total_assets_val * 0.5)
-            else:
-                df['total_liabilities'] = df['total_assets'] * 0.3
-
-        # inventory (optional)
-        if 'inventory' not in df.columns:
-            df['inventory'] = ar * 0.05
-
-        # Ensure numeric types
-        numeric_cols = ['annual_revenue', 'total_expenses', 'current_assets', 'current_liabilities', 'total_assets', 'total_liabilities', 'inventory']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-
-        return df
+        return get_storage().get_row(business_id)
     except Exception as e:
         print(f"Error loading business data: {str(e)}")
         return None
@@ -138,6 +100,56 @@ def load_data_from_file(file_path):
     else:
         return None, f"Unsupported file format: {file_ext}"
 
+def _tag_upload_chunk(df, start, id_prefix, source):
+    """Add the columns load_csv_data/load_xlsx_data add, for rows numbered from start"""
+    if 'business_id' not in df.columns:
+        df['business_id'] = [f"{id_prefix}_{i}" for i in range(start, start + len(df))]
+    df['upload_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    df['source'] = source
+    return df
+
+def iter_file_chunks(file_path, chunk_size=CHUNK_SIZE, skip_rows=0):
+    """Yield (start_row, DataFrame) blocks of an uploaded file.
+
+    CSV files are read incrementally, so memory stays bounded by
+    chunk_size whatever the file size; Excel workbooks are loaded whole and
+    then sliced. skip_rows resumes after rows that were already processed.
+    """
+    if not os.path.exists(file_path):
+        raise ValueError("File not found")
+
+    file_ext = Path(file_path).suffix.lower().strip('.')
+
+    if file_ext == 'csv':
+        reader = pd.read_csv(file_path, chunksize=chunk_size, skiprows=range(1, skip_rows + 1))
+        start = skip_rows
+        for chunk in reader:
+            chunk = chunk.reset_index(drop=True)
+            yield start, _tag_upload_chunk(chunk, start, 'CSV', 'CSV Upload')
+            start += len(chunk)
+    elif file_ext in ['xlsx', 'xls']:
+        df = pd.read_excel(file_path)
+        for start in range(skip_rows, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size].reset_index(drop=True)
+            yield start, _tag_upload_chunk(chunk, start, 'XLSX', 'Excel Upload')
+    elif file_ext == 'pdf':
+        raise ValueError("PDF extraction requires manual review - please export as CSV/XLSX")
+    else:
+        raise ValueError(f"Unsupported file format: {file_ext}")
+
+def estimate_row_count(file_path):
+    """Approximate number of data rows, counting line breaks for CSV files"""
+    if Path(file_path).suffix.lower() != '.csv':
+        return None
+    lines = 0
+    last = b'\n'
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    # header line, plus a final row without a trailing newline
+    return max(lines - 1 + (last != b'\n'), 0)
+
 def normalize_financial_data(df):
     """Normalize and clean financial data"""
     # Fill missing values
@@ -154,9 +166,9 @@ def normalize_financial_data(df):
 
 def get_all_businesses():
     """Get list of all businesses in dataset"""
+    from business_storage import get_storage
     try:
-        df = pd.read_csv(CSV_PATH)
-        return df[['business_id', 'industry_type', 'annual_revenue', 'financial_health_score']].to_dict('records')
+        return get_storage().all_records(['business_id', 'industry_type', 'annual_revenue', 'financial_health_score'])
     except Exception as e:
         print(f"Error getting businesses: {str(e)}")
         return []
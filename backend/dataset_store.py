@@ -0,0 +1,221 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from snapshot_cache import read_snapshot, write_snapshot
+from shared_dataset import SharedDataset
+
+# Columns analysis expects on every business row
+NUMERIC_COLUMNS = ['annual_revenue', 'total_expenses', 'current_assets', 'current_liabilities', 'total_assets', 'total_liabilities', 'inventory']
+
+def prepare_business_frame(df):
+    """Derive missing balance-sheet columns for every row at once.
+
+    Mirrors the per-row defaults load_business_data used to apply after
+    filtering, so a single row taken from the prepared frame is identical
+    to what the old per-request parse produced.
+    """
+    df = df.copy()
+    df['business_id'] = df['business_id'].astype(str).str.strip()
+
+    ar = df['annual_revenue'].fillna(0).astype(float) if 'annual_revenue' in df.columns else pd.Series(0.0, index=df.index)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # current_assets
+        if 'current_assets' not in df.columns:
+            if 'current_ratio' in df.columns and 'current_liabilities' in df.columns:
+                has_cl = df['current_liabilities'] != 0
+                df['current_assets'] = np.where(has_cl, df['current_ratio'] * df['current_liabilities'], ar * 0.2 * df['current_ratio'].fillna(1))
+            elif 'current_ratio' in df.columns:
+                df['current_assets'] = ar * 0.2 * df['current_ratio'].fillna(1)
+            else:
+                df['current_assets'] = ar * 0.2
+
+        # current_liabilities
+        if 'current_liabilities' not in df.columns:
+            if 'current_ratio' in df.columns:
+                # NaN ratios fall through to the division, as the scalar check did
+                has_cr = df['current_ratio'] != 0
+                df['current_liabilities'] = np.where(has_cr, df['current_assets'] / df['current_ratio'], np.maximum(1.0, ar * 0.1))
+            else:
+                df['current_liabilities'] = np.maximum(1.0, ar * 0.1)
+
+        # total_assets
+        if 'total_assets' not in df.columns:
+            df['total_assets'] = np.where(ar > 0, ar * 1.2, 0.0)
+
+        # total_liabilities
+        if 'total_liabilities' not in df.columns:
+            if 'debt_equity_ratio' in df.columns:
+                # infer from debt_equity_ratio, assuming 70% of assets is equity
+                equity = df['total_assets'].astype(float) * 0.7
+                equity = np.where(equity > 0, equity, df['total_assets'] * 0.5)
+                has_de = df['debt_equity_ratio'] != 0
+                df['total_liabilities'] = np.where(has_de, df['debt_equity_ratio'].fillna(0) * equity, df['total_assets'] * 0.3)
+            else:
+                df['total_liabilities'] = df['total_assets'] * 0.3
+
+    # inventory (optional)
+    if 'inventory' not in df.columns:
+        df['inventory'] = ar * 0.05
+
+    # Ensure numeric types
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+
+    return df
+
+def _with_object_columns(df):
+    """Turn the Categorical text columns of a shared frame slice back into plain strings"""
+    for name in df.columns:
+        if isinstance(df[name].dtype, pd.CategoricalDtype):
+            df[name] = df[name].astype(object)
+    return df
+
+def _file_token(state):
+    """Token for the file a (signature, frame, index, version) state was loaded from"""
+    mtime_ns, size = state[0]
+    return f"{mtime_ns:x}-{size:x}"
+
+class DatasetStore:
+    """Process-wide, indexed copy of the SME dataset.
+
+    The CSV is parsed once and kept in memory together with a
+    business_id -> row position map. Every access compares the file's
+    mtime and size with the loaded copy and reloads when either changed.
+    With use_snapshot, parsed columns are also cached on disk as .npy
+    files so later processes skip CSV tokenizing until the file changes.
+
+    With shared, the prepared frame is published to shared memory by
+    whichever process loads a new version first and every other process
+    attaches to it (see shared_dataset.py); the version is then the shared
+    generation, identical in all processes.
+    """
+
+    def __init__(self, path, use_snapshot=True, shared=False):
+        self.path = path
+        self.use_snapshot = use_snapshot
+        self.shared = SharedDataset(path) if shared else None
+        self._lock = threading.Lock()
+        # (signature, frame, index, version) swapped as a whole on reload
+        self._state = (None, None, {}, 0)
+        # (version, per-row content hashes) computed on first ETag lookup
+        self._row_hashes = (None, None)
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read_frame(self, signature):
+        if self.use_snapshot:
+            df = read_snapshot(self.path, signature)
+            if df is not None:
+                return df
+
+        # Read with python engine and explicit separator to be resilient to odd line breaks
+        df = pd.read_csv(self.path, sep=',', engine='python', skipinitialspace=True)
+        if self.use_snapshot:
+            write_snapshot(df, self.path, signature)
+        return df
+
+    def _load(self, signature, force=False):
+        if self.shared is not None:
+            version, signature, df, index = self.shared.load(
+                signature, lambda: prepare_business_frame(self._read_frame(signature)), force=force)
+            self._state = (signature, df, index, version)
+            return
+
+        df = prepare_business_frame(self._read_frame(signature))
+        index = {}
+        for pos, business_id in enumerate(df['business_id'].tolist()):
+            # keep the first occurrence, as the old filter + iloc[0] did
+            index.setdefault(business_id, pos)
+        version = self._state[3] + 1
+        self._state = (signature, df, index, version)
+
+    def _current(self):
+        signature = self._file_signature()
+        state = self._state
+        if state[0] != signature or (self.shared is not None and self.shared.generation() != state[3]):
+            with self._lock:
+                if self._state[0] != signature or (self.shared is not None and self.shared.generation() != self._state[3]):
+                    self._load(signature)
+                state = self._state
+        return state
+
+    def reload(self):
+        """Force a reload from disk"""
+        with self._lock:
+            self._load(self._file_signature(), force=True)
+
+    def release_shared_memory(self):
+        """Unlink the shared segments (call once, when the last process shuts down)"""
+        if self.shared is not None:
+            self.shared.release()
+
+    @property
+    def version(self):
+        """Monotonic counter bumped on every reload (shared generation in shared mode)"""
+        return self._current()[3]
+
+    @property
+    def token(self):
+        """Content token for the loaded file, identical across processes and restarts"""
+        return _file_token(self._current())
+
+    def _hashes(self, state):
+        version, hashes = self._row_hashes
+        if version != state[3]:
+            hashes = pd.util.hash_pandas_object(state[1], index=False).to_numpy()
+            self._row_hashes = (state[3], hashes)
+        return hashes
+
+    def row_token(self, business_id):
+        """Token for one row's content in the loaded file, or None if absent"""
+        state = self._current()
+        pos = state[2].get(str(business_id).strip())
+        if pos is None:
+            return None
+        return f"{_file_token(state)}-{int(self._hashes(state)[pos]):016x}"
+
+    def get_frame(self):
+        """Return the full prepared dataset (treat as read-only)"""
+        return self._current()[1]
+
+    def get_versioned_frame(self):
+        """Return (version, frame) from the same load"""
+        state = self._current()
+        return state[3], state[1]
+
+    def get_tokened_frame(self):
+        """Return (version, token, frame) from the same load"""
+        state = self._current()
+        return state[3], _file_token(state), state[1]
+
+    def get_row(self, business_id):
+        """Return a single-row DataFrame for business_id, or None"""
+        _, df, index, _ = self._current()
+        pos = index.get(str(business_id).strip())
+        if pos is None:
+            return None
+        row = df.iloc[[pos]].copy()
+        return row if self.shared is None else _with_object_columns(row)
+
+    def get_rows(self, business_ids):
+        """Return (frame, found) for many IDs in one lookup.
+
+        frame holds the rows that exist, in request order; found is a
+        parallel list of booleans for business_ids.
+        """
+        _, df, index, _ = self._current()
+        positions = [index.get(str(business_id).strip()) for business_id in business_ids]
+        found = [pos is not None for pos in positions]
+        rows = df.iloc[[pos for pos in positions if pos is not None]].copy()
+        return (rows if self.shared is None else _with_object_columns(rows)), found
+
+    def __contains__(self, business_id):
+        return str(business_id).strip() in self._current()[2]
+
+    def __len__(self):
+        return len(self._current()[2])
@@ -0,0 +1,47 @@
+# Gunicorn settings for the production serving mode: gunicorn -c gunicorn.conf.py wsgi:app
+# Every value can be overridden through the environment.
+import gc
+import os
+
+# Workers attach to one shared-memory copy of the dataset instead of loading their own
+os.environ.setdefault('SHARED_DATASET', '1')
+
+bind = f"{os.environ.get('API_HOST', '0.0.0.0')}:{os.environ.get('API_PORT', '5000')}"
+
+# Analysis and PDF rendering are CPU bound, so scale with processes; threads cover I/O waits
+workers = int(os.environ.get('GUNICORN_WORKERS', os.cpu_count() or 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+# Load the app (dataset, indexes, imports) in the master and fork workers from it
+preload_app = True
+
+# Recycle workers after this many requests (jitter staggers the restarts)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Bulk PDF and synchronous uploads can take a while
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+# Time given to in-flight requests on restart/shutdown before workers are killed
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
+
+def pre_fork(server, worker):
+    # Move preloaded objects out of the collector's reach so GC passes in
+    # workers don't write to (and un-share) the parent's pages
+    gc.freeze()
+
+def on_exit(server):
+    # Unlink the shared dataset segments once the master is done
+    from data_loader import get_dataset_store
+    get_dataset_store().release_shared_memory()
+
+def post_fork(server, worker):
+    # Every worker renews the leases of its upload jobs and takes over jobs
+    # whose lease ran out: those of recycled, killed or previous workers
+    from upload_jobs import start_job_monitor
+    start_job_monitor()
@@ -0,0 +1,95 @@
+from data_loader import iter_file_chunks, normalize_financial_data, validate_financial_data, CHUNK_SIZE
+from analysis import perform_analysis, perform_analysis_frame
+from recommendation import generate_recommendation, generate_recommendation_frame
+from upload_registry import record_uploaded_businesses
+from peer_percentiles import attach_peer_percentiles
+from cohort_stats import record_uploaded_cohorts
+from business_storage import get_storage
+
+class IngestionError(ValueError):
+    """Raised when an uploaded block fails validation"""
+
+def analyze_chunk(chunk, start):
+    """Analyze a block of rows into (row_index, status, payload) results.
+
+    Falls back to row-by-row analysis when the vectorized pass fails, so a
+    single bad row is reported as failed instead of failing the block.
+    """
+    try:
+        analyses = perform_analysis_frame(chunk)
+        all_recommendations = generate_recommendation_frame(chunk, analyses)
+        return [
+            (start + pos, 'success', {
+                'business_id': analysis['business_id'],
+                'analysis': analysis,
+                'recommendations': recommendations
+            })
+            for pos, (analysis, recommendations) in enumerate(zip(analyses, all_recommendations))
+        ]
+    except Exception:
+        results = []
+        for pos in range(len(chunk)):
+            row_df = chunk.iloc[[pos]]
+            try:
+                analysis = perform_analysis(row_df)
+                recommendations = generate_recommendation(row_df, analysis)
+                results.append((start + pos, 'success', {
+                    'business_id': analysis['business_id'],
+                    'analysis': analysis,
+                    'recommendations': recommendations
+                }))
+            except Exception as e:
+                results.append((start + pos, 'failed', {
+                    'business_id': str(row_df['business_id'].iloc[0]) if 'business_id' in row_df.columns else None,
+                    'status': 'failed',
+                    'error': str(e)
+                }))
+        return results
+
+def _validated_chunks(file_path, chunk_size, skip_rows):
+    """Normalized blocks of the file, raising IngestionError at the first invalid one"""
+    for start, chunk in iter_file_chunks(file_path, chunk_size, skip_rows):
+        chunk = normalize_financial_data(chunk)
+        is_valid, validation_msg = validate_financial_data(chunk)
+        if not is_valid:
+            raise IngestionError(f"{validation_msg} (rows {start + 1}-{start + len(chunk)})")
+        yield start, chunk
+
+def validate_file(file_path, chunk_size=CHUNK_SIZE, skip_rows=0):
+    """Normalize and validate every block without analyzing or storing anything"""
+    for _ in _validated_chunks(file_path, chunk_size, skip_rows):
+        pass
+
+def ingest_file(file_path, sink, chunk_size=CHUNK_SIZE, skip_rows=0, job_id=None):
+    """Stream an uploaded file through normalize, validate and analyze, block by block.
+
+    The whole file is validated in a first streaming pass, so a file with
+    an invalid block anywhere fails before any block reaches the sink,
+    storage or the upload aggregates. Each block's results are then handed
+    to sink.write_chunk(results) before the next block is read, so peak
+    memory depends on chunk_size only.
+
+    With a job_id, each block is keyed by (job_id, start_row, end_row) in
+    storage and the upload aggregates, which skip a block they already
+    applied. The sink is written last, so a job resumed after a crash
+    re-reads at most the block it was on and never counts it twice.
+    Returns (rows_done, rows_failed) for the rows processed in this call.
+    """
+    validate_file(file_path, chunk_size, skip_rows)
+
+    rows_done = rows_failed = 0
+    for start, chunk in _validated_chunks(file_path, chunk_size, skip_rows):
+        results = analyze_chunk(chunk, start)
+        failed = sum(1 for _, status, _ in results if status == 'failed')
+        rows_done += len(results) - failed
+        rows_failed += failed
+        analyses = [payload['analysis'] if status == 'success' else None for _, status, payload in results]
+        batch = (job_id, start, start + len(chunk)) if job_id is not None else None
+        # the block counts among its own peers, as dataset rows do
+        record_uploaded_businesses(chunk, analyses, batch)
+        attach_peer_percentiles(analyses)
+        get_storage().add_businesses(chunk, batch)
+        record_uploaded_cohorts(analyses, batch)
+        sink.write_chunk(results)
+
+    return rows_done, rows_failed
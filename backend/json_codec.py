@@ -0,0 +1,67 @@
+import json
+import os
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+from metrics import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 'auto' uses orjson when installed; 'stdlib' forces the json module
+JSON_ENCODER = os.environ.get('JSON_ENCODER', 'auto').lower()
+USE_ORJSON = orjson is not None and JSON_ENCODER != 'stdlib'
+
+def _default(obj):
+    """Fallback for values neither encoder handles natively"""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    try:
+        return DefaultJSONProvider.default(obj)
+    except TypeError:
+        return str(obj)
+
+if USE_ORJSON:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+@timed('json_encode')
+def dumps_bytes(obj, sort_keys=True, indent=False):
+    """Serialize obj to UTF-8 JSON bytes with the configured encoder"""
+    if USE_ORJSON:
+        options = _ORJSON_OPTIONS
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=options)
+    separators = None if indent else (',', ':')
+    return json.dumps(obj, default=_default, sort_keys=sort_keys, indent=2 if indent else None,
+                      separators=separators, ensure_ascii=False).encode('utf-8')
+
+def dumps(obj, sort_keys=True):
+    """Serialize obj to a JSON string"""
+    return dumps_bytes(obj, sort_keys=sort_keys).decode('utf-8')
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by dumps_bytes, so jsonify accepts NumPy values"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj, sort_keys=self.sort_keys, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if USE_ORJSON:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = dumps_bytes(obj, sort_keys=self.sort_keys, indent=indent) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,203 @@
+import threading
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter
+
+# Latency histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = 'fha'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by label values.
+
+    Each thread records into its own shard, so observe() takes no lock;
+    shards are merged when the metrics are rendered and folded into a
+    retired total once their thread has exited.
+    """
+
+    # Sweep shards of exited threads after this many new shards
+    SWEEP_INTERVAL = 64
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._new_shards = 0
+        self._lock = threading.Lock()
+
+    def _new_series(self):
+        # bucket counts (last one is +Inf), sum, count
+        return [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+    def _register_shard(self):
+        shard = {}
+        self._local.shard = shard
+        with self._lock:
+            self._shards.append((threading.current_thread(), shard))
+            self._new_shards += 1
+            if self._new_shards >= self.SWEEP_INTERVAL:
+                self._sweep()
+        return shard
+
+    def _sweep(self):
+        """Fold shards of exited threads into the retired totals (lock held)"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._fold(self._retired, shard)
+        self._shards = live
+        self._new_shards = 0
+
+    def _fold(self, target, shard):
+        for labels, (counts, total, count) in list(shard.items()):
+            series = target.get(labels)
+            if series is None:
+                series = target[labels] = self._new_series()
+            series[0] = [a + b for a, b in zip(series[0], counts)]
+            series[1] += total
+            series[2] += count
+
+    def observe(self, labels, value):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._register_shard()
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = self._new_series()
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        snapshot = {}
+        with self._lock:
+            self._sweep()
+            self._fold(snapshot, self._retired)
+            for _, shard in self._shards:
+                self._fold(snapshot, shard)
+        for labels, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                bucket_label = 'le="' + le + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, bucket_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for labels, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+def render_gauges(name, help_text, value, metric_type='gauge'):
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}", f"{name} {value}"]
+
+stage_duration = Histogram(f'{METRIC_PREFIX}_stage_duration_seconds', 'Time spent in each pipeline stage', ('stage',))
+request_duration = Histogram(f'{METRIC_PREFIX}_request_duration_seconds', 'Request handling time by endpoint', ('endpoint',))
+requests_total = Counter(f'{METRIC_PREFIX}_requests_total', 'Requests by endpoint, method and status', ('endpoint', 'method', 'status'))
+
+# Stage -> Server-Timing metric name for the per-request breakdown
+SERVER_TIMING_NAMES = {
+    'load_business_data': 'load',
+    'perform_analysis': 'analyze',
+    'perform_analysis_frame': 'analyze',
+    'generate_recommendation': 'recommend',
+    'generate_recommendation_frame': 'recommend',
+    'translate_analysis': 'translate',
+    'render_pdf': 'render',
+    'render_excel': 'render',
+    'render_json_report': 'render',
+    'json_encode': 'serialize'
+}
+
+# Per-thread accumulator of Server-Timing durations for the current request
+_request_local = threading.local()
+
+def begin_request_timings():
+    _request_local.timings = {}
+
+def end_request_timings():
+    """Return and clear the current request's {name: seconds} breakdown"""
+    timings = getattr(_request_local, 'timings', None)
+    _request_local.timings = None
+    return timings or {}
+
+def timed(stage):
+    """Decorator recording every call of the function under a stage label"""
+    labels = (stage,)
+    timing_name = SERVER_TIMING_NAMES.get(stage)
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                stage_duration.observe(labels, elapsed)
+                timings = getattr(_request_local, 'timings', None) if timing_name else None
+                if timings is not None:
+                    timings[timing_name] = timings.get(timing_name, 0.0) + elapsed
+        return wrapper
+    return decorator
+
+def format_server_timing(timings, total=None):
+    """Server-Timing header value with durations in milliseconds"""
+    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.2f}")
+    return ', '.join(entries)
+
+def record_request(endpoint, method, status, elapsed):
+    requests_total.inc((endpoint, method, str(status)))
+    request_duration.observe((endpoint,), elapsed)
+
+def render_metrics(cache_stats=None):
+    """All metrics in Prometheus text exposition format"""
+    lines = stage_duration.render() + request_duration.render() + requests_total.render()
+    if cache_stats is not None:
+        prefix = f'{METRIC_PREFIX}_analysis_cache'
+        lines += render_gauges(f'{prefix}_hits_total', 'Analysis cache hits', cache_stats['hits'], 'counter')
+        lines += render_gauges(f'{prefix}_misses_total', 'Analysis cache misses', cache_stats['misses'], 'counter')
+        lines += render_gauges(f'{prefix}_evictions_total', 'Analysis cache evictions', cache_stats['evictions'], 'counter')
+        lines += render_gauges(f'{prefix}_hit_ratio', 'Analysis cache hit ratio', cache_stats['hit_ratio'])
+        lines += render_gauges(f'{prefix}_entries', 'Analysis cache entries', cache_stats['entries'])
+        lines += render_gauges(f'{prefix}_bytes', 'Approximate analysis cache size in bytes', cache_stats['bytes'])
+    return '\n'.join(lines) + '\n'
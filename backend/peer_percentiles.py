@@ -0,0 +1,145 @@
+import threading
+from collections import defaultdict
+import numpy as np
+
+from portfolio_query import get_ratio_table
+from upload_registry import upload_registry, UPLOADED_RATIOS
+
+# Ratio -> analysis section it is reported in; uploads keep the same ratios
+PEER_RATIOS = UPLOADED_RATIOS
+
+def _sorted_finite(values):
+    values = np.asarray(values, dtype=float)
+    return np.sort(values[~np.isnan(values)])
+
+def percentile_ranks(arrays, values):
+    """Mid-rank percentiles (0-100) of values among their peers.
+
+    values is a (ratios, businesses) matrix in PEER_RATIOS order and
+    arrays maps each ratio to the sorted arrays holding its peer values.
+    Peers below count fully and peers with an equal value count half, so
+    a value shared by everyone sits at 50. NaN where a ratio has no peers.
+    """
+    # one searchsorted per (ratio, array, side); the sums are vectorized
+    counts = np.array([
+        [array.searchsorted(values[i], side) for array in arrays[ratio] for side in ('left', 'right')]
+        for i, ratio in enumerate(PEER_RATIOS)
+    ])
+    totals = np.array([sum(len(array) for array in arrays[ratio]) for ratio in PEER_RATIOS])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ranks = counts.sum(axis=1) * (50.0 / totals[:, None])
+    ranks[np.isnan(values)] = np.nan
+    return ranks
+
+def _remove_sorted(array, values):
+    """array without one occurrence of each sorted value, or None if one is missing"""
+    # equal values sit side by side; the k-th copy of a value is at its first position + k
+    positions = array.searchsorted(values) + (np.arange(len(values)) - values.searchsorted(values))
+    if len(positions) and (positions[-1] >= len(array) or not np.array_equal(array[positions], values)):
+        return None
+    return np.delete(array, positions)
+
+class PeerIndex:
+    """Sorted ratio values per industry, for peer percentiles in O(log n).
+
+    Dataset values come from the portfolio ratio table and are sorted once
+    per dataset version and industry, on first use. Uploaded businesses
+    come from the shared upload registry (one row per business_id, latest
+    upload wins) into separate sorted arrays per industry, built on first
+    use and then kept up to date with the registry's changes: values of
+    replaced rows are deleted and new ones merged in with
+    np.searchsorted/np.insert. A lookup searches both arrays.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._version = None
+        self._dataset = {}
+        self._uploaded_token = None
+        # industry -> (count, {ratio: sorted array})
+        self._uploaded = {}
+
+    def _sync_uploaded(self):
+        """Bring the uploaded arrays up to the registry's state. Call with _lock held."""
+        token, frame, changes = self.registry.changes(self._uploaded_token)
+        if token == self._uploaded_token:
+            return frame
+        self._uploaded_token = token
+        if changes is None:
+            self._uploaded = {}
+            return frame
+        for replaced, added in changes:
+            for industry in list(self._uploaded):
+                count, arrays = self._uploaded[industry]
+                old = replaced[replaced['industry_type'].to_numpy() == industry]
+                new = added[added['industry_type'].to_numpy() == industry]
+                if not len(old) and not len(new):
+                    continue
+                updated = {}
+                for ratio, array in arrays.items():
+                    # new arrays, so lookups holding the old ones stay consistent
+                    array = _remove_sorted(array, _sorted_finite(old[ratio].to_numpy(dtype=float, na_value=np.nan)))
+                    if array is None:
+                        break
+                    values = _sorted_finite(new[ratio].to_numpy(dtype=float, na_value=np.nan))
+                    updated[ratio] = np.insert(array, array.searchsorted(values), values)
+                if len(updated) == len(arrays):
+                    self._uploaded[industry] = (count - len(old) + len(new), updated)
+                else:
+                    # out of step with the registry; rebuilt from the frame on next use
+                    del self._uploaded[industry]
+        return frame
+
+    def _peers(self, industry):
+        """(count, {ratio: [sorted arrays]}) for one industry"""
+        table = get_ratio_table()
+        with self._lock:
+            if self._version != table.version:
+                self._version = table.version
+                self._dataset = {}
+            dataset = self._dataset.get(industry)
+            if dataset is None:
+                codes, _, lookup = table.text['industry_type']
+                code = lookup.get(industry)
+                rows = np.flatnonzero(codes == code) if code is not None else np.array([], dtype=np.int64)
+                dataset = (len(rows), {ratio: _sorted_finite(table.numeric[ratio][rows]) for ratio in PEER_RATIOS})
+                self._dataset[industry] = dataset
+            frame = self._sync_uploaded()
+            uploaded = self._uploaded.get(industry)
+            if uploaded is None:
+                rows = frame['industry_type'].to_numpy() == industry
+                uploaded = (int(rows.sum()), {
+                    ratio: _sorted_finite(frame[ratio].to_numpy(dtype=float, na_value=np.nan)[rows])
+                    for ratio in PEER_RATIOS
+                })
+                self._uploaded[industry] = uploaded
+
+        # always two arrays per ratio, so percentile_ranks sees a regular shape
+        return dataset[0] + uploaded[0], {ratio: (array, uploaded[1][ratio]) for ratio, array in dataset[1].items()}
+
+    def attach(self, analyses):
+        """Add a peer_percentiles section to each analysis dict (in place)"""
+        by_industry = defaultdict(list)
+        for analysis in analyses:
+            if analysis is not None:
+                by_industry[analysis.get('industry_type')].append(analysis)
+
+        for industry, group in by_industry.items():
+            count, arrays = self._peers(industry)
+            values = np.array([[a[section].get(ratio) for a in group] for ratio, section in PEER_RATIOS.items()],
+                              dtype=float)
+            ranks = percentile_ranks(arrays, values).T.tolist()
+            for analysis, row in zip(group, ranks):
+                analysis['peer_percentiles'] = {
+                    'industry': industry,
+                    'peer_count': count,
+                    # NaN (no value or no peers) != itself
+                    'ratios': {ratio: round(rank, 1) if rank == rank else None for ratio, rank in zip(PEER_RATIOS, row)}
+                }
+
+peer_index = PeerIndex(upload_registry)
+
+def attach_peer_percentiles(analyses):
+    """Add industry peer percentiles to analyses (dicts from perform_analysis*)"""
+    peer_index.attach(analyses)
@@ -0,0 +1,187 @@
+import threading
+import numpy as np
+import pandas as pd
+
+from data_loader import get_dataset_store
+from analysis import calculate_ratio_columns, score_creditworthiness
+from business_index import InvalidQuery, encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+# filter=<field>:<op>:<value>; 'in' takes values separated by '|'
+NUMERIC_OPERATORS = {'eq', 'ne', 'lt', 'lte', 'gt', 'gte', 'in'}
+TEXT_OPERATORS = {'eq', 'ne', 'in'}
+# perform_analysis outputs stored next to the ratios (financial_health.health_score / risk_category)
+HEALTH_SCORE_FIELD = 'health_score'
+ASSESSED_RISK_FIELD = 'assessed_risk_category'
+# Cursor 'sort' slot for portfolio queries, so /api/businesses cursors are rejected here
+CURSOR_SCOPE = 'portfolio'
+
+class RatioTable:
+    """Raw dataset columns plus every ratio perform_analysis computes, one array per field.
+
+    Built once per dataset version with the vectorized analysis, so a query
+    is one comparison per filter over contiguous arrays and no business is
+    analyzed at request time. Computed ratios take precedence over raw
+    columns of the same name (they are the values perform_analysis reports).
+    """
+
+    def __init__(self, df, version):
+        self.version = version
+        self.size = len(df)
+        self.business_ids = df['business_id'].astype(str).to_numpy()
+        self.numeric = {}
+        # name -> (codes, distinct values, value -> code)
+        self.text = {}
+
+        for name in df.columns:
+            if name == 'business_id':
+                continue
+            series = df[name]
+            if series.dtype.kind in 'biuf':
+                self.numeric[name] = series.to_numpy()
+            else:
+                self._add_text(name, series)
+
+        ratios, _ = calculate_ratio_columns(df)
+        scores, risk_categories, _ = score_creditworthiness(ratios)
+        for name, values in ratios.items():
+            self.text.pop(name, None)
+            self.numeric[name] = values
+        self.numeric[HEALTH_SCORE_FIELD] = scores
+        self._add_text(ASSESSED_RISK_FIELD, pd.Series(risk_categories))
+
+    def _add_text(self, name, series):
+        codes, uniques = pd.factorize(series)
+        codes = codes.astype(np.int32)
+        uniques = np.asarray(uniques, dtype=object)
+        self.text[name] = (codes, uniques, {value: code for code, value in enumerate(uniques.tolist())})
+
+    @property
+    def fields(self):
+        return ['business_id'] + sorted(set(self.numeric) | set(self.text))
+
+    def _condition(self, field, op, value):
+        values = value.split('|') if op == 'in' else [value]
+        if field in self.numeric:
+            if op not in NUMERIC_OPERATORS:
+                raise InvalidQuery(f"Unknown operator for {field}: {op}")
+            try:
+                numbers = [float(v) for v in values]
+            except ValueError:
+                raise InvalidQuery(f"{field} needs a numeric value")
+            column = self.numeric[field]
+            with np.errstate(invalid='ignore'):
+                if op == 'in':
+                    # a few equality passes beat np.isin's sort for short value lists
+                    mask = column == numbers[0]
+                    for number in numbers[1:]:
+                        mask |= column == number
+                    return mask
+                return {
+                    'eq': np.equal, 'ne': np.not_equal, 'lt': np.less,
+                    'lte': np.less_equal, 'gt': np.greater, 'gte': np.greater_equal
+                }[op](column, numbers[0])
+
+        if field in self.text:
+            if op not in TEXT_OPERATORS:
+                raise InvalidQuery(f"{field} only supports {', '.join(sorted(TEXT_OPERATORS))}")
+            codes, uniques, lookup = self.text[field]
+            wanted = [lookup[v] for v in values if v in lookup]
+            if not wanted:
+                mask = np.zeros(self.size, dtype=bool)
+            elif len(wanted) <= 4:
+                mask = codes == wanted[0]
+                for code in wanted[1:]:
+                    mask |= codes == code
+            else:
+                # one gather through a per-value flag table; the extra last slot is code -1 (missing)
+                selected = np.zeros(len(uniques) + 1, dtype=bool)
+                selected[wanted] = True
+                mask = selected[codes]
+            return ~mask if op == 'ne' else mask
+
+        raise InvalidQuery(f"Unknown field: {field}")
+
+    def _values(self, field, rows):
+        if field == 'business_id':
+            return self.business_ids[rows].tolist()
+        if field in self.numeric:
+            return self.numeric[field][rows].tolist()
+        codes, uniques, _ = self.text[field]
+        # code -1 marks a missing value
+        return [uniques[code] if code >= 0 else None for code in codes[rows].tolist()]
+
+    def query(self, conditions, fields=None, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """Return (records, total_matches, next_cursor) for rows meeting every condition.
+
+        conditions is a list of (field, op, value) strings; records hold
+        business_id plus the filtered fields unless fields is given.
+        """
+        fields = fields or ['business_id'] + list(dict.fromkeys(field for field, _, _ in conditions))
+        for field in fields:
+            if field != 'business_id' and field not in self.numeric and field not in self.text:
+                raise InvalidQuery(f"Unknown field: {field}")
+
+        after = -1
+        if cursor:
+            version, scope, after = decode_cursor(cursor)
+            if version != self.version or scope != CURSOR_SCOPE:
+                raise InvalidQuery('Cursor expired; restart pagination')
+
+        mask = None
+        for field, op, value in conditions:
+            condition = self._condition(field, op, value)
+            if mask is None:
+                mask = condition
+            else:
+                mask &= condition
+
+        if mask is None:
+            total = self.size
+            rows = np.arange(after + 1, min(after + 1 + limit, self.size))
+            remaining = self.size - (after + 1) - len(rows)
+        else:
+            matching = np.flatnonzero(mask)
+            total = len(matching)
+            start = int(np.searchsorted(matching, after, side='right'))
+            rows = matching[start:start + limit]
+            remaining = total - start - len(rows)
+
+        values = {field: self._values(field, rows) for field in fields}
+        records = [dict(zip(fields, row)) for row in zip(*(values[field] for field in fields))]
+        next_cursor = encode_cursor(self.version, CURSOR_SCOPE, int(rows[-1])) if remaining > 0 else None
+        return records, total, next_cursor
+
+_table = None
+_table_lock = threading.Lock()
+
+def get_ratio_table():
+    """Ratio table for the current dataset version, rebuilt after a reload"""
+    global _table
+    version, df = get_dataset_store().get_versioned_frame()
+    with _table_lock:
+        if _table is None or _table.version != version:
+            _table = RatioTable(df, version)
+        return _table
+
+def parse_portfolio_query(args):
+    """Turn /api/portfolio/query parameters into RatioTable.query arguments"""
+    conditions = []
+    for spec in args.getlist('filter'):
+        parts = spec.split(':', 2)
+        if len(parts) != 3 or not parts[0]:
+            raise InvalidQuery(f"Malformed filter (expected field:op:value): {spec}")
+        conditions.append((parts[0].strip(), parts[1].strip().lower(), parts[2].strip()))
+
+    fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()] or None
+
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise InvalidQuery('limit must be an integer')
+
+    return {
+        'conditions': conditions,
+        'fields': fields,
+        'limit': min(max(limit, 1), MAX_PAGE_SIZE),
+        'cursor': args.get('cursor')
+    }
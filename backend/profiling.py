@@ -0,0 +1,114 @@
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import threading
+import tracemalloc
+from time import perf_counter
+
+# Profiling is disabled unless a token is configured; clients send it in X-Profile-Token
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_TOP_N = int(os.environ.get('PROFILE_TOP_N', 30))
+PROFILE_SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+# tracemalloc is process-wide, so only one request is profiled at a time
+_profile_lock = threading.Lock()
+
+class ProfileDenied(Exception):
+    """Raised when ?profile=1 is not allowed for this request"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+def is_authorized(token):
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(token or '', PROFILE_TOKEN)
+
+class RequestProfile:
+    """cProfile (and optionally tracemalloc) session around one request"""
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.profiler = cProfile.Profile()
+        self.start = None
+        self.active = False
+        self.elapsed = None
+        self.memory = None
+        self.response_bytes = None
+
+    def begin(self, token):
+        if not PROFILE_TOKEN:
+            raise ProfileDenied('Profiling is disabled (set PROFILE_TOKEN)', 403)
+        if not is_authorized(token):
+            raise ProfileDenied('Invalid or missing X-Profile-Token', 403)
+        if not _profile_lock.acquire(blocking=False):
+            raise ProfileDenied('Another request is being profiled; retry shortly', 429)
+
+        self.active = True
+        if self.trace_memory:
+            tracemalloc.start()
+        self.start = perf_counter()
+        self.profiler.enable()
+
+    def end(self, response):
+        """Stop profiling, consuming a streamed body first so its work is captured"""
+        if not self.active:
+            return
+        try:
+            response.direct_passthrough = False
+            self.response_bytes = len(response.get_data())
+            self.profiler.disable()
+            self.elapsed = perf_counter() - self.start
+            if self.trace_memory:
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.memory = {
+                    'peak_bytes': peak,
+                    'top_allocations': [
+                        {'location': str(stat.traceback), 'size_bytes': stat.size, 'count': stat.count}
+                        for stat in snapshot.statistics('lineno')[:PROFILE_TOP_N]
+                    ]
+                }
+        finally:
+            self.profiler.disable()
+            if self.trace_memory and tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self.active = False
+            _profile_lock.release()
+
+    def abort(self):
+        """Release the session if the request ended without a response hook"""
+        if not self.active:
+            return
+        self.profiler.disable()
+        if self.trace_memory:
+            tracemalloc.stop()
+        self.active = False
+        _profile_lock.release()
+
+    def hotspots(self, sort='cumulative', limit=PROFILE_TOP_N):
+        """Top functions from the profile as a list of dicts"""
+        stats = pstats.Stats(self.profiler, stream=io.StringIO())
+        stats.sort_stats(sort if sort in PROFILE_SORT_KEYS else 'cumulative')
+        results = []
+        for func in stats.fcn_list[:limit]:
+            primitive_calls, calls, total_time, cumulative_time, _ = stats.stats[func]
+            filename, line, name = func
+            results.append({
+                'function': name,
+                'file': filename,
+                'line': line,
+                'calls': calls,
+                'primitive_calls': primitive_calls,
+                'total_time': round(total_time, 6),
+                'cumulative_time': round(cumulative_time, 6)
+            })
+        return results
+
+    def dump(self):
+        """Profile in the binary format read by pstats/snakeviz"""
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
@@ -0,0 +1,178 @@
+import heapq
+import os
+import threading
+from itertools import islice
+import numpy as np
+import pandas as pd
+
+from portfolio_query import get_ratio_table, HEALTH_SCORE_FIELD
+from upload_registry import upload_registry
+
+# Largest N a ranking request may ask for; each ranking keeps this many candidates per industry
+RANKING_MAX_K = int(os.environ.get('RANKING_MAX_K', 100))
+RANKING_DEFAULT_K = 10
+
+# name -> (field, descending). Riskiest = lowest computed health score.
+RANKINGS = {
+    'riskiest': (HEALTH_SCORE_FIELD, False),
+    'healthiest': (HEALTH_SCORE_FIELD, True),
+    'largest_loan_exposure': ('loan_amount', True),
+    'worst_dscr': ('dscr', False),
+}
+RANKED_FIELDS = sorted({field for field, _ in RANKINGS.values()})
+
+class UnknownRanking(KeyError):
+    """Raised for a ranking name not in RANKINGS"""
+
+def select_top(keys, k, rows=None):
+    """Positions of the k smallest keys, ordered by (key, position).
+
+    rows restricts the selection to those positions. NaN keys are skipped.
+    np.argpartition finds the k-th key in linear time; only the rows at or
+    below it (ties included, so the order is deterministic) are sorted.
+    """
+    if rows is None:
+        rows = np.arange(len(keys))
+    values = keys[rows]
+    valid = ~np.isnan(values)
+    if not valid.all():
+        rows, values = rows[valid], values[valid]
+    if len(rows) > k:
+        kth = values[np.argpartition(values, k - 1)[k - 1]]
+        keep = values <= kth
+        rows, values = rows[keep], values[keep]
+    return rows[np.lexsort((rows, values))[:k]]
+
+def _sort_keys(values, descending):
+    keys = np.asarray(values, dtype=float)
+    return -keys if descending else keys
+
+class Rankings:
+    """Top-N businesses by score and ratio, overall and per industry.
+
+    For each dataset version the best RANKING_MAX_K rows of every
+    (ranking, industry) are selected from the ratio table's arrays with
+    np.argpartition on first use and cached. Uploaded businesses come
+    from the shared upload registry (one row per business_id, latest
+    upload wins) and rank only when the dataset does not have their ID, as
+    lookups return the dataset row. Their candidates are selected the same
+    way, then kept up to date from registry.changes(): rows added since
+    the last token are merged in, and a list is reselected only when a row
+    it holds was replaced. A request heap-merges both sorted candidate
+    lists, so no full sort and no per-business analysis happens at request
+    time.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._version = None
+        self._dataset_top = {}
+        self._industry_rows = {}
+        self._uploaded_token = None
+        self._uploaded_top = {}
+        # dataset IDs uploaded candidates are checked against, and the table version they are from
+        self._dataset_ids = pd.Index([])
+        self._dataset_ids_version = None
+
+    def _dataset_candidates(self, table, name, industry):
+        """Cached (key, 0, row) list of the best dataset rows"""
+        with self._lock:
+            if self._version != table.version:
+                self._version = table.version
+                self._dataset_top = {}
+                self._industry_rows = {}
+            cached = self._dataset_top.get((name, industry))
+            if cached is not None:
+                return cached
+
+            field, descending = RANKINGS[name]
+            keys = _sort_keys(table.numeric[field], descending)
+            rows = None
+            if industry is not None:
+                rows = self._industry_rows.get(industry)
+                if rows is None:
+                    codes, _, lookup = table.text['industry_type']
+                    code = lookup.get(industry)
+                    rows = np.flatnonzero(codes == code) if code is not None else np.array([], dtype=np.int64)
+                    self._industry_rows[industry] = rows
+            top = select_top(keys, RANKING_MAX_K, rows)
+            cached = [(key, 0, row) for key, row in zip(keys[top].tolist(), top.tolist())]
+            self._dataset_top[(name, industry)] = cached
+            return cached
+
+    def _select_uploaded(self, frame, name, industry):
+        """Sorted (key, 1, business_id, industry_type) list of the best rows of frame"""
+        field, descending = RANKINGS[name]
+        keys = _sort_keys(frame[field].to_numpy(dtype=float, na_value=np.nan), descending)
+        eligible = ~frame['business_id'].isin(self._dataset_ids).to_numpy()
+        if industry is not None:
+            eligible &= frame['industry_type'].to_numpy() == industry
+        top = select_top(keys, RANKING_MAX_K, np.flatnonzero(eligible))
+        return sorted(zip(keys[top].tolist(), [1] * len(top), frame['business_id'].to_numpy()[top].tolist(),
+                          frame['industry_type'].to_numpy()[top].tolist()))
+
+    def _apply_changes(self, changes):
+        """Bring the cached uploaded candidates up to date. Call with _lock held."""
+        for replaced, added in changes:
+            if len(replaced):
+                # a list that loses a row may now miss one it did not keep: reselect it on next use
+                gone = set(replaced['business_id'])
+                for key in [key for key, top in self._uploaded_top.items() if any(c[2] in gone for c in top)]:
+                    del self._uploaded_top[key]
+            if len(added):
+                for (name, industry), top in self._uploaded_top.items():
+                    self._uploaded_top[(name, industry)] = sorted(
+                        top + self._select_uploaded(added, name, industry))[:RANKING_MAX_K]
+
+    def _uploaded_candidates(self, table, name, industry):
+        """Cached (key, 1, business_id, industry_type) list of the best uploaded rows"""
+        with self._lock:
+            # under _lock, so two requests never apply the same changes twice
+            token, frame, changes = self.registry.changes(self._uploaded_token)
+            if self._dataset_ids_version != table.version:
+                self._dataset_ids = pd.Index(table.business_ids)
+                self._dataset_ids_version = table.version
+                changes = None
+            if changes is None:
+                self._uploaded_top = {}
+            else:
+                self._apply_changes(changes)
+            self._uploaded_token = token
+
+            cached = self._uploaded_top.get((name, industry))
+            if cached is None:
+                cached = self._uploaded_top[(name, industry)] = self._select_uploaded(frame, name, industry)
+            return cached
+
+    def top(self, name, k=RANKING_DEFAULT_K, industry=None):
+        """The k best businesses for ranking name, optionally within one industry"""
+        if name not in RANKINGS:
+            raise UnknownRanking(name)
+        k = min(max(int(k), 1), RANKING_MAX_K)
+        field, descending = RANKINGS[name]
+        table = get_ratio_table()
+        merged = heapq.merge(self._dataset_candidates(table, name, industry),
+                             self._uploaded_candidates(table, name, industry))
+
+        industries = table.text['industry_type']
+        results = []
+        for rank, (key, source, *entry) in enumerate(islice(merged, k), start=1):
+            value = -key if descending else key
+            if source == 0:
+                row = entry[0]
+                business_id = str(table.business_ids[row])
+                code = industries[0][row]
+                industry_type = industries[1][code] if code >= 0 else None
+            else:
+                business_id, industry_type = entry
+            results.append({
+                'rank': rank,
+                'business_id': business_id,
+                'industry_type': industry_type,
+                field: int(value) if field == HEALTH_SCORE_FIELD else value,
+                'uploaded': source == 1
+            })
+        return results
+
+rankings = Rankings(upload_registry)
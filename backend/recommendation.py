@@ -2,6 +2,7 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from metrics import timed
 
 # Financial product recommendations
 FINANCIAL_PRODUCTS = {
@@ -49,6 +50,133 @@ FINANCIAL_PRODUCTS = {
     }
 }
 
+# Industry-specific risk factors
+INDUSTRY_RISKS = {
+    'Manufacturing': [
+        'Capital intensity - high fixed assets requirement',
+        'Raw material price volatility',
+        'Supply chain disruptions',
+        'Regulatory compliance costs (environmental, safety)'
+    ],
+    'Retail': [
+        'Seasonal demand fluctuations',
+        'Competitive pressure on margins',
+        'E-commerce disruption',
+        'Real estate cost inflation'
+    ],
+    'Services': [
+        'Client concentration risk',
+        'Talent retention and costs',
+        'Scalability challenges',
+        'Regulatory changes'
+    ],
+    'Logistics': [
+        'Fuel cost volatility',
+        'Vehicle maintenance costs',
+        'Driver availability',
+        'Route optimization challenges'
+    ],
+    'E-commerce': [
+        'High customer acquisition costs',
+        'Payment gateway risk',
+        'Supply chain complexity',
+        'Cybersecurity threats'
+    ],
+    'Agriculture': [
+        'Weather and climate risks',
+        'Crop price volatility',
+        'Limited access to credit',
+        'Regulatory compliance (pesticides, GMO)'
+    ]
+}
+
+# GST compliance guidance keyed by compliance status; anything else is treated as compliant
+GST_COMPLIANCE_RULES = {
+    'Non-Compliant': {
+        'compliance_area': 'GST',
+        'status': 'Non-Compliant',
+        'priority': 'Critical',
+        'action': 'File pending GST returns and rectify compliance status',
+        'benefit': 'Avoid penalties and improve creditworthiness'
+    },
+    'Delayed': {
+        'compliance_area': 'GST',
+        'status': 'Delayed',
+        'priority': 'High',
+        'action': 'File delayed GST returns immediately',
+        'benefit': 'Minimize penalties and interest charges'
+    },
+    'Compliant': {
+        'compliance_area': 'GST',
+        'status': 'Compliant',
+        'priority': 'Low',
+        'action': 'Maintain GST filing discipline',
+        'benefit': 'Stay compliant with tax authorities'
+    }
+}
+
+INCOME_TAX_RECOMMENDATION = {
+    'compliance_area': 'Income Tax',
+    'status': 'Review',
+    'priority': 'Medium',
+    'action': 'Ensure timely filing of income tax returns and ITR',
+    'benefit': 'Strengthen credit profile and compliance record'
+}
+
+# Action plan and executive summary per risk category; unknown categories get the Low Risk plan
+ACTION_PLANS = {
+    'Critical Risk': {
+        'immediate': [
+            'Emergency financial review and restructuring',
+            'Halt non-essential expenses immediately',
+            'Reach out to lenders to discuss restructuring options',
+            'Consider strategic business review'
+        ],
+        'summary': 'CRITICAL ALERT: Financial Health Score {health_score}/100. Immediate intervention required.'
+    },
+    'High Risk': {
+        'immediate': [
+            'Conduct comprehensive cost review',
+            'Improve receivables collection',
+            'Negotiate extended payment terms with suppliers'
+        ],
+        'short_term': [
+            'Improve operational efficiency',
+            'Focus on revenue growth',
+            'Reduce debt obligations'
+        ],
+        'summary': 'WARNING: Financial Health Score {health_score}/100. Significant improvements needed.'
+    },
+    'Medium Risk': {
+        'short_term': [
+            'Optimize working capital management',
+            'Improve profitability margins',
+            'Monitor debt levels'
+        ],
+        'medium_term': [
+            'Plan for controlled growth',
+            'Invest in process improvements',
+            'Develop contingency plans'
+        ],
+        'summary': 'CAUTION: Financial Health Score {health_score}/100. Monitor key metrics and implement improvements.'
+    },
+    'Low Risk': {
+        'medium_term': [
+            'Plan strategic expansion initiatives',
+            'Invest in technology and automation',
+            'Explore new revenue streams'
+        ],
+        'long_term': [
+            'Build reserves for future uncertainties',
+            'Plan for succession and sustainability',
+            'Consider market expansion'
+        ],
+        'summary': 'POSITIVE: Financial Health Score {health_score}/100. Maintain current trajectory with strategic growth initiatives.'
+    }
+}
+
+ACTION_PLAN_HORIZONS = ['immediate', 'short_term', 'medium_term', 'long_term']
+
 def analyze_cash_flow_health(df):
     """Analyze cash flow health and identify issues"""
     revenue = df['annual_revenue'].iloc[0]
@@ -179,46 +307,7 @@ def assess_industry_risks(df):
     """Assess industry-specific risks"""
     industry = df['industry_type'].iloc[0] if 'industry_type' in df.columns else 'Unknown'
     
-    industry_risks = {
-        'Manufacturing': [
-            'Capital intensity - high fixed assets requirement',
-            'Raw material price volatility',
-            'Supply chain disruptions',
-            'Regulatory compliance costs (environmental, safety)'
-        ],
-        'Retail': [
-            'Seasonal demand fluctuations',
-            'Competitive pressure on margins',
-            'E-commerce disruption',
-            'Real estate cost inflation'
-        ],
-        'Services': [
-            'Client concentration risk',
-            'Talent retention and costs',
-            'Scalability challenges',
-            'Regulatory changes'
-        ],
-        'Logistics': [
-            'Fuel cost volatility',
-            'Vehicle maintenance costs',
-            'Driver availability',
-            'Route optimization challenges'
-        ],
-        'E-commerce': [
-            'High customer acquisition costs',
-            'Payment gateway risk',
-            'Supply chain complexity',
-            'Cybersecurity threats'
-        ],
-        'Agriculture': [
-            'Weather and climate risks',
-            'Crop price volatility',
-            'Limited access to credit',
-            'Regulatory compliance (pesticides, GMO)'
-        ]
-    }
-    
-    risks = industry_risks.get(industry, [])
+    risks = list(INDUSTRY_RISKS.get(industry, []))
     
     return {
         'industry': industry,
@@ -231,42 +320,14 @@ def assess_tax_compliance(df):
     recommendations = []
     gst_status = df['gst_compliance_status'].iloc[0] if 'gst_compliance_status' in df.columns else 'Unknown'
     
-    if gst_status == 'Non-Compliant':
-        recommendations.append({
-            'compliance_area': 'GST',
-            'status': 'Non-Compliant',
-            'priority': 'Critical',
-            'action': 'File pending GST returns and rectify compliance status',
-            'benefit': 'Avoid penalties and improve creditworthiness'
-        })
-    elif gst_status == 'Delayed':
-        recommendations.append({
-            'compliance_area': 'GST',
-            'status': 'Delayed',
-            'priority': 'High',
-            'action': 'File delayed GST returns immediately',
-            'benefit': 'Minimize penalties and interest charges'
-        })
-    else:
-        recommendations.append({
-            'compliance_area': 'GST',
-            'status': 'Compliant',
-            'priority': 'Low',
-            'action': 'Maintain GST filing discipline',
-            'benefit': 'Stay compliant with tax authorities'
-        })
-    
+    recommendations.append(dict(GST_COMPLIANCE_RULES.get(gst_status, GST_COMPLIANCE_RULES['Compliant'])))
+
     # Income tax recommendations
-    recommendations.append({
-        'compliance_area': 'Income Tax',
-        'status': 'Review',
-        'priority': 'Medium',
-        'action': 'Ensure timely filing of income tax returns and ITR',
-        'benefit': 'Strengthen credit profile and compliance record'
-    })
-    
+    recommendations.append(dict(INCOME_TAX_RECOMMENDATION))
+
     return recommendations
 
+@timed('generate_recommendation')
 def generate_recommendation(df, analysis=None):
     """Generate comprehensive AI-powered recommendations"""
     if df is None or df.empty:
@@ -312,52 +373,178 @@ def generate_recommendation(df, analysis=None):
         health_score = analysis['financial_health']['health_score']
         risk_category = analysis['financial_health']['risk_category']
         
-        if risk_category == 'Critical Risk':
-            recommendations_dict['action_plan']['immediate'] = [
-                'Emergency financial review and restructuring',
-                'Halt non-essential expenses immediately',
-                'Reach out to lenders to discuss restructuring options',
-                'Consider strategic business review'
-            ]
-            recommendations_dict['executive_summary'] = f'CRITICAL ALERT: Financial Health Score {health_score}/100. Immediate intervention required.'
-        
-        elif risk_category == 'High Risk':
-            recommendations_dict['action_plan']['immediate'] = [
-                'Conduct comprehensive cost review',
-                'Improve receivables collection',
-                'Negotiate extended payment terms with suppliers'
-            ]
-            recommendations_dict['action_plan']['short_term'] = [
-                'Improve operational efficiency',
-                'Focus on revenue growth',
-                'Reduce debt obligations'
-            ]
-            recommendations_dict['executive_summary'] = f'WARNING: Financial Health Score {health_score}/100. Significant improvements needed.'
-        
-        elif risk_category == 'Medium Risk':
-            recommendations_dict['action_plan']['short_term'] = [
-                'Optimize working capital management',
-                'Improve profitability margins',
-                'Monitor debt levels'
-            ]
-            recommendations_dict['action_plan']['medium_term'] = [
-                'Plan for controlled growth',
-                'Invest in process improvements',
-                'Develop contingency plans'
-            ]
-            recommendations_dict['executive_summary'] = f'CAUTION: Financial Health Score {health_score}/100. Monitor key metrics and implement improvements.'
-        
-        else:  # Low Risk
-            recommendations_dict['action_plan']['medium_term'] = [
-                'Plan strategic expansion initiatives',
-                'Invest in technology and automation',
-                'Explore new revenue streams'
-            ]
-            recommendations_dict['action_plan']['long_term'] = [
-                'Build reserves for future uncertainties',
-                'Plan for succession and sustainability',
-                'Consider market expansion'
-            ]
-            recommendations_dict['executive_summary'] = f'POSITIVE: Financial Health Score {health_score}/100. Maintain current trajectory with strategic growth initiatives.'
+        plan = ACTION_PLANS.get(risk_category, ACTION_PLANS['Low Risk'])
+        for horizon in ACTION_PLAN_HORIZONS:
+            if horizon in plan:
+                recommendations_dict['action_plan'][horizon] = list(plan[horizon])
+        recommendations_dict['executive_summary'] = plan['summary'].format(health_score=health_score)
     
     return recommendations_dict
+
+@timed('generate_recommendation_frame')
+def generate_recommendation_frame(df, analyses=None):
+    """Generate recommendations for every row of df in one columnar pass.
+
+    Each rule is evaluated as a boolean mask over the whole frame and its
+    payload is only built for the rows where it fires. analyses, when
+    given, is the row-aligned list from perform_analysis_frame. Returns
+    the list of dicts generate_recommendation would return per row.
+    """
+    if df is None or df.empty:
+        return []
+
+    n = len(df)
+    generated_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    business_ids = df['business_id'].astype(str).tolist()
+    industries = df['industry_type'].tolist() if 'industry_type' in df.columns else ['Unknown'] * n
+    gst_statuses = df['gst_compliance_status'].tolist() if 'gst_compliance_status' in df.columns else ['Unknown'] * n
+
+    results = []
+    for pos in range(n):
+        industry = industries[pos]
+        results.append({
+            'executive_summary': '',
+            'generated_date': generated_date,
+            'business_id': business_ids[pos],
+            'cash_flow_analysis': {'issues': [], 'opportunities': []},
+            'debt_analysis': [],
+            'cost_optimization': [],
+            'financial_products': [],
+            'industry_risks': {
+                'industry': industry,
+                'identified_risks': list(INDUSTRY_RISKS.get(industry, [])),
+                'mitigation_suggested': True
+            },
+            'tax_compliance': [
+                dict(GST_COMPLIANCE_RULES.get(gst_statuses[pos], GST_COMPLIANCE_RULES['Compliant'])),
+                dict(INCOME_TAX_RECOMMENDATION)
+            ],
+            'action_plan': {horizon: [] for horizon in ACTION_PLAN_HORIZONS}
+        })
+
+    revenue = df['annual_revenue'].to_numpy()
+    expenses = df['total_expenses'].to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Cash flow health
+        net_margin = np.where(revenue > 0, (revenue - expenses) / revenue, 0)
+        critical = net_margin < 0
+        low_margin = ~critical & (net_margin < 0.05)
+        margin_pct = (net_margin * 100).tolist()
+        for pos in np.flatnonzero(critical).tolist():
+            results[pos]['cash_flow_analysis']['issues'].append({
+                'severity': 'Critical',
+                'issue': 'Negative Cash Flow',
+                'detail': f'Business is operating at a loss ({margin_pct[pos]:.1f}%)',
+                'action': 'Urgent: Reduce operational expenses or increase revenue'
+            })
+        for pos in np.flatnonzero(low_margin).tolist():
+            results[pos]['cash_flow_analysis']['issues'].append({
+                'severity': 'High',
+                'issue': 'Low Cash Flow Margin',
+                'detail': f'Minimal profit margins ({margin_pct[pos]:.1f}%)',
+                'action': 'Focus on improving operational efficiency'
+            })
+        for pos in np.flatnonzero(~(critical | low_margin)).tolist():
+            results[pos]['cash_flow_analysis']['opportunities'].append('Strong cash flow position maintained')
+
+        # Debt obligations
+        if 'dscr' in df.columns:
+            dscr = df['dscr'].to_numpy()
+            dscr_values = dscr.tolist()
+            cannot_service = dscr < 1.0
+            limited = ~cannot_service & (dscr < 1.25)
+            for pos in np.flatnonzero(cannot_service).tolist():
+                results[pos]['debt_analysis'].append({
+                    'priority': 'Critical',
+                    'recommendation': 'Debt Repayment Concern',
+                    'detail': f'DSCR is {dscr_values[pos]:.2f} - Unable to service debt from current earnings',
+                    'action': 'Refinance existing debt or reduce obligations'
+                })
+            for pos in np.flatnonzero(limited).tolist():
+                results[pos]['debt_analysis'].append({
+                    'priority': 'High',
+                    'recommendation': 'Limited Borrowing Capacity',
+                    'detail': f'DSCR is {dscr_values[pos]:.2f} - Limited room for additional debt',
+                    'action': 'Avoid new borrowing until cash flow improves'
+                })
+            for pos in np.flatnonzero(~(cannot_service | limited)).tolist():
+                results[pos]['debt_analysis'].append({
+                    'priority': 'Low',
+                    'recommendation': 'Healthy Debt Servicing',
+                    'detail': f'DSCR is {dscr_values[pos]:.2f} - Adequate capacity for debt obligations',
+                    'action': 'Maintain current debt management strategy'
+                })
+
+        if not analyses:
+            return results
+
+        # Cost optimization
+        expense_ratio = np.where(revenue > 0, expenses / revenue, 0)
+        expense_pct = (expense_ratio * 100).tolist()
+        savings_target = (expenses * 0.10).tolist()
+        for pos in np.flatnonzero(expense_ratio > 0.85).tolist():
+            results[pos]['cost_optimization'].append({
+                'category': 'Expense Management',
+                'title': 'High Expense Ratio Alert',
+                'detail': f'Expenses are {expense_pct[pos]:.1f}% of revenue',
+                'target_saving': f'Reduce expenses by ₹{int(savings_target[pos]):,} (10%)',
+                'action_items': [
+                    'Review and negotiate supplier contracts',
+                    'Optimize staffing levels',
+                    'Consolidate service providers',
+                    'Reduce overhead expenses'
+                ]
+            })
+
+        if 'current_assets' in df.columns and 'current_liabilities' in df.columns:
+            current_assets = df['current_assets'].to_numpy()
+            current_liabilities = df['current_liabilities'].to_numpy()
+            excess_wc = (current_assets - current_liabilities * 2).tolist()
+            for pos in np.flatnonzero(current_assets / (current_liabilities + 1) > 2.5).tolist():
+                results[pos]['cost_optimization'].append({
+                    'category': 'Working Capital',
+                    'title': 'Excess Working Capital',
+                    'detail': f'Current assets significantly exceed operational needs',
+                    'opportunity': f'Potential cash release of ₹{int(excess_wc[pos]):,}',
+                    'action_items': [
+                        'Optimize inventory levels',
+                        'Accelerate receivables collection',
+                        'Negotiate extended payables terms',
+                        'Deploy excess cash in growth initiatives'
+                    ]
+                })
+
+    # Financial products
+    scores = np.array([analysis['creditworthiness']['score'] for analysis in analyses])
+    analysis_revenue = np.array([analysis['financial_metrics']['annual_revenue'] for analysis in analyses])
+    recommended = np.where(scores >= 70, 'High', 'Medium').tolist()
+    for product_name, product_details in FINANCIAL_PRODUCTS.items():
+        loan_amounts = (analysis_revenue * product_details['loan_amount_factor']).tolist()
+        for pos in np.flatnonzero(scores >= product_details['min_score']).tolist():
+            results[pos]['financial_products'].append({
+                'product': product_name,
+                'eligibility': 'Eligible',
+                'estimated_loan_amount': f'₹{int(loan_amounts[pos]):,}',
+                'interest_rate_range': product_details['interest_rate_range'],
+                'tenure': product_details['tenure'],
+                'description': product_details['description'],
+                'recommended': recommended[pos]
+            })
+
+    # Action plan, grouped by risk category
+    risk_categories = np.array([analysis['financial_health']['risk_category'] for analysis in analyses], dtype=object)
+    health_scores = [analysis['financial_health']['health_score'] for analysis in analyses]
+    for risk_category, plan in ACTION_PLANS.items():
+        if risk_category == 'Low Risk':
+            # Low Risk also covers any category without a plan of its own
+            mask = ~np.isin(risk_categories, [c for c in ACTION_PLANS if c != 'Low Risk'])
+        else:
+            mask = risk_categories == risk_category
+        for pos in np.flatnonzero(mask).tolist():
+            for horizon in ACTION_PLAN_HORIZONS:
+                if horizon in plan:
+                    results[pos]['action_plan'][horizon] = list(plan[horizon])
+            results[pos]['executive_summary'] = plan['summary'].format(health_score=health_scores[pos])
+
+    return results
@@ -0,0 +1,245 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+import pandas as pd
+
+# Prefix of the shared memory segment names; give deployments on one host different namespaces
+SHARED_DATASET_NAMESPACE = os.environ.get('SHARED_DATASET_NAMESPACE', 'fha')
+# Column whose string table doubles as the row lookup
+ID_COLUMN = 'business_id'
+# Arrays start on cache-line boundaries inside a segment
+_ALIGNMENT = 64
+# Control segment: current generation. Data segment: manifest length, then the manifest
+_INT64 = struct.Struct('<q')
+
+def _codes_dtype(categories):
+    """Smallest code type, as pandas picks for a Categorical (so from_codes need not copy)"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def _untrack(shm):
+    # Segment lifetime is managed here (unlinked when superseded or released),
+    # not by the resource tracker of whichever process happened to touch it
+    resource_tracker.unregister(shm._name, 'shared_memory')
+
+def _open_readonly(name):
+    """Map an existing segment read-only; the mapping outlives the segment's name"""
+    shm = shared_memory.SharedMemory(name)
+    try:
+        _untrack(shm)
+        return mmap.mmap(shm._fd, shm.size, prot=mmap.PROT_READ)
+    finally:
+        shm.close()
+
+def _unlink(name):
+    try:
+        shm = shared_memory.SharedMemory(name)
+    except FileNotFoundError:
+        return
+    shm.unlink()
+    shm.close()
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock shared by every process on the host"""
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+class SharedIdIndex:
+    """business_id -> first row position, searched in the shared sorted ID table"""
+
+    def __init__(self, table, first_positions):
+        self.table = table
+        self.first_positions = first_positions
+
+    def get(self, business_id, default=None):
+        key = str(business_id)
+        i = int(np.searchsorted(self.table, key))
+        if i < len(self.table) and self.table[i] == key:
+            return int(self.first_positions[i])
+        return default
+
+    def __contains__(self, business_id):
+        return self.get(business_id) is not None
+
+    def __len__(self):
+        return len(self.table)
+
+class SharedDataset:
+    """Prepared dataset columns published once into shared memory for all worker processes.
+
+    Each dataset version is written to one segment: numeric columns as
+    plain arrays, text columns as integer codes into a sorted, interned
+    string table. Processes map the segment read-only and wrap the arrays
+    in a DataFrame without copying (text columns become Categoricals). A
+    generation counter in a small control segment names the current
+    segment; publishing writes the new segment first and then bumps the
+    counter, so every process switches to the complete new version on its
+    next access.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        digest = hashlib.blake2b(os.path.abspath(path).encode('utf-8'), digest_size=6).hexdigest()
+        self.prefix = f"{SHARED_DATASET_NAMESPACE}_{digest}"
+        self.lock_path = os.path.join(tempfile.gettempdir(), f"{self.prefix}.lock")
+        self._lock = threading.Lock()
+        self._control = None
+
+    def _segment_name(self, generation):
+        return f"{self.prefix}_g{generation}"
+
+    def _control_block(self):
+        if self._control is None:
+            try:
+                control = shared_memory.SharedMemory(f"{self.prefix}_ctl", create=True, size=_INT64.size)
+                _INT64.pack_into(control.buf, 0, 0)
+            except FileExistsError:
+                control = shared_memory.SharedMemory(f"{self.prefix}_ctl")
+            _untrack(control)
+            self._control = control
+        return self._control
+
+    def generation(self):
+        """Generation currently published by any process (0 if none)"""
+        if self._control is None:
+            try:
+                control = shared_memory.SharedMemory(f"{self.prefix}_ctl")
+            except FileNotFoundError:
+                return 0
+            _untrack(control)
+            self._control = control
+        return _INT64.unpack_from(self._control.buf, 0)[0]
+
+    def _write_segment(self, generation, df, signature):
+        arrays = []
+        columns = []
+
+        def add(array):
+            arrays.append(np.ascontiguousarray(array))
+            return len(arrays) - 1
+
+        for name in df.columns:
+            series = df[name]
+            if series.dtype.kind in 'biuf':
+                columns.append({'name': name, 'kind': 'numeric', 'values': add(series.to_numpy())})
+                continue
+            # NaN gets code -1; sorted uniques make the table searchable
+            codes, uniques = pd.factorize(series, sort=True)
+            table = np.array([str(v) for v in uniques], dtype=str)
+            column = {'name': name, 'kind': 'text', 'table': add(table),
+                      'codes': add(codes.astype(_codes_dtype(len(uniques))))}
+            if name == ID_COLUMN:
+                # first row of each ID, as the in-process dict index keeps
+                found, first = np.unique(codes, return_index=True)
+                column['first_positions'] = add(first[found >= 0].astype(np.int64))
+            columns.append(column)
+
+        # Lay arrays out after the manifest, each aligned
+        descriptors = [{'dtype': a.dtype.str, 'length': len(a)} for a in arrays]
+        manifest = {'signature': list(signature), 'rows': len(df), 'columns': columns, 'arrays': descriptors}
+        header_size = _INT64.size + len(json.dumps(manifest)) + 64 * len(arrays) + 64
+        offset = header_size
+        for descriptor, array in zip(descriptors, arrays):
+            offset = -(-offset // _ALIGNMENT) * _ALIGNMENT
+            descriptor['offset'] = offset
+            offset += array.nbytes
+        encoded = json.dumps(manifest).encode('utf-8')
+        if _INT64.size + len(encoded) > header_size:
+            raise ValueError('Shared dataset manifest does not fit its header')
+
+        name = self._segment_name(generation)
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=max(offset, 1))
+        except FileExistsError:
+            # left behind by a publisher that died before bumping the generation
+            _unlink(name)
+            shm = shared_memory.SharedMemory(name, create=True, size=max(offset, 1))
+        _untrack(shm)
+        try:
+            _INT64.pack_into(shm.buf, 0, len(encoded))
+            shm.buf[_INT64.size:_INT64.size + len(encoded)] = encoded
+            for descriptor, array in zip(descriptors, arrays):
+                target = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=descriptor['offset'])
+                target[:] = array
+                del target
+        finally:
+            shm.close()
+
+    def _attach(self, generation):
+        """(signature, frame, id_index) for a published generation"""
+        buffer = _open_readonly(self._segment_name(generation))
+        length = _INT64.unpack_from(buffer, 0)[0]
+        manifest = json.loads(buffer[_INT64.size:_INT64.size + length])
+        arrays = [
+            np.frombuffer(buffer, dtype=np.dtype(d['dtype']), count=d['length'], offset=d['offset'])
+            for d in manifest['arrays']
+        ]
+
+        data = {}
+        id_index = None
+        for column in manifest['columns']:
+            if column['kind'] == 'numeric':
+                data[column['name']] = arrays[column['values']]
+                continue
+            table = arrays[column['table']]
+            data[column['name']] = pd.Categorical.from_codes(arrays[column['codes']], categories=table)
+            if 'first_positions' in column:
+                id_index = SharedIdIndex(table, arrays[column['first_positions']])
+
+        # copy=False keeps one block per column, each a view of the segment
+        df = pd.DataFrame(data, copy=False)
+        if id_index is None:
+            id_index = SharedIdIndex(np.array([], dtype=str), np.array([], dtype=np.int64))
+        return tuple(manifest['signature']), df, id_index
+
+    def load(self, signature, read_frame, force=False):
+        """Return (generation, signature, frame, id_index) for the file at signature.
+
+        Attaches the published generation when it was built from the same
+        file; otherwise (or with force) calls read_frame() for the prepared
+        frame, publishes it as the next generation and retires the old one.
+        """
+        with self._lock, _file_lock(self.lock_path):
+            control = self._control_block()
+            generation = _INT64.unpack_from(control.buf, 0)[0]
+            if generation and not force:
+                try:
+                    attached = self._attach(generation)
+                    if attached[0] == tuple(signature):
+                        return (generation,) + attached
+                except FileNotFoundError:
+                    pass
+
+            new_generation = generation + 1
+            self._write_segment(new_generation, read_frame(), signature)
+            _INT64.pack_into(control.buf, 0, new_generation)
+            if generation:
+                # processes still on the old version keep their mapping
+                _unlink(self._segment_name(generation))
+            return (new_generation,) + self._attach(new_generation)
+
+    def release(self):
+        """Unlink the current segment and the control block (on server shutdown)"""
+        with self._lock, _file_lock(self.lock_path):
+            generation = self.generation()
+            if generation:
+                _unlink(self._segment_name(generation))
+            _unlink(f"{self.prefix}_ctl")
+            if self._control is not None:
+                self._control.close()
+                self._control = None
@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+# Bump when the on-disk layout changes so stale snapshots are rebuilt
+SNAPSHOT_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+def snapshot_dir_for(csv_path):
+    """Directory holding the columnar snapshot of csv_path"""
+    return f"{csv_path}.snapshot"
+
+def _column_files(directory, position):
+    return (
+        os.path.join(directory, f"col_{position}.npy"),
+        os.path.join(directory, f"col_{position}_values.npy")
+    )
+
+def write_snapshot(df, csv_path, signature):
+    """Write df as one .npy file per column next to csv_path.
+
+    Numeric columns are stored as-is. Text columns are dictionary encoded
+    into int32 codes plus a fixed-width unicode array of distinct values,
+    so nothing in the snapshot needs pickle to load.
+    """
+    target = snapshot_dir_for(csv_path)
+    staging = f"{target}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    try:
+        columns = []
+        for position, name in enumerate(df.columns):
+            series = df[name]
+            data_file, values_file = _column_files(staging, position)
+            if series.dtype.kind in 'biuf':
+                np.save(data_file, series.to_numpy())
+                columns.append({'name': name, 'kind': 'numeric'})
+            else:
+                codes, uniques = pd.factorize(series)
+                np.save(data_file, codes.astype(np.int32))
+                np.save(values_file, np.array([str(v) for v in uniques], dtype=str))
+                columns.append({'name': name, 'kind': 'text'})
+
+        manifest = {
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'source_signature': list(signature),
+            'rows': len(df),
+            'columns': columns
+        }
+        with open(os.path.join(staging, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+        # Swap the finished snapshot in; readers never see a half-written one
+        retired = f"{target}.old-{os.getpid()}"
+        if os.path.exists(target):
+            os.replace(target, retired)
+        os.replace(staging, target)
+        shutil.rmtree(retired, ignore_errors=True)
+        return True
+    except Exception as e:
+        print(f"Error writing dataset snapshot: {str(e)}")
+        shutil.rmtree(staging, ignore_errors=True)
+        return False
+
+def read_snapshot(csv_path, signature):
+    """Load the snapshot for csv_path if it matches signature, else None"""
+    directory = snapshot_dir_for(csv_path)
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            return None
+        if tuple(manifest.get('source_signature', ())) != tuple(signature):
+            return None
+
+        data = {}
+        for position, column in enumerate(manifest['columns']):
+            data_file, values_file = _column_files(directory, position)
+            values = np.load(data_file, mmap_mode='r')
+            if column['kind'] == 'text':
+                # code -1 marks a missing value, which maps to the trailing NaN
+                uniques = np.load(values_file).astype(object)
+                lookup = np.append(uniques, np.nan)
+                values = lookup[np.where(values < 0, len(uniques), values)]
+            data[column['name']] = values
+
+        df = pd.DataFrame(data)
+        if len(df) != manifest['rows']:
+            return None
+        return df
+    except Exception as e:
+        print(f"Error reading dataset snapshot: {str(e)}")
+        return None
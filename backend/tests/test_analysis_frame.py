@@ -0,0 +1,52 @@
+import os
+import sys
+import unittest
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import perform_analysis, perform_analysis_frame
+from recommendation import generate_recommendation, generate_recommendation_frame
+from data_loader import get_dataset_store, normalize_financial_data
+
+def _comparable(result, stamp):
+    result = dict(result)
+    result.pop(stamp, None)
+    return result
+
+def _edge_cases():
+    """Dataset rows rewritten into the cases the vectorized path must handle like the row path"""
+    df = get_dataset_store().get_frame().head(8).copy().reset_index(drop=True)
+    df.loc[0, 'total_liabilities'] = 0
+    df.loc[1, ['current_liabilities', 'total_liabilities']] = 0
+    df.loc[2, 'annual_revenue'] = 0
+    df.loc[3, 'industry_type'] = 'Space Mining'
+    df.loc[4, 'total_assets'] = np.nan
+    df.loc[5, ['current_assets', 'inventory']] = np.nan
+    df.loc[6, 'loan_amount'] = np.nan
+    df.loc[7, ['annual_revenue', 'total_expenses', 'total_liabilities']] = 0
+    return normalize_financial_data(df)
+
+class AnalysisFrameTest(unittest.TestCase):
+    """perform_analysis_frame/generate_recommendation_frame must match the per-row functions exactly"""
+
+    def assertFrameMatchesRows(self, df):
+        analyses = perform_analysis_frame(df)
+        recommendations = generate_recommendation_frame(df, analyses)
+        self.assertEqual(len(analyses), len(df))
+        for pos in range(len(df)):
+            row = df.iloc[[pos]]
+            analysis = perform_analysis(row)
+            with self.subTest(business_id=analysis['business_id']):
+                self.assertEqual(_comparable(analyses[pos], 'analysis_date'), _comparable(analysis, 'analysis_date'))
+                self.assertEqual(_comparable(recommendations[pos], 'generated_date'),
+                                 _comparable(generate_recommendation(row, analysis), 'generated_date'))
+
+    def test_dataset_rows(self):
+        self.assertFrameMatchesRows(get_dataset_store().get_frame())
+
+    def test_edge_cases(self):
+        self.assertFrameMatchesRows(_edge_cases())
+
+if __name__ == '__main__':
+    unittest.main()
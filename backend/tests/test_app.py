@@ -0,0 +1,117 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+
+# Module-level state the app keeps on disk goes to a scratch directory
+SCRATCH = tempfile.TemporaryDirectory()
+for name, filename in [('UPLOAD_REGISTRY_DB', 'uploaded_businesses.db'), ('COHORT_STATS_FILE', 'cohort_stats.npz'),
+                       ('UPLOAD_JOBS_DB', 'upload_jobs.db'), ('BUSINESS_DB', 'businesses.db')]:
+    os.environ.setdefault(name, os.path.join(SCRATCH.name, filename))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as backend_app
+import business_storage
+import peer_percentiles
+from analysis import perform_analysis_frame
+from business_storage import SQLiteStorage
+from cohort_stats import CohortStats
+from data_loader import get_dataset_store, normalize_financial_data
+from peer_percentiles import PeerIndex
+from upload_registry import UploadRegistry
+
+def tearDownModule():
+    SCRATCH.cleanup()
+
+def _upload(revenue):
+    return normalize_financial_data(pd.DataFrame({
+        'business_id': ['ETAG_1'], 'industry_type': ['Retail'], 'annual_revenue': [revenue],
+        'total_expenses': [3500000], 'current_assets': [2000000], 'current_liabilities': [800000],
+        'total_assets': [6000000], 'total_liabilities': [2500000], 'loan_amount': [1000000],
+    }))
+
+class UploadedRowETagTest(unittest.TestCase):
+    """Businesses served from uploaded storage rows revalidate like dataset rows"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.storage = SQLiteStorage(os.path.join(self.tmp.name, 'businesses.db'), get_dataset_store())
+        registry = UploadRegistry(os.path.join(self.tmp.name, 'registry.db'))
+        for patcher in (mock.patch.object(business_storage, '_storage', self.storage),
+                        mock.patch.object(backend_app, 'upload_registry', registry),
+                        mock.patch.object(peer_percentiles, 'peer_index', PeerIndex(registry))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = backend_app.app.test_client()
+        self.storage.add_businesses(_upload(5000000))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _revalidates(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIsNotNone(first.headers.get('ETag'))
+        again = self.client.get(url, headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+        # a re-upload of the business is served in full, under a new ETag
+        self.storage.add_businesses(_upload(9000000))
+        changed = self.client.get(url, headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers.get('ETag'), first.headers['ETag'])
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': changed.headers['ETag']}).status_code, 304)
+        return first, changed
+
+    def test_analysis(self):
+        first, changed = self._revalidates('/api/analysis/ETAG_1')
+        self.assertNotEqual(first.get_json()['data']['analysis'], changed.get_json()['data']['analysis'])
+
+    def test_json_report(self):
+        self._revalidates('/api/report/json/ETAG_1')
+
+    def test_dataset_change(self):
+        url = '/api/analysis/ETAG_1'
+        etag = self.client.get(url).headers['ETag']
+        # a new dataset version is a new storage token, even with the upload unchanged
+        with mock.patch.object(self.storage, '_synced_token', 'another-dataset'), \
+                mock.patch.object(self.storage, '_sync'):
+            self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+class CohortStatsResetEndpointTest(unittest.TestCase):
+    """DELETE /api/cohort-stats needs ADMIN_TOKEN set and sent back in X-Admin-Token"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'cohort_stats.npz')
+        self.stats = CohortStats(self.path)
+        self.stats.add_analyses(perform_analysis_frame(_upload(5000000)))
+        patcher = mock.patch.object(backend_app, 'cohort_stats', self.stats)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = backend_app.app.test_client()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_forbidden_without_admin_token(self):
+        with mock.patch.object(backend_app, 'ADMIN_TOKEN', ''):
+            self.assertEqual(self.client.delete('/api/cohort-stats').status_code, 403)
+            self.assertEqual(self.client.delete('/api/cohort-stats', headers={'X-Admin-Token': ''}).status_code, 403)
+        with mock.patch.object(backend_app, 'ADMIN_TOKEN', 'secret'):
+            self.assertEqual(self.client.delete('/api/cohort-stats').status_code, 401)
+            self.assertEqual(self.client.delete('/api/cohort-stats', headers={'X-Admin-Token': 'guess'}).status_code, 401)
+        self.assertTrue(CohortStats(self.path).query())
+
+    def test_reset(self):
+        with mock.patch.object(backend_app, 'ADMIN_TOKEN', 'secret'):
+            response = self.client.delete('/api/cohort-stats', headers={'X-Admin-Token': 'secret'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(CohortStats(self.path).query(), [])
+        self.assertEqual(self.client.get('/api/cohort-stats').get_json()['data'], [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import io
+import os
+import sys
+import unittest
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bulk_reports
+from bulk_reports import stream_pdf_zip
+
+def _render(business_id):
+    return business_id, b'%PDF-1.4 ' + business_id.encode('utf-8'), None
+
+class BulkReportNamesTest(unittest.TestCase):
+    """Business IDs are user input and must not become paths inside the ZIP"""
+
+    def _archive(self, business_ids):
+        with ThreadPoolExecutor(max_workers=2) as pool, \
+                mock.patch.object(bulk_reports, 'get_report_pool', return_value=pool), \
+                mock.patch.object(bulk_reports, 'render_pdf_for_business', _render):
+            data = b''.join(stream_pdf_zip(business_ids))
+        return zipfile.ZipFile(io.BytesIO(data))
+
+    def test_hostile_ids_stay_in_the_archive_root(self):
+        ids = ['../../etc/evil', '/abs/evil', '..\\..\\win', 'BIZ_1', '..']
+        archive = self._archive(ids)
+        names = archive.namelist()
+        self.assertEqual(len(names), len(ids))
+        for name in names:
+            self.assertNotIn('/', name)
+            self.assertNotIn('\\', name)
+            self.assertFalse(name.startswith('.'), name)
+            self.assertTrue(name.endswith('.pdf'), name)
+        self.assertTrue(any(name.startswith('BIZ_1_financial_report_') for name in names))
+
+    def test_colliding_names_keep_every_report(self):
+        # both sanitize to etc_evil
+        archive = self._archive(['../etc/evil', 'etc/evil'])
+        names = archive.namelist()
+        self.assertEqual(len(set(names)), 2)
+        self.assertEqual(sorted(archive.read(name) for name in names),
+                         [b'%PDF-1.4 ../etc/evil', b'%PDF-1.4 etc/evil'])
+
+if __name__ == '__main__':
+    unittest.main()
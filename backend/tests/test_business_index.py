@@ -0,0 +1,30 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from business_index import BusinessIndex, InvalidQuery
+from data_loader import get_dataset_store
+
+class CursorVersionTest(unittest.TestCase):
+    """Cursors name the dataset file, not the process that loaded it"""
+
+    def setUp(self):
+        _, self.token, self.df = get_dataset_store().get_tokened_frame()
+
+    def test_cursor_survives_a_restart(self):
+        records, _, cursor = BusinessIndex(self.df, 1, self.token).query(sort='-annual_revenue', limit=10)
+        # a restarted process (or another worker) counts its loads from scratch
+        restarted = BusinessIndex(self.df, 7, self.token)
+        page, _, _ = restarted.query(sort='-annual_revenue', limit=10, cursor=cursor)
+        everything, _, _ = restarted.query(sort='-annual_revenue', limit=20)
+        self.assertEqual(records + page, everything)
+
+    def test_cursor_expires_with_the_dataset_file(self):
+        _, _, cursor = BusinessIndex(self.df, 1, self.token).query(limit=10)
+        with self.assertRaises(InvalidQuery):
+            BusinessIndex(self.df, 1, 'another-file').query(limit=10, cursor=cursor)
+
+if __name__ == '__main__':
+    unittest.main()
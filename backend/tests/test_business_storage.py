@@ -0,0 +1,79 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import perform_analysis, perform_analysis_frame
+from business_storage import SQLiteStorage
+from data_loader import get_dataset_store, load_csv_data, normalize_financial_data
+
+# An upload in the shape users send: balance-sheet columns, no precomputed
+# ratios, plus columns (accounts_receivable) the dataset does not have
+UPLOAD_CSV = """business_id,industry_type,annual_revenue,total_expenses,current_assets,current_liabilities,total_assets,total_liabilities,inventory,accounts_receivable,loan_amount
+UPTEST_1,Retail,5000000,3500000,2000000,800000,6000000,2500000,300000,400000,1000000
+UPTEST_2,Manufacturing,12000000,11000000,3000000,2900000,15000000,12000000,1500000,2500000,5000000
+UPTEST_3,IT Services,800000,900000,100000,150000,500000,450000,0,90000,
+"""
+
+def _comparable(analysis):
+    analysis = dict(analysis)
+    analysis.pop('analysis_date', None)
+    return analysis
+
+class SQLiteUploadRoundTripTest(unittest.TestCase):
+    """Analyzing a stored upload must give the result the upload itself got"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        csv_path = os.path.join(self.tmp.name, 'upload.csv')
+        with open(csv_path, 'w') as f:
+            f.write(UPLOAD_CSV)
+        df, error = load_csv_data(csv_path)
+        self.assertIsNone(error)
+        self.upload = normalize_financial_data(df)
+        self.storage = SQLiteStorage(os.path.join(self.tmp.name, 'businesses.db'), get_dataset_store())
+        self.storage.add_businesses(self.upload)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_stored_row_analysis_matches_upload_analysis(self):
+        uploaded = perform_analysis_frame(self.upload)
+        for analysis in uploaded:
+            row = self.storage.get_row(analysis['business_id'])
+            self.assertEqual(sorted(row.columns), sorted(self.upload.columns))
+            self.assertEqual(_comparable(perform_analysis(row)), _comparable(analysis))
+
+    def test_batch_groups_match_upload_analysis(self):
+        dataset_id = str(get_dataset_store().get_frame()['business_id'].iloc[0])
+        ids = ['UPTEST_2', dataset_id, 'MISSING', 'UPTEST_1', 'UPTEST_3']
+        groups, found = self.storage.get_row_groups(ids)
+        self.assertEqual(found, [True, True, False, True, True])
+
+        analyses = [None] * sum(found)
+        for positions, frame in groups:
+            for position, analysis in zip(positions, perform_analysis_frame(frame)):
+                analyses[position] = analysis
+        expected = {a['business_id']: a for a in perform_analysis_frame(self.upload)}
+        expected[dataset_id] = perform_analysis(get_dataset_store().get_row(dataset_id))
+        self.assertEqual([_comparable(a) for a in analyses],
+                         [_comparable(expected[business_id]) for business_id in ids if business_id != 'MISSING'])
+
+    def test_lookup_returns_the_latest_upload(self):
+        reupload = self.upload[self.upload['business_id'] == 'UPTEST_1'].copy()
+        reupload['annual_revenue'] = 100000
+        reupload['total_expenses'] = 900000
+        self.storage.add_businesses(reupload)
+
+        expected = _comparable(perform_analysis_frame(reupload)[0])
+        self.assertEqual(_comparable(perform_analysis(self.storage.get_row('UPTEST_1'))), expected)
+        frame, found = self.storage.get_rows(['UPTEST_2', 'UPTEST_1'])
+        self.assertEqual(found, [True, True])
+        self.assertEqual(frame['annual_revenue'].tolist(), [12000000, 100000])
+        groups, _ = self.storage.get_row_groups(['UPTEST_1'])
+        self.assertEqual(_comparable(perform_analysis_frame(groups[0][1])[0]), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import perform_analysis_frame
+from cohort_stats import CohortStats, TDigest
+from data_loader import normalize_financial_data
+
+# API_DOCUMENTATION.md: on 100,000 rows quantiles are within about 1.5% of the true rank
+RANK_ERROR = 0.015
+QUANTILES = [0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 0.999]
+
+UPLOAD = pd.DataFrame({
+    'business_id': ['COHORT_1', 'COHORT_2', 'COHORT_3'],
+    'industry_type': ['Retail', 'Retail', 'Manufacturing'],
+    'annual_revenue': [5000000, 12000000, 800000],
+    'total_expenses': [3500000, 11000000, 900000],
+    'current_assets': [2000000, 3000000, 100000],
+    'current_liabilities': [800000, 2900000, 150000],
+    'total_assets': [6000000, 15000000, 500000],
+    'total_liabilities': [2500000, 12000000, 450000],
+    'loan_amount': [1000000, 5000000, 0],
+})
+
+class TDigestAccuracyTest(unittest.TestCase):
+
+    def test_quantiles_within_stated_rank_error(self):
+        rng = np.random.default_rng(7)
+        distributions = {
+            'normal': rng.normal(1.2, 0.4, 100000),
+            'lognormal': rng.lognormal(0.0, 1.0, 100000),
+            'uniform': rng.uniform(-5, 5, 100000),
+        }
+        for name, values in distributions.items():
+            # merged from upload-sized digests, as the cohorts are built
+            digest = TDigest()
+            for block in np.array_split(values, 100):
+                part = TDigest()
+                part.add(block)
+                part.centroids()
+                digest.merge(part)
+            ordered = np.sort(values)
+            for q in QUANTILES:
+                with self.subTest(distribution=name, q=q):
+                    estimate = digest.quantile(q, ordered[0], ordered[-1])
+                    rank = np.searchsorted(ordered, estimate) / len(ordered)
+                    self.assertLessEqual(abs(rank - q), RANK_ERROR)
+
+class CohortStatsResetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'cohort_stats.npz')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reset_clears_the_persisted_state(self):
+        stats = CohortStats(self.path)
+        # another worker, which has already read the file
+        other = CohortStats(self.path)
+        stats.add_analyses(perform_analysis_frame(normalize_financial_data(UPLOAD.copy())), ('job-1', 0, 3))
+        self.assertTrue(other.query(ratio='health_score'))
+
+        stats.reset()
+        for reader in (stats, other, CohortStats(self.path)):
+            self.assertEqual(reader.query(), [])
+
+        # the job's applied blocks are forgotten too, so a fresh upload counts again
+        stats.add_analyses(perform_analysis_frame(normalize_financial_data(UPLOAD.copy())), ('job-1', 0, 3))
+        counts = {row['industry']: row['count'] for row in CohortStats(self.path).query(ratio='health_score')}
+        self.assertEqual(counts['Retail'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
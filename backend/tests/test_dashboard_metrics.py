@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+import unittest
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard_metrics import DashboardMetrics
+from data_loader import get_dataset_store
+from upload_registry import UploadRegistry
+
+class DashboardOverlapTest(unittest.TestCase):
+    """An uploaded ID the dataset also has is counted once, from the dataset row"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = UploadRegistry(os.path.join(self.tmp.name, 'registry.db'))
+        self.metrics = DashboardMetrics(get_dataset_store(), self.registry)
+        self.dataset = get_dataset_store().get_frame()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_overlapping_id_counts_once(self):
+        before = self.metrics.get()
+        existing = str(self.dataset['business_id'].iloc[0])
+        self.registry.record(pd.DataFrame({
+            'business_id': [existing, 'DASH_NEW'],
+            'industry_type': ['Space Mining', 'Space Mining'],
+            'annual_revenue': [10 ** 12, 5000000],
+            'loan_amount': [0, 1000000],
+            'financial_health_score': [1, 80],
+            'risk_category': ['High Risk', 'Low Risk'],
+        }))
+        after = self.metrics.get()
+
+        self.assertEqual(after['total_businesses'], before['total_businesses'] + 1)
+        self.assertEqual(after['uploaded_businesses'], 1)
+        self.assertEqual(after['total_revenue'], before['total_revenue'] + 5000000)
+        self.assertEqual(after['industry_distribution']['Space Mining'], 1)
+        self.assertEqual(after['risk_distribution']['low_risk'], before['risk_distribution']['low_risk'] + 1)
+        self.assertEqual(after['risk_distribution']['high_risk'], before['risk_distribution']['high_risk'])
+
+if __name__ == '__main__':
+    unittest.main()
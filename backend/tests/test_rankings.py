@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from portfolio_query import get_ratio_table, HEALTH_SCORE_FIELD
+from rankings import Rankings, RANKING_MAX_K
+from upload_registry import UploadRegistry
+
+def _rows(ids, scores, industry='Retail'):
+    return pd.DataFrame({'business_id': ids, 'industry_type': industry, HEALTH_SCORE_FIELD: scores,
+                         'loan_amount': 0, 'dscr': 1.0})
+
+class UploadedRankingsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.registry = UploadRegistry(os.path.join(self.tmp.name, 'registry.db'))
+        self.rankings = Rankings(self.registry)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _ids(self, rankings, name='healthiest', industry=None):
+        return [(row['business_id'], row['uploaded'])
+                for row in rankings.top(name, RANKING_MAX_K, industry)]
+
+    def test_dataset_id_ranks_once(self):
+        existing = str(get_ratio_table().business_ids[0])
+        # above every dataset score, so both would lead the ranking if uploads were not checked
+        self.registry.record(_rows([existing, 'RANK_NEW'], [1000, 999]))
+        top = self._ids(self.rankings)
+        ids = [business_id for business_id, _ in top]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(top[0], ('RANK_NEW', True))
+        self.assertNotIn((existing, True), top)
+
+    def test_changes_are_merged_incrementally(self):
+        self.registry.record(_rows([f"RANK_{i}" for i in range(300)], [500 + i for i in range(300)]))
+        self._ids(self.rankings)
+        self._ids(self.rankings, industry='Retail')
+
+        with mock.patch.object(self.rankings, '_select_uploaded', wraps=self.rankings._select_uploaded) as select:
+            # new rows only: each cached list takes the added rows, never the whole frame
+            self.registry.record(_rows(['RANK_A', 'RANK_B'], [2000, 1]))
+            self.registry.record(_rows(['RANK_C'], [1500], industry='Services'))
+            top = self._ids(self.rankings)
+            self.assertEqual(top[:2], [('RANK_A', True), ('RANK_C', True)])
+            # both records arrive in one registry sync
+            self.assertEqual({len(call.args[0]) for call in select.call_args_list}, {3})
+
+            # replacing a row a list holds reselects that list from the frame
+            select.reset_mock()
+            self.registry.record(_rows(['RANK_A'], [0]))
+            top = self._ids(self.rankings)
+            self.assertNotIn(('RANK_A', True), top)
+            self.assertIn(len(self.registry.snapshot()[1]), {len(call.args[0]) for call in select.call_args_list})
+
+        # the same rankings a fresh rebuild gives
+        fresh = Rankings(self.registry)
+        for name in ('healthiest', 'riskiest'):
+            for industry in (None, 'Retail', 'Services'):
+                self.assertEqual(self._ids(self.rankings, name, industry), self._ids(fresh, name, industry))
+
+if __name__ == '__main__':
+    unittest.main()
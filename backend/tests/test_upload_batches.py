@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import unittest
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis import perform_analysis_frame
+from business_storage import SQLiteStorage
+from cohort_stats import CohortStats, ALL_INDUSTRIES
+from data_loader import get_dataset_store, normalize_financial_data
+from upload_registry import UploadRegistry
+
+UPLOAD = pd.DataFrame({
+    'business_id': ['BATCH_1', 'BATCH_2', 'BATCH_3', 'BATCH_4'],
+    'industry_type': ['Retail', 'Retail', 'Manufacturing', 'Retail'],
+    'annual_revenue': [5000000, 12000000, 800000, 3000000],
+    'total_expenses': [3500000, 11000000, 900000, 2000000],
+    'current_assets': [2000000, 3000000, 100000, 900000],
+    'current_liabilities': [800000, 2900000, 150000, 400000],
+    'total_assets': [6000000, 15000000, 500000, 4000000],
+    'total_liabilities': [2500000, 12000000, 450000, 1000000],
+    'loan_amount': [1000000, 5000000, 0, 200000],
+})
+
+class UploadBatchTest(unittest.TestCase):
+    """A block an upload job applies again (after a resume or retry) must count once"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.upload = normalize_financial_data(UPLOAD.copy())
+        self.analyses = perform_analysis_frame(self.upload)
+        self.blocks = [(0, self.upload.iloc[:2], self.analyses[:2]), (2, self.upload.iloc[2:], self.analyses[2:])]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _apply(self, apply_block, job_id='job-1'):
+        # the first block twice, as a job resumed before its progress was saved would
+        for start, block, analyses in [self.blocks[0]] + self.blocks:
+            apply_block(block, analyses, (job_id, start, start + len(block)))
+
+    def test_storage_stores_a_block_once(self):
+        storage = SQLiteStorage(os.path.join(self.tmp.name, 'businesses.db'), get_dataset_store())
+        self._apply(lambda block, analyses, batch: storage.add_businesses(block, batch))
+        ids = [record['business_id'] for record in storage.all_records(['business_id'])]
+        self.assertEqual(sorted(i for i in ids if i.startswith('BATCH_')), list(UPLOAD['business_id']))
+
+    def test_registry_records_a_block_once(self):
+        registry = UploadRegistry(os.path.join(self.tmp.name, 'registry.db'))
+        self._apply(lambda block, analyses, batch: registry.record(
+            pd.DataFrame({'business_id': block['business_id'], 'annual_revenue': block['annual_revenue']}), batch))
+        _, frame = registry.snapshot()
+        self.assertEqual(sorted(frame['business_id']), list(UPLOAD['business_id']))
+
+        # a newer upload of BATCH_1 is not undone by the job replaying its first block
+        registry.record(pd.DataFrame({'business_id': ['BATCH_1'], 'annual_revenue': [1]}))
+        start, block, _ = self.blocks[0]
+        registry.record(pd.DataFrame({'business_id': block['business_id'], 'annual_revenue': block['annual_revenue']}),
+                        ('job-1', start, start + len(block)))
+        _, frame = registry.snapshot()
+        self.assertEqual(frame.set_index('business_id').loc['BATCH_1', 'annual_revenue'], 1)
+
+    def test_cohort_stats_add_a_block_once(self):
+        path = os.path.join(self.tmp.name, 'cohort_stats.npz')
+        stats = CohortStats(path)
+        self._apply(lambda block, analyses, batch: stats.add_analyses(analyses, batch))
+        # another job uploading the same rows is a new upload and counts again
+        self._apply(lambda block, analyses, batch: stats.add_analyses(analyses, batch), job_id='job-2')
+
+        for reader in (stats, CohortStats(path)):
+            counts = {row['industry']: row['count'] for row in reader.query(ratio='health_score')}
+            self.assertEqual(counts, {ALL_INDUSTRIES: 8, 'Retail': 6, 'Manufacturing': 2})
+
+if __name__ == '__main__':
+    unittest.main()
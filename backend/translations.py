@@ -1,6 +1,8 @@
 # Multilingual support for Financial Health Assessment Tool
 # Supported languages: English and Hindi
 
+from metrics import timed
+
 TRANSLATIONS = {
     'en': {
         # Headers and titles
@@ -183,6 +185,7 @@ def get_translation(key, language='en'):
     translations = TRANSLATIONS.get(language, TRANSLATIONS['en'])
     return translations.get(key, key)
 
+@timed('translate_analysis')
 def translate_analysis(analysis, language='en'):
     """Translate analysis results to specified language"""
     if language == 'en':
@@ -0,0 +1,305 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from data_loader import BASE_DIR, CHUNK_SIZE, estimate_row_count
+from ingestion import ingest_file, IngestionError
+
+# Job state lives in SQLite so queued and running jobs survive a restart
+UPLOAD_JOBS_DB = os.environ.get('UPLOAD_JOBS_DB', os.path.join(BASE_DIR, 'upload_jobs.db'))
+UPLOAD_JOB_WORKERS = int(os.environ.get('UPLOAD_JOB_WORKERS', 2))
+# A job belongs to the process holding its lease. That process renews it while
+# alive; any process takes over a queued or running job whose lease ran out
+UPLOAD_JOB_LEASE_SECONDS = float(os.environ.get('UPLOAD_JOB_LEASE_SECONDS', 60))
+
+JOB_COLUMNS = ['job_id', 'filename', 'file_path', 'status', 'message', 'total_rows', 'rows_done',
+               'rows_failed', 'chunk_size', 'lease_owner', 'lease_expires', 'created_at', 'started_at',
+               'updated_at', 'finished_at']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    filename TEXT,
+    file_path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    message TEXT,
+    total_rows INTEGER,
+    rows_done INTEGER NOT NULL DEFAULT 0,
+    rows_failed INTEGER NOT NULL DEFAULT 0,
+    chunk_size INTEGER,
+    lease_owner TEXT,
+    lease_expires REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    updated_at REAL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    row_index INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (job_id, row_index)
+);
+'''
+
+class LeaseLost(Exception):
+    """Raised when a job's lease has passed to another process"""
+
+class JobStore:
+    """SQLite-backed store for upload job state and per-row results.
+
+    Writes made on behalf of a lease owner only apply while it still holds
+    the job's lease and raise LeaseLost otherwise, so a process that
+    stalled past its lease cannot overwrite the progress of the one that
+    took the job over.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # databases created before these columns existed
+            existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+            for name, sql_type in (('chunk_size', 'INTEGER'), ('lease_owner', 'TEXT'), ('lease_expires', 'REAL')):
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {sql_type}")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def create_job(self, file_path, filename, owner):
+        """Insert a queued job, leased to owner"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO jobs (job_id, filename, file_path, status, chunk_size, lease_owner, lease_expires, '
+                'created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, filename, file_path, 'queued', CHUNK_SIZE, owner, now + UPLOAD_JOB_LEASE_SECONDS, now, now)
+            )
+        return job_id
+
+    def get_job(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(zip(JOB_COLUMNS, row)) if row else None
+
+    def update_job(self, job_id, owner=None, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            if owner is None:
+                conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+            elif not conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ? AND lease_owner = ?",
+                                  (*fields.values(), job_id, owner)).rowcount:
+                raise LeaseLost(job_id)
+
+    def add_results(self, job_id, results, rows_done, rows_failed, owner):
+        """Store a chunk of (row_index, status, payload) rows and the new progress atomically.
+
+        Also renews owner's lease, so a job that keeps making progress keeps it.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            # checked first: the with block rolls the results back if the lease is gone
+            if not conn.execute(
+                'UPDATE jobs SET rows_done = ?, rows_failed = ?, lease_expires = ?, updated_at = ? '
+                'WHERE job_id = ? AND lease_owner = ?',
+                (rows_done, rows_failed, now + UPLOAD_JOB_LEASE_SECONDS, now, job_id, owner)
+            ).rowcount:
+                raise LeaseLost(job_id)
+            conn.executemany(
+                'INSERT OR REPLACE INTO job_results (job_id, row_index, status, payload) VALUES (?, ?, ?, ?)',
+                [(job_id, row_index, status, json.dumps(payload, default=str)) for row_index, status, payload in results]
+            )
+
+    def get_results(self, job_id, offset=0, limit=100):
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT payload FROM job_results WHERE job_id = ? ORDER BY row_index LIMIT ? OFFSET ?',
+                (job_id, limit, offset)
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def expired_jobs(self):
+        """Queued or running jobs nobody holds a live lease on, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id FROM jobs WHERE status IN ('queued', 'running') "
+                "AND (lease_owner IS NULL OR lease_expires < ?) ORDER BY created_at", (time.time(),)
+            ).fetchall()
+        return [job_id for (job_id,) in rows]
+
+    def claim_job(self, job_id, owner):
+        """Take the lease of an unfinished job if it is free or expired; True if owner now holds it"""
+        now = time.time()
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET lease_owner = ?, lease_expires = ? WHERE job_id = ? "
+                "AND status IN ('queued', 'running') AND (lease_owner IS NULL OR lease_expires < ?)",
+                (owner, now + UPLOAD_JOB_LEASE_SECONDS, job_id, now)
+            ).rowcount == 1
+
+    def renew_leases(self, owner):
+        """Extend the leases of every unfinished job owner holds"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE lease_owner = ? AND status IN ('queued', 'running')",
+                (time.time() + UPLOAD_JOB_LEASE_SECONDS, owner)
+            )
+
+job_store = JobStore(UPLOAD_JOBS_DB)
+_executor = ThreadPoolExecutor(max_workers=UPLOAD_JOB_WORKERS, thread_name_prefix='upload-job')
+_jobs_lock = threading.Lock()
+# job IDs queued or running in this process, and the process the monitor runs in
+_active = set()
+_monitor_pid = None
+_owner = None
+
+def _lease_owner():
+    """Name of this process in job leases; a forked worker gets its own"""
+    global _owner
+    with _jobs_lock:
+        if _owner is None or _owner[0] != os.getpid():
+            _owner = (os.getpid(), f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}")
+        return _owner[1]
+
+class JobResultSink:
+    """Ingestion sink committing each block's results and progress to the job store"""
+
+    def __init__(self, job_id, owner, rows_done=0, rows_failed=0):
+        self.job_id = job_id
+        self.owner = owner
+        self.rows_done = rows_done
+        self.rows_failed = rows_failed
+
+    def write_chunk(self, results):
+        failed = sum(1 for _, status, _ in results if status == 'failed')
+        self.rows_done += len(results) - failed
+        self.rows_failed += failed
+        job_store.add_results(self.job_id, results, self.rows_done, self.rows_failed, self.owner)
+
+def process_upload_job(job_id):
+    """Stream an uploaded file through chunked ingestion, recording progress"""
+    owner = _lease_owner()
+    job = job_store.get_job(job_id)
+    try:
+        if job is None or job['status'] not in ('queued', 'running') or job['lease_owner'] != owner:
+            return
+
+        job_store.update_job(job_id, owner, status='running', started_at=job['started_at'] or time.time(),
+                             total_rows=job['total_rows'] or estimate_row_count(job['file_path']))
+
+        # Resume after the last committed chunk when restarted mid-job. The
+        # job keeps its chunk size, so blocks line up with the ones already
+        # applied even if UPLOAD_CHUNK_SIZE changed in between.
+        sink = JobResultSink(job_id, owner, job['rows_done'], job['rows_failed'])
+        ingest_file(job['file_path'], sink, job['chunk_size'] or CHUNK_SIZE,
+                    skip_rows=job['rows_done'] + job['rows_failed'], job_id=job_id)
+
+        job_store.update_job(job_id, owner, status='completed', message=f'Processed {sink.rows_done} records',
+                             total_rows=sink.rows_done + sink.rows_failed, finished_at=time.time())
+    except LeaseLost:
+        # this process stalled past its lease and another one took the job over
+        print(f"Upload job {job_id} was taken over by another process")
+    except IngestionError as e:
+        job_store.update_job(job_id, owner, status='failed', message=f'Data validation failed: {str(e)}',
+                             finished_at=time.time())
+    except ValueError as e:
+        job_store.update_job(job_id, owner, status='failed', message=f'Failed to load file: {str(e)}',
+                             finished_at=time.time())
+    except Exception as e:
+        print(traceback.format_exc())
+        job_store.update_job(job_id, owner, status='failed', message=f'Error processing file: {str(e)}',
+                             finished_at=time.time())
+    finally:
+        with _jobs_lock:
+            _active.discard(job_id)
+
+def _queue_job(job_id):
+    """Run a job this process holds the lease of, unless it is already queued here"""
+    with _jobs_lock:
+        if job_id in _active:
+            return
+        _active.add(job_id)
+    _executor.submit(process_upload_job, job_id)
+
+def submit_upload_job(file_path, filename):
+    """Queue an uploaded file for background processing and return its job ID"""
+    start_job_monitor()
+    job_id = job_store.create_job(file_path, filename, _lease_owner())
+    _queue_job(job_id)
+    return job_id
+
+def resume_unfinished_jobs():
+    """Take over queued or running jobs whose lease expired (their process died or
+    was recycled, or the server restarted) and run them here"""
+    owner = _lease_owner()
+    for job_id in job_store.expired_jobs():
+        if job_store.claim_job(job_id, owner):
+            _queue_job(job_id)
+
+def _monitor_jobs():
+    # a few renewals per lease period, so one slow pass never lets a live lease expire
+    interval = UPLOAD_JOB_LEASE_SECONDS / 4
+    while True:
+        try:
+            job_store.renew_leases(_lease_owner())
+            resume_unfinished_jobs()
+        except Exception:
+            print(traceback.format_exc())
+        time.sleep(interval)
+
+def start_job_monitor():
+    """Start this process's job monitor thread (once per process).
+
+    It renews the leases of the jobs this process runs and resumes jobs
+    whose lease expired, so every worker process picks up abandoned jobs,
+    whichever worker it is and however it was started.
+    """
+    global _monitor_pid
+    with _jobs_lock:
+        if _monitor_pid == os.getpid():
+            return
+        _monitor_pid = os.getpid()
+    threading.Thread(target=_monitor_jobs, name='upload-job-monitor', daemon=True).start()
+
+def get_job_status(job_id):
+    """Job record with progress percentage and ETA, or None"""
+    job = job_store.get_job(job_id)
+    if job is None:
+        return None
+
+    processed = job['rows_done'] + job['rows_failed']
+    total = job['total_rows']
+    eta_seconds = None
+    if job['status'] == 'running' and total and processed and job['started_at']:
+        elapsed = time.time() - job['started_at']
+        eta_seconds = round(elapsed / processed * (total - processed), 1)
+
+    return {
+        'job_id': job['job_id'],
+        'filename': job['filename'],
+        'status': job['status'],
+        'message': job['message'],
+        'total_rows': total,
+        'rows_done': job['rows_done'],
+        'rows_failed': job['rows_failed'],
+        'progress': min(round(processed / total * 100, 1), 100.0) if total else 0.0,
+        'eta_seconds': eta_seconds,
+        'created_at': job['created_at'],
+        'finished_at': job['finished_at']
+    }
+
+def get_job_results(job_id, offset=0, limit=100):
+    """Page of results produced so far, in file row order"""
+    return job_store.get_results(job_id, offset, limit)
@@ -0,0 +1,233 @@
+import os
+import threading
+import uuid
+from collections import deque
+import pandas as pd
+
+from data_loader import BASE_DIR
+from business_storage import ConnectionPool, claim_upload_batch
+from portfolio_query import HEALTH_SCORE_FIELD
+
+# Latest summary of every uploaded business, shared by worker processes and kept across restarts
+UPLOAD_REGISTRY_DB = os.environ.get('UPLOAD_REGISTRY_DB', os.path.join(BASE_DIR, 'uploaded_businesses.db'))
+
+# Computed ratio -> analysis section it is reported in, kept per uploaded
+# business for the peer percentiles and rankings
+UPLOADED_RATIOS = {
+    'current_ratio': 'liquidity_ratios',
+    'quick_ratio': 'liquidity_ratios',
+    'profit_margin': 'profitability_ratios',
+    'roa': 'profitability_ratios',
+    'roe': 'profitability_ratios',
+    'debt_equity_ratio': 'leverage_ratios',
+    'debt_ratio': 'leverage_ratios',
+    'equity_multiplier': 'leverage_ratios',
+    'dscr': 'leverage_ratios',
+    'asset_turnover': 'efficiency_ratios',
+    'receivables_turnover': 'efficiency_ratios',
+    'inventory_turnover': 'efficiency_ratios',
+    'days_inventory': 'efficiency_ratios',
+    'days_receivables': 'efficiency_ratios',
+    'working_capital_ratio': 'working_capital',
+    'cash_conversion_cycle': 'working_capital',
+    HEALTH_SCORE_FIELD: 'financial_health',
+}
+
+# Summary column -> SQL type, per uploaded business. NUMERIC keeps whole
+# numbers as integers, so totals stay integers as with the dataset's columns
+UPLOADED_FIELDS = {
+    'industry_type': 'TEXT',
+    'annual_revenue': 'NUMERIC',
+    'loan_amount': 'NUMERIC',
+    'financial_health_score': 'NUMERIC',
+    'risk_category': 'TEXT',
+    **{ratio: 'REAL' for ratio in UPLOADED_RATIOS},
+}
+
+# Syncs whose changes each process keeps for changes(); older tokens get a full snapshot
+_CHANGE_LOG_SIZE = 64
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+class UploadRegistry:
+    """Uploaded businesses, one row per business_id (the latest upload wins).
+
+    Rows live in SQLite, so every worker process sees the same uploads and
+    they survive restarts. A write bumps a shared generation counter in
+    the same transaction and stamps the rows it touched with it. Each
+    process mirrors the table in a DataFrame and catches up by reading only
+    rows stamped after its last sync. token names the shared state, so
+    ETags built from it agree across workers. The rows each recent sync
+    replaced and added are kept, so consumers with incremental state can
+    apply changes() instead of rebuilding from the whole frame.
+    """
+
+    def __init__(self, path=UPLOAD_REGISTRY_DB):
+        self.path = path
+        self.pool = ConnectionPool(path)
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        # mirror: epoch and generation it reflects
+        self._epoch = None
+        self._synced = 0
+        self._frame = self._empty_frame()
+        # (from generation, to generation, replaced rows, added rows) per sync
+        self._log = deque(maxlen=_CHANGE_LOG_SIZE)
+
+    @staticmethod
+    def _empty_frame():
+        return pd.DataFrame({name: pd.Series(dtype=object if sql_type == 'TEXT' else float)
+                             for name, sql_type in {'business_id': 'TEXT', **UPLOADED_FIELDS}.items()})
+
+    def _ensure_schema(self, conn):
+        if self._schema_ready:
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute('CREATE TABLE IF NOT EXISTS registry_meta (key TEXT PRIMARY KEY, value)')
+        conn.execute('CREATE TABLE IF NOT EXISTS uploaded_businesses (business_id TEXT PRIMARY KEY, seq INTEGER NOT NULL)')
+        existing = {row[1] for row in conn.execute('PRAGMA table_info(uploaded_businesses)')}
+        for name, sql_type in UPLOADED_FIELDS.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE uploaded_businesses ADD COLUMN {_quote(name)} {sql_type}")
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_uploaded_businesses_seq ON uploaded_businesses (seq)')
+        # epoch changes when the file is recreated, so tokens from an older file never match
+        conn.execute("INSERT OR IGNORE INTO registry_meta (key, value) VALUES ('epoch', ?)", (uuid.uuid4().hex[:12],))
+        conn.execute("INSERT OR IGNORE INTO registry_meta (key, value) VALUES ('generation', 0)")
+        conn.execute("INSERT OR IGNORE INTO registry_meta (key, value) VALUES ('cleared', 0)")
+        conn.execute('COMMIT')
+        self._schema_ready = True
+
+    def _meta(self, conn):
+        return dict(conn.execute('SELECT key, value FROM registry_meta').fetchall())
+
+    @property
+    def token(self):
+        """Changes whenever any process records uploads"""
+        with self.pool.connection() as conn:
+            self._ensure_schema(conn)
+            meta = self._meta(conn)
+        return f"{meta['epoch']}-{meta['generation']}"
+
+    def record(self, rows, batch=None):
+        """Insert or overwrite uploaded businesses (a frame with business_id and UPLOADED_FIELDS).
+
+        batch is (job_id, start_row, end_row) for a block of an upload job;
+        a block the job already recorded is skipped, so a resumed job never
+        overwrites a later upload of the same business with its old values.
+        """
+        if rows is None or rows.empty:
+            return
+        rows = rows.drop_duplicates('business_id', keep='last')
+        names = ['business_id'] + list(UPLOADED_FIELDS)
+        values = [rows[name].tolist() if name in rows.columns else [None] * len(rows) for name in names]
+        sql = (f"INSERT OR REPLACE INTO uploaded_businesses (seq, {', '.join(_quote(name) for name in names)}) "
+               f"VALUES (?{', ?' * len(names)})")
+        with self.pool.connection() as conn:
+            self._ensure_schema(conn)
+            conn.execute('BEGIN IMMEDIATE')
+            if not claim_upload_batch(conn, batch):
+                conn.execute('COMMIT')
+                return
+            generation = conn.execute("SELECT value FROM registry_meta WHERE key = 'generation'").fetchone()[0] + 1
+            # NaN is stored as NULL
+            conn.executemany(sql, zip([generation] * len(rows), *values))
+            conn.execute("UPDATE registry_meta SET value = ? WHERE key = 'generation'", (generation,))
+            conn.execute('COMMIT')
+
+    def _sync(self):
+        """Catch the mirror up with the table; returns the token. Call with _lock held."""
+        with self.pool.connection() as conn:
+            self._ensure_schema(conn)
+            # one read transaction, so the rows match the generation read with them
+            conn.execute('BEGIN')
+            meta = self._meta(conn)
+            epoch, generation = meta['epoch'], meta['generation']
+            if epoch != self._epoch or meta['cleared'] > self._synced:
+                self._frame, self._synced = self._empty_frame(), 0
+                self._log.clear()
+            if generation != self._synced:
+                names = ['business_id'] + list(UPLOADED_FIELDS)
+                changed = conn.execute(
+                    f"SELECT {', '.join(_quote(name) for name in names)} FROM uploaded_businesses "
+                    f"WHERE seq > ? ORDER BY seq", (self._synced,)
+                ).fetchall()
+                self._merge(changed, names, generation)
+            conn.execute('COMMIT')
+            self._epoch, self._synced = epoch, generation
+        return f"{epoch}-{generation}"
+
+    def snapshot(self):
+        """(token, frame) of every uploaded business; treat the frame as read-only"""
+        with self._lock:
+            return self._sync(), self._frame
+
+    def changes(self, since):
+        """(token, frame, changes) where changes lists the (replaced, added)
+        row frames of every sync after token since, oldest first, or is None
+        when they are no longer kept (rebuild from frame then)
+        """
+        with self._lock:
+            token = self._sync()
+            if since == token:
+                return token, self._frame, []
+            epoch, _, generation = (since or '').partition('-')
+            entries = list(self._log) if epoch == self._epoch else []
+            # the kept syncs must continue exactly where since left off
+            while entries and str(entries[0][0]) != generation:
+                entries.pop(0)
+            if not entries:
+                return token, self._frame, None
+            return token, self._frame, [(replaced, added) for _, _, replaced, added in entries]
+
+    def _merge(self, changed, names, generation):
+        """Replace the mirror frame by one with changed rows replacing (or appended after) the current ones"""
+        changes = pd.DataFrame(changed, columns=names)
+        for name, sql_type in UPLOADED_FIELDS.items():
+            if sql_type != 'TEXT':
+                # NULL becomes NaN
+                changes[name] = pd.to_numeric(changes[name], errors='coerce')
+        replaced = self._frame['business_id'].isin(changes['business_id'])
+        self._log.append((self._synced, generation, self._frame[replaced], changes))
+        if len(changes):
+            kept = self._frame[~replaced]
+            self._frame = pd.concat([kept, changes], ignore_index=True) if len(kept) else changes
+
+    def reset(self):
+        """Forget every uploaded business"""
+        with self.pool.connection() as conn:
+            self._ensure_schema(conn)
+            conn.execute('BEGIN IMMEDIATE')
+            generation = conn.execute("SELECT value FROM registry_meta WHERE key = 'generation'").fetchone()[0] + 1
+            conn.execute('DELETE FROM uploaded_businesses')
+            conn.execute("UPDATE registry_meta SET value = ? WHERE key IN ('generation', 'cleared')", (generation,))
+            conn.execute('COMMIT')
+
+upload_registry = UploadRegistry()
+
+def record_uploaded_businesses(df, analyses, batch=None):
+    """Record analyzed upload rows for the dashboard, rankings and peer percentiles.
+
+    analyses is parallel to df's rows (None for rows that failed). Score
+    and risk category come from the file when present, otherwise from the
+    computed financial health assessment. batch is passed to
+    UploadRegistry.record.
+    """
+    keep = [analysis is not None for analysis in analyses]
+    if not any(keep):
+        return
+    df = df[keep]
+    analyses = [analysis for analysis in analyses if analysis is not None]
+
+    rows = pd.DataFrame({'business_id': [str(analysis['business_id']) for analysis in analyses]})
+    rows['industry_type'] = df['industry_type'].to_numpy() if 'industry_type' in df.columns else 'Unknown'
+    rows['annual_revenue'] = df['annual_revenue'].to_numpy() if 'annual_revenue' in df.columns else 0
+    if 'loan_amount' in df.columns:
+        rows['loan_amount'] = df['loan_amount'].to_numpy()
+    for column, key in (('financial_health_score', 'health_score'), ('risk_category', 'risk_category')):
+        computed = pd.Series([a['financial_health'][key] for a in analyses])
+        rows[column] = (pd.Series(df[column].to_numpy()).fillna(computed) if column in df.columns else computed)
+    for ratio, section in UPLOADED_RATIOS.items():
+        rows[ratio] = [analysis[section].get(ratio) for analysis in analyses]
+
+    upload_registry.record(rows, batch)